@@ -1,22 +1,77 @@
+import os
+import pydantic
 from fastmcp import FastMCP
-from typing import Any
-from clumio_terraform_mcp import models, utils, constants
+from typing import Any, Literal
+from clumio_terraform_mcp import models, utils, constants, schema, partition, scenarios, drift, dedupe, tfjson, stagger, bucket_groups, ou_tree, compact, patch, scheduling
+
+OutputFormat = Literal['hcl', 'json', 'compact', 'summary']
+# Formats of tools whose configuration spans many resources, which are only rendered in native syntax
+TextFormat = Literal['hcl', 'compact', 'summary']
 
 # Initialize MCP server
 mcp = FastMCP("Clumio Terraform Provider MCP Server")
 
+# Clients sharing the server are served from their own queues in weighted fair order
+scheduler = scheduling.scheduler_from_environment()
+mcp.add_middleware(scheduling.FairSchedulingMiddleware(scheduler, exempt_tools={"get_scheduler_metrics"}))
+
+# Directory that tools read and write files in on behalf of clients, by default the working directory
+WORKSPACE_VARIABLE = "CLUMIO_MCP_WORKSPACE"
+
+def _workspace_path(path: str, suffix: str = '') -> str:
+    """Resolve a path a client passed, relative to the workspace, and check that it stays inside it.
+
+    Raises:
+        ValueError: If the path resolves outside the workspace or does not end in suffix
+    """
+    root = os.path.realpath(os.environ.get(WORKSPACE_VARIABLE) or os.getcwd())
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path} is outside the workspace {root}")
+    if not resolved.endswith(suffix):
+        raise ValueError(f"{path} is not a {suffix} file")
+    return resolved
+
+def tool(fn):
+    """Register a synchronous function as a tool that runs on a worker thread, and return the function."""
+    mcp.tool(scheduling.run_in_thread(fn))
+    return fn
+
+def _render(configuration: str, output_format: OutputFormat) -> str | models.CompactConfiguration:
+    """Render configuration of a generate_* tool, with its token estimate in compact output formats."""
+    rendered, token_estimate = compact.render_estimated(configuration, output_format)
+    if token_estimate is None:
+        return rendered
+    return models.CompactConfiguration(configuration=rendered, token_estimate=token_estimate)
+
+# Load the bundled provider schema and scenario index once so tool calls only pay for lookups
+schema.load_schema_index()
+scenarios.load_index()
+
 # MCP Tools
-@mcp.tool
+@tool
 def generate_providers(
     clumio_accounts: list[models.ClumioAccount], 
-    aws_accounts: list[models.AWSAccount]
-) -> str:
-    """Generate Terraform configuration for Provider blocks of Clumio and AWS."""
-    return utils.render_tf_template(
+    aws_accounts: list[models.AWSAccount],
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
+    """Generate Terraform configuration for Provider blocks of Clumio and AWS.
+
+    Args:
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
+    """
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.providers(
+            clumio_accounts=clumio_accounts,
+            aws_accounts=aws_accounts,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'provider.tf.j2', clumio_accounts=clumio_accounts, aws_accounts=aws_accounts
-    ).strip()
+    ).strip()), output_format)
 
-@mcp.tool
+@tool
 def generate_aws_connection(
     connection_name: str,
     description: str,
@@ -24,8 +79,9 @@ def generate_aws_connection(
     clumio_provider_alias: str | None = None,
     aws_provider_alias: str | None = None,
     wait_for_data_plane_resources: bool = False,
-    wait_for_ingestion: bool = False
-) -> str:
+    wait_for_ingestion: bool = False,
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
     """Generate Terraform configuration for Clumio AWS connection.
     
     Args:
@@ -36,8 +92,21 @@ def generate_aws_connection(
         aws_provider_alias: Alias name for AWS provider
         wait_for_data_plane_resources: Flag to indicate wait for data plane resources to be created
         wait_for_ingestion: Flag to indicate wait for ingestion to complete
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
     """
-    return utils.render_tf_template(
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.aws_connection(
+            connection_name=connection_name,
+            description=description,
+            services=services,
+            clumio_provider_alias=clumio_provider_alias,
+            aws_provider_alias=aws_provider_alias,
+            wait_for_data_plane_resources=wait_for_data_plane_resources,
+            wait_for_ingestion=wait_for_ingestion,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'aws_connection.tf.j2',
         clumio_provider_alias=clumio_provider_alias,
         connection_name=connection_name,
@@ -46,15 +115,16 @@ def generate_aws_connection(
         aws_provider_alias=aws_provider_alias,
         wait_for_data_plane_resources=wait_for_data_plane_resources,
         wait_for_ingestion=wait_for_ingestion,
-    ).strip()
+    ).strip()), output_format)
 
-@mcp.tool
+@tool
 def generate_policy(
     policy_name: str,
     display_name: str,
     operations: list[models.Operation],
     clumio_provider_alias: str | None = None,
-) -> str:
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
     """Generate a Clumio policy for backup configuration.
     
     Args:
@@ -62,16 +132,26 @@ def generate_policy(
         display_name: Human-readable name
         operations: List of operation types and settings for policy
         clumio_provider_alias: Alias name for Clumio provider
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
     """
-    return utils.render_tf_template(
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.policy(
+            policy_name=policy_name,
+            display_name=display_name,
+            operations=operations,
+            clumio_provider_alias=clumio_provider_alias,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'policy.tf.j2',
         clumio_provider_alias=clumio_provider_alias,
         policy_name=policy_name,
         display_name=display_name,
         operations=operations,
-    ).strip()
+    ).strip()), output_format)
 
-@mcp.tool
+@tool
 def generate_protection_group(
     group_name: str,
     display_name: str,
@@ -80,7 +160,8 @@ def generate_protection_group(
     bucket_rule: dict[str, Any],
     storage_classes: list[str] = constants.DEFAULT_STORAGE_CLASSES,
     clumio_provider_alias: str | None = None,
-) -> str:
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
     """Generate a protection group for organizing resources.
     
     Args:
@@ -98,8 +179,21 @@ def generate_protection_group(
                 - rule condition: $eq, $in
         storage_classes: List of storage classes to include
         clumio_provider_alias: Alias name for Clumio provider
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
     """
-    return utils.render_tf_template(
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.protection_group(
+            group_name=group_name,
+            display_name=display_name,
+            policy_name=policy_name,
+            description=description,
+            bucket_rule=bucket_rule,
+            storage_classes=storage_classes,
+            clumio_provider_alias=clumio_provider_alias,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'protection_group.tf.j2',
         clumio_provider_alias=clumio_provider_alias,
         group_name=group_name,
@@ -108,16 +202,17 @@ def generate_protection_group(
         description=description,
         bucket_rule=bucket_rule,
         storage_classes=storage_classes
-    ).strip()
+    ).strip()), output_format)
 
-@mcp.tool
+@tool
 def generate_organizational_unit(
     ou_name: str,
     display_name: str,
     description: str,
     parent_name: str | None = None,
     clumio_provider_alias: str | None = None,
-) -> str:
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
     """Generate an organizational unit for hierarchical management.
 
     Ensure that the provider for OU is set correctly. The provider configuring parent OU should be used to create child OUs.
@@ -128,17 +223,28 @@ def generate_organizational_unit(
         description: Description of the organizational unit
         parent_name: Reference to parent OU (If not provided, defaults to root level)
         clumio_provider_alias: Alias name for Clumio provider
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
     """
-    return utils.render_tf_template(
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.organizational_unit(
+            ou_name=ou_name,
+            display_name=display_name,
+            description=description,
+            parent_name=parent_name,
+            clumio_provider_alias=clumio_provider_alias,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'organizational_unit.tf.j2',
         clumio_provider_alias=clumio_provider_alias,
         ou_name=ou_name,
         display_name=display_name,
         description=description,
         parent_name=parent_name
-    ).strip()
+    ).strip()), output_format)
 
-@mcp.tool
+@tool
 def generate_policy_rule(
     rule_name: str,
     display_name: str,
@@ -146,7 +252,8 @@ def generate_policy_rule(
     condition_expression: dict[str, Any],
     before_rule_name: str | None = None,
     clumio_provider_alias: str | None = None,
-) -> str:
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
     """Generate a policy rule to apply protection policies to resources.
     
     Args:
@@ -166,8 +273,20 @@ def generate_policy_rule(
                 - rule condition: $eq, $in
         before_rule_name: Reference to the rule which should run before this one
         clumio_provider_alias: Alias name for Clumio provider. Note that policy rules can be created, edited or deleted only by global admin or immediate child OU admins. Which means it doesn't allow providers that configured with grandchild OUs
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
     """
-    return utils.render_tf_template(
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.policy_rule(
+            rule_name=rule_name,
+            display_name=display_name,
+            policy_name=policy_name,
+            condition_expression=condition_expression,
+            before_rule_name=before_rule_name,
+            clumio_provider_alias=clumio_provider_alias,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'policy_rule.tf.j2',
         clumio_provider_alias=clumio_provider_alias,
         rule_name=rule_name,
@@ -175,16 +294,17 @@ def generate_policy_rule(
         policy_name=policy_name,
         condition_expression=condition_expression,
         before_rule_name=before_rule_name
-    ).strip()
+    ).strip()), output_format)
 
-@mcp.tool
+@tool
 def generate_user_assignment(
     user_name: str,
     email: str,
     full_name: str,
     access_control_configuration: list[models.AccessControlConfiguration],
     clumio_provider_alias: str | None = None,
-) -> str:
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
     """Generate user assignment configuration.
     
     Args:
@@ -193,17 +313,28 @@ def generate_user_assignment(
         email: User's email address
         full_name: User's full name
         access_control_configuration: List of access control configurations
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
     """
-    return utils.render_tf_template(
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.user_assignment(
+            user_name=user_name,
+            email=email,
+            full_name=full_name,
+            access_control_configuration=access_control_configuration,
+            clumio_provider_alias=clumio_provider_alias,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'user.tf.j2',
         clumio_provider_alias=clumio_provider_alias,
         user_name=user_name,
         email=email,
         full_name=full_name,
         access_control_configuration=access_control_configuration,
-    ).strip()
+    ).strip()), output_format)
 
-@mcp.tool
+@tool
 def generate_report_configuration(
     config_name: str,
     config_display_name: str,
@@ -212,7 +343,8 @@ def generate_report_configuration(
     filters: models.ComplianceFilter,
     schedule: models.Schedule,
     clumio_provider_alias: str | None = None,
-) -> str:
+    output_format: OutputFormat = 'hcl',
+) -> str | models.CompactConfiguration:
     """Generate compliance report configuration.
     
     Args:
@@ -223,8 +355,21 @@ def generate_report_configuration(
         controls: Compliance controls to evaluate policy or assets for compliance
         filters: Compliance filters to apply
         schedule: Schedule for the report
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline. Compact and summary output is
+            returned together with its token estimate.
     """
-    return utils.render_tf_template(
+    if output_format == 'json':
+        return tfjson.dumps(tfjson.report_configuration(
+            config_name=config_name,
+            config_display_name=config_display_name,
+            email_list=email_list,
+            controls=controls,
+            filters=filters,
+            schedule=schedule,
+            clumio_provider_alias=clumio_provider_alias,
+        ))
+    return _render(schema.check_configuration(utils.render_tf_template(
         'report_configuration.tf.j2',
         clumio_provider_alias=clumio_provider_alias,
         config_name=config_name,
@@ -233,7 +378,341 @@ def generate_report_configuration(
         controls=controls,
         filters=filters,
         schedule=schedule
-    ).strip()
+    ).strip()), output_format)
+
+# Generators by resource kind, validating raw arguments the same way tool calls do
+GENERATORS = {
+    kind: pydantic.validate_call(generator)
+    for kind, generator in {
+        'aws_connection': generate_aws_connection,
+        'policy': generate_policy,
+        'protection_group': generate_protection_group,
+        'organizational_unit': generate_organizational_unit,
+        'policy_rule': generate_policy_rule,
+        'user_assignment': generate_user_assignment,
+        'report_configuration': generate_report_configuration,
+    }.items()
+}
+
+def render_resource(spec: models.ResourceSpec, output_format: OutputFormat = 'hcl') -> str | models.CompactConfiguration:
+    """Render a resource spec with the generate_* tool matching its kind, in the format the caller asks for."""
+    arguments = {name: value for name, value in spec.arguments.items() if name != 'output_format'}
+    return GENERATORS[spec.kind](**arguments, output_format=output_format)
+
+@tool
+def validate_configuration(configuration: str) -> list[str]:
+    """Validate Terraform configuration offline against the bundled Clumio provider schema.
+
+    Flags unknown arguments and blocks, missing required ones and type mismatches in every
+    clumio_* resource, data source and clumio provider block without running terraform init.
+
+    Args:
+        configuration: Terraform configuration text, e.g. the output of the generate_* tools
+    """
+    return [str(diagnostic) for diagnostic in schema.validate_configuration(configuration)]
+
+@tool
+def estimate_output_tokens(configuration: str, output_format: TextFormat = 'compact') -> models.TokenEstimate:
+    """Estimate how many LLM tokens configuration takes in an output format, compared with native syntax.
+
+    Args:
+        configuration: Terraform configuration in native syntax, e.g. the 'hcl' output of the generate_* tools
+        output_format: 'hcl', 'compact' or 'summary'
+    """
+    return compact.estimate(configuration, compact.render(configuration, output_format))
+
+@tool
+def plan_state_partitions(
+    resources: list[models.ResourceSpec],
+    clumio_accounts: list[models.ClumioAccount] = [],
+    aws_accounts: list[models.AWSAccount] = [],
+    partition_by: list[partition.PartitionDimension] = ['ou', 'account', 'region'],
+    ou_depth: int | None = None,
+    cross_partition_references: Literal['remote_state', 'data_source'] = 'remote_state',
+    remote_state_backend: str = 'local',
+    remote_state_config: dict[str, str] = partition.DEFAULT_REMOTE_STATE_CONFIG,
+) -> models.PartitionPlan:
+    """Split a large estate into independent root modules so plan time scales with the partition, not the estate.
+
+    Resources are grouped by the OU of their Clumio provider alias (see ClumioAccount.ou_name), AWS account and region.
+    The OU hierarchy itself is kept in an 'organization' partition and policy rules are grouped by OU only, because
+    rule order is defined per OU. References to resources in another partition are converted to terraform_remote_state
+    outputs, or to data source lookups for organizational units when cross_partition_references is 'data_source'.
+    Lookups find OUs by display name, so OUs sharing their display name with another OU are read from remote state.
+
+    Args:
+        resources: Every resource of the estate, as generate_* tool kinds and arguments
+        clumio_accounts: Clumio provider configurations used by the resources
+        aws_accounts: AWS provider configurations used by the AWS connections
+        partition_by: Dimensions of the partition key, any of 'ou', 'account' and 'region'
+        ou_depth: Merge OUs deeper than this level (1 is top-level) into their ancestor at this level
+        cross_partition_references: Resolve references via 'remote_state' outputs or 'data_source' lookups for OUs
+        remote_state_backend: Backend type used by the terraform_remote_state data sources
+        remote_state_config: Backend configuration of the remote state, where '{partition}' is replaced by the partition name
+    """
+    partitioner = partition.Partitioner(
+        clumio_accounts,
+        aws_accounts,
+        partition_by,
+        ou_depth=ou_depth,
+        cross_partition_references=cross_partition_references,
+        remote_state_backend=remote_state_backend,
+        remote_state_config=remote_state_config,
+    )
+    return partitioner.plan(resources, [render_resource(spec) for spec in resources])
+
+@tool
+def get_example_scenarios(
+    query: str | None = None,
+    resource_type: str | None = None,
+    service: str | None = None,
+    limit: int = 5,
+) -> list[models.ExampleScenario]:
+    """Find example scenarios with ready-to-adapt Terraform configurations.
+
+    Without any filter, the first scenarios of the catalog are returned.
+
+    Args:
+        query: Keywords to search for in the scenario titles and prompts, e.g. "tiered retention"
+        resource_type: Only return scenarios using this resource type, e.g. "clumio_policy_rule" or "policy_rule"
+        service: Only return scenarios protecting this AWS service: ebs, ec2, rds, s3 or dynamodb
+        limit: Maximum number of scenarios to return
+    """
+    return scenarios.load_index().search(query, resource_type=resource_type, service=service, limit=limit)
+
+@tool
+def analyze_state_drift(
+    state_path: str,
+    resources: list[models.ResourceSpec] = [],
+    configuration: str = '',
+) -> models.DriftReport:
+    """Compare Terraform state with the configuration the generate_* tools produce and report drift.
+
+    The state file is streamed, so state of any size is analyzed in bounded memory. Only attributes
+    whose values are known from the configuration are compared; references are resolved by Terraform
+    and therefore skipped.
+
+    Args:
+        state_path: Path to a terraform.tfstate file or to the output of 'terraform show -json', inside the
+            workspace of the server
+        resources: Desired resources, as generate_* tool kinds and arguments
+        configuration: Additional desired Terraform configuration text, e.g. an existing main.tf
+    """
+    configurations = [render_resource(spec) for spec in resources]
+    if configuration:
+        configurations.append(configuration)
+    with open(_workspace_path(state_path), encoding="utf-8") as state:
+        return drift.analyze(state, configurations)
+
+@tool
+def deduplicate_policies(
+    resources: list[models.ResourceSpec] = [],
+    configuration: str = '',
+) -> models.PolicyDeduplication:
+    """Merge policies that only differ in display name, time unit notation or operation and SLA order.
+
+    Durations are compared in canonical units, e.g. 24 hours equals 1 days and 12 months equals 1 years.
+    References to merged policies from policy rules, protection groups and policy assignments are rewritten
+    to the kept policy. Policies of the imported configuration are kept in preference to new ones.
+
+    Args:
+        resources: Resource specs of the workspace, as generate_* tool kinds and arguments
+        configuration: Existing Terraform configuration to deduplicate together with the resources
+    """
+    return dedupe.deduplicate(resources, configuration)
+
+@tool
+def stagger_report_schedules(
+    report_configurations: list[dict[str, Any]],
+    allowed_hours: list[int] = list(range(24)),
+    timezone: str | None = None,
+    frequency: Literal['daily', 'weekly', 'monthly'] | None = None,
+    slot_minutes: int = 15,
+    output_format: TextFormat = 'hcl',
+) -> models.StaggeredReports:
+    """Spread the schedules of many report configurations evenly so they do not all run at the same time.
+
+    Assigns start_time to every report, day_of_week to weekly and day_of_month to monthly reports, and
+    renders them with generate_report_configuration. Load is balanced in UTC across timezones, using their standard
+    offsets. A start_time given in a schedule is kept, and monthly reports on the last day of the month
+    (day_of_month -1) keep that day.
+
+    Args:
+        report_configurations: Arguments for generate_report_configuration. The schedule may be omitted.
+        allowed_hours: Hours of the day, in the timezone of each report, at which reports may start
+        timezone: Timezone for all reports in IANA format. By default the timezone of each schedule is kept.
+        frequency: Frequency for all reports. By default the frequency of each schedule is kept.
+        slot_minutes: Granularity of start times in minutes, a divisor of 60
+        output_format: 'hcl' for native syntax, 'compact' for minified native syntax or 'summary' for a one-line-per-block
+            outline, which come with a token estimate
+    """
+    overrides = {key: value for key, value in {"timezone": timezone, "frequency": frequency}.items() if value}
+    schedules = [
+        models.Schedule.model_validate(arguments.get("schedule") or {}).model_copy(update=overrides)
+        for arguments in report_configurations
+    ]
+    report_scheduler = stagger.ReportScheduler(allowed_hours, slot_minutes)
+    staggered = [
+        {**arguments, "schedule": schedule.model_dump()}
+        for arguments, schedule in zip(report_configurations, report_scheduler.assign(schedules))
+    ]
+    histogram = report_scheduler.histogram()
+    configuration, token_estimate = compact.render_estimated("\n\n".join(
+        render_resource(models.ResourceSpec(kind='report_configuration', arguments=arguments))
+        for arguments in staggered
+    ), output_format)
+    return models.StaggeredReports(
+        report_configurations=staggered,
+        configuration=configuration,
+        histogram=histogram,
+        peak_runs=max((slot.peak_runs for slot in histogram), default=0),
+        token_estimate=token_estimate,
+    )
+
+@tool
+def partition_protection_groups(
+    buckets: list[models.Asset],
+    group_count: int,
+    policy_name: str,
+    group_name_prefix: str = 'balanced',
+    tag_key: str | None = None,
+    split_by: list[bucket_groups.SplitDimension] = ['tag', 'account', 'region'],
+    balance_by: bucket_groups.BalanceMetric = 'object_count',
+    storage_classes: list[str] = constants.DEFAULT_STORAGE_CLASSES,
+    include_bucket_names: bool = False,
+    clumio_provider_alias: str | None = None,
+    output_format: TextFormat = 'hcl',
+) -> models.BucketPartition:
+    """Split an S3 bucket inventory into balanced protection groups so that no single group becomes a backup hotspot.
+
+    Buckets are bin-packed by object count or size into groups whose bucket_rule selects them by aws_tag,
+    aws_account_native_id and aws_region conditions. Every bucket of the inventory is checked to be covered
+    by exactly one group. Assets other than S3 buckets are ignored.
+
+    Args:
+        buckets: Bucket inventory with tags, object counts and sizes
+        group_count: Number of protection groups to create. More are created when a heavy tag value must be split by account or region.
+        policy_name: Reference to the policy resource assigned to every group
+        group_name_prefix: Prefix of the group resource names, which are numbered from 1
+        tag_key: Tag key whose values partition the buckets. Defaults to the key present on most buckets.
+        split_by: Dimensions used to split the buckets, in order of preference: 'tag', 'account' and 'region'
+        balance_by: Balance the groups by 'object_count' or 'size_bytes'
+        storage_classes: List of storage classes to include
+        include_bucket_names: Include the names of the buckets of each group in the result
+        clumio_provider_alias: Alias name for Clumio provider
+        output_format: 'hcl' for native syntax, 'compact' for minified native syntax or 'summary' for a one-line-per-block
+            outline, which come with a token estimate
+    """
+    s3_buckets = [bucket for bucket in buckets if bucket.asset_type == 'aws_s3_bucket']
+    partitioner = bucket_groups.BucketPartitioner(group_count, tag_key, split_by, balance_by)
+    partitioned = partitioner.partition(s3_buckets)
+    uncovered, overlapping = bucket_groups.verify_coverage([rule for rule, _ in partitioned], s3_buckets)
+    groups = [
+        models.BucketGroup(
+            group_name=f"{group_name_prefix}_{index}",
+            bucket_rule=rule,
+            bucket_count=len(members),
+            object_count=sum(bucket.object_count for bucket in members),
+            size_bytes=sum(bucket.size_bytes for bucket in members),
+            buckets=[bucket.native_id for bucket in members] if include_bucket_names else [],
+        )
+        for index, (rule, members) in enumerate(partitioned, start=1)
+    ]
+    weights = [getattr(group, balance_by) for group in groups]
+    mean = sum(weights) / len(weights) if weights else 0
+    configuration, token_estimate = compact.render_estimated("\n\n".join(
+        generate_protection_group(
+            group_name=group.group_name,
+            display_name=f"{group_name_prefix} {index}",
+            policy_name=policy_name,
+            description=f"Balanced group {index} of {len(groups)} ({group.bucket_count} buckets)",
+            bucket_rule=group.bucket_rule,
+            storage_classes=storage_classes,
+            clumio_provider_alias=clumio_provider_alias,
+        )
+        for index, group in enumerate(groups, start=1)
+    ), output_format)
+    return models.BucketPartition(
+        groups=groups,
+        configuration=configuration,
+        tag_key=partitioner.tag_key,
+        imbalance=round(max(weights) / mean, 3) if mean else 1.0,
+        uncovered=uncovered,
+        overlapping=overlapping,
+        token_estimate=token_estimate,
+    )
+
+@tool
+def generate_organizational_unit_tree(
+    roots: list[models.OUNode],
+    aws_accounts: list[models.AWSAccount] = [],
+    provider_alias_prefix: str = '',
+    leaf_providers: bool = False,
+    output_format: OutputFormat = 'hcl',
+) -> models.OUTree:
+    """Generate a whole organizational unit hierarchy with the Clumio providers each level needs, in one call.
+
+    Top-level OUs are created through the default (global) provider and every child OU through a provider
+    scoped to its parent. Policy rules may only be managed by the global provider or providers scoped to
+    top-level OUs; use policy_rule_provider_aliases as clumio_provider_alias of generate_policy_rule.
+
+    Args:
+        roots: Top-level OUs, each with its nested children
+        aws_accounts: AWS provider configurations to include alongside the Clumio providers
+        provider_alias_prefix: Prefix of the provider aliases, which are otherwise the OU resource names
+        leaf_providers: Also create providers for OUs without children, e.g. to manage resources in them
+        output_format: 'hcl' for native syntax, 'json' for Terraform JSON syntax (.tf.json), 'compact' for minified
+            native syntax or 'summary' for a one-line-per-block outline
+    """
+    tree = ou_tree.plan(roots, provider_alias_prefix, leaf_providers)
+    token_estimate = None
+    if output_format == 'json':
+        configuration = tfjson.dumps(tfjson.merge([
+            tfjson.providers(tree.clumio_accounts, aws_accounts),
+            *(tfjson.organizational_unit(**spec.arguments) for spec in tree.specs),
+        ]))
+    else:
+        configuration, token_estimate = compact.render_estimated("\n\n".join([
+            generate_providers(tree.clumio_accounts, aws_accounts),
+            *(render_resource(spec) for spec in tree.specs),
+        ]), output_format)
+    return models.OUTree(
+        configuration=configuration,
+        organizational_units=[spec.arguments["ou_name"] for spec in tree.specs],
+        provider_aliases=tree.provider_aliases,
+        policy_rule_provider_aliases=tree.policy_rule_provider_aliases,
+        depth=tree.depth,
+        token_estimate=token_estimate,
+    )
+
+@tool
+def patch_configuration_file(
+    path: str,
+    resource: models.ResourceSpec,
+    address: str | None = None,
+) -> models.FilePatch:
+    """Re-render one resource and replace its blocks in an existing .tf file without rewriting the rest of it.
+
+    The top-level blocks of the file are indexed by address once and the index is reused until the file
+    changes, so editing one policy in a file of tens of thousands of lines only costs the size of its block.
+    The file is replaced atomically. Blocks of the resource that the file does not define yet are added.
+
+    Args:
+        path: Path to the .tf file to patch, inside the workspace of the server
+        resource: Resource to render, as a generate_* tool kind and arguments
+        address: Only patch the block with this address, e.g. "clumio_policy.gold". By default every block
+            the resource renders is patched, e.g. a protection group together with its policy assignment.
+    """
+    return patch.patch_file(_workspace_path(path, '.tf'), render_resource(resource), address)
+
+@mcp.tool
+def get_scheduler_metrics() -> models.SchedulerMetrics:
+    """Report the queue depth, running calls and queue wait times of every client sharing this server.
+
+    Tool calls are admitted from per-client queues in weighted fair order within the concurrency and
+    byte budgets of the server, so large requests of one client do not hold up small calls of others.
+    """
+    return scheduler.metrics()
 
 if __name__ == "__main__":
     mcp.run()
@@ -0,0 +1,236 @@
+# Balanced partitioning of S3 bucket inventories into protection groups.
+
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from clumio_terraform_mcp import models
+
+SplitDimension = Literal['tag', 'account', 'region']
+BalanceMetric = Literal['object_count', 'size_bytes']
+
+# Buckets without the partition tag
+UNTAGGED = None
+
+
+@dataclass(slots=True)
+class _Cell:
+    """Buckets that share the value of the dimension a scope is split by."""
+    value: str | None
+    weight: int = 0
+    buckets: list[models.Asset] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class _Scope:
+    """Buckets matching fixed conditions, split into cells along one dimension."""
+    conditions: list[tuple[SplitDimension, str | None, frozenset]]
+    dimension: SplitDimension
+    values: frozenset
+    cells: list[_Cell]
+
+    @property
+    def weight(self) -> int:
+        return sum(cell.weight for cell in self.cells)
+
+
+class BucketPartitioner:
+    """Bin-packs buckets into balanced groups whose members can be selected with a bucket rule.
+
+    A bucket rule combines conditions on different fields with AND, so every group is a set of values of
+    one dimension within a scope of fixed values of the other dimensions. Values heavier than an even
+    share are split by the next dimension. Groups are then allocated to scopes in proportion to their
+    weight and filled largest cell first.
+
+    Args:
+        group_count: Number of groups to create. More are created if the splits require it.
+        tag_key: Tag key whose values partition the buckets. Defaults to the key present on most buckets,
+            which is stored in this attribute when partitioning.
+        split_by: Dimensions to split by, in order
+        balance_by: Bucket property that groups are balanced by
+    """
+
+    def __init__(
+        self,
+        group_count: int,
+        tag_key: str | None = None,
+        split_by: list[SplitDimension] = ['tag', 'account', 'region'],
+        balance_by: BalanceMetric = 'object_count',
+    ):
+        if group_count < 1:
+            raise ValueError("group_count must be at least 1")
+        if not split_by or len(set(split_by)) != len(split_by):
+            raise ValueError("split_by must list distinct dimensions")
+        self.group_count = group_count
+        self.tag_key = tag_key
+        self.split_by = split_by
+        self.balance_by = balance_by
+
+    def _value(self, bucket: models.Asset, dimension: SplitDimension) -> str | None:
+        if dimension == 'tag':
+            return bucket.tags.get(self.tag_key) if self.tag_key else UNTAGGED
+        return bucket.aws_account_id if dimension == 'account' else bucket.aws_region
+
+    def _scopes(
+        self,
+        buckets: list[models.Asset],
+        dimensions: list[SplitDimension],
+        conditions: list[tuple[SplitDimension, str | None, frozenset]],
+        target: float,
+    ) -> list[_Scope]:
+        dimension = dimensions[0]
+        cells: dict[str | None, _Cell] = {}
+        for bucket in buckets:
+            value = self._value(bucket, dimension)
+            cell = cells.get(value)
+            if cell is None:
+                cell = cells[value] = _Cell(value)
+            cell.weight += getattr(bucket, self.balance_by)
+            cell.buckets.append(bucket)
+        remaining = dimensions[1:]
+        if len(cells) == 1 and remaining:
+            # Splitting by a single value selects nothing
+            return self._scopes(buckets, remaining, conditions, target)
+        values = frozenset(value for value in cells if value is not UNTAGGED)
+        scopes = []
+        kept = []
+        for cell in cells.values():
+            if cell.weight > target and remaining:
+                scopes.extend(self._scopes(cell.buckets, remaining, [*conditions, (dimension, cell.value, values)], target))
+            else:
+                kept.append(cell)
+        if kept:
+            scopes.insert(0, _Scope(conditions, dimension, values, kept))
+        return scopes
+
+    @staticmethod
+    def _allocate(scopes: list[_Scope], group_count: int) -> list[int]:
+        """Distribute groups over scopes by the highest average weight per group (D'Hondt)."""
+        allocation = [1] * len(scopes)
+        heap = [(-scope.weight, index) for index, scope in enumerate(scopes) if len(scope.cells) > 1]
+        heapq.heapify(heap)
+        for _ in range(group_count - len(scopes)):
+            if not heap:
+                break
+            _, index = heapq.heappop(heap)
+            allocation[index] += 1
+            if allocation[index] < len(scopes[index].cells):
+                heapq.heappush(heap, (-scopes[index].weight / allocation[index], index))
+        return allocation
+
+    def _condition(self, dimension: SplitDimension, selected: list[str | None], values: frozenset) -> tuple[str, Any] | None:
+        """Return the bucket rule field and condition matching the selected values of a dimension."""
+        if dimension != 'tag':
+            field_name = 'aws_account_native_id' if dimension == 'account' else 'aws_region'
+            selected = sorted(selected)
+            return field_name, {"$eq": selected[0]} if len(selected) == 1 else {"$in": selected}
+        if UNTAGGED in selected:
+            # Untagged buckets can only be selected as those not carrying any of the other values
+            excluded = sorted(values - set(selected))
+            if not excluded:
+                return None
+            tags = [{"key": self.tag_key, "value": value} for value in excluded]
+            return 'aws_tag', {"$not_eq": tags[0]} if len(tags) == 1 else {"$not_in": tags}
+        tags = [{"key": self.tag_key, "value": value} for value in sorted(selected)]
+        return 'aws_tag', {"$eq": tags[0]} if len(tags) == 1 else {"$in": tags}
+
+    def _rule(self, scope: _Scope, selected: list[str | None]) -> dict[str, Any]:
+        rule = {}
+        conditions = [(dimension, [value], values) for dimension, value, values in scope.conditions]
+        conditions.append((scope.dimension, selected, scope.values))
+        for dimension, chosen, values in conditions:
+            condition = self._condition(dimension, chosen, values)
+            if condition is not None:
+                rule[condition[0]] = condition[1]
+        return rule
+
+    def _fallback_rule(self, buckets: list[models.Asset]) -> dict[str, Any]:
+        """Select a group spanning every tag value by the accounts of its buckets."""
+        return dict([self._condition('account', list({bucket.aws_account_id for bucket in buckets}), frozenset())])
+
+    def partition(self, buckets: list[models.Asset]) -> list[tuple[dict[str, Any], list[models.Asset]]]:
+        """Split buckets into groups.
+
+        Returns:
+            The bucket rule and buckets of every group, heaviest group first.
+        """
+        if not buckets:
+            return []
+        if self.tag_key is None and 'tag' in self.split_by:
+            keys = Counter(key for bucket in buckets for key in bucket.tags)
+            self.tag_key = min(keys, key=lambda key: (-keys[key], key)) if keys else None
+        dimensions = [d for d in self.split_by if d != 'tag' or self.tag_key is not None] or ['account']
+        total = sum(getattr(bucket, self.balance_by) for bucket in buckets)
+        scopes = self._scopes(buckets, dimensions, [], total / self.group_count)
+        groups = []
+        for scope, count in zip(scopes, self._allocate(scopes, self.group_count)):
+            # Longest processing time first: the heaviest cell goes to the lightest group
+            bins: list[list[_Cell]] = [[] for _ in range(count)]
+            heap = [(0, index) for index in range(count)]
+            for cell in sorted(scope.cells, key=lambda cell: (-cell.weight, str(cell.value))):
+                load, index = heapq.heappop(heap)
+                bins[index].append(cell)
+                heapq.heappush(heap, (load + cell.weight, index))
+            for cells in bins:
+                if cells:
+                    members = [bucket for cell in cells for bucket in cell.buckets]
+                    groups.append((self._rule(scope, [cell.value for cell in cells]) or self._fallback_rule(members), members))
+        groups.sort(key=lambda group: -sum(getattr(bucket, self.balance_by) for bucket in group[1]))
+        return groups
+
+
+def _matches(condition: dict[str, Any], value: Any) -> bool:
+    operator, operand = next(iter(condition.items()))
+    if operator == "$eq":
+        return value == operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$not_eq":
+        return value != operand
+    if operator == "$not_in":
+        return value not in operand
+    raise ValueError(f"unsupported operator {operator!r}")
+
+
+def rule_matches(rule: dict[str, Any], bucket: models.Asset) -> bool:
+    """Evaluate a bucket rule built from $eq, $in, $not_eq and $not_in conditions against a bucket."""
+    for field_name, condition in rule.items():
+        if field_name == 'aws_account_native_id':
+            matched = _matches(condition, bucket.aws_account_id)
+        elif field_name == 'aws_region':
+            matched = _matches(condition, bucket.aws_region)
+        elif field_name == 'aws_tag':
+            operand = next(iter(condition.values()))
+            key = (operand[0] if isinstance(operand, list) else operand)["key"]
+            tag = {"key": key, "value": bucket.tags[key]} if key in bucket.tags else None
+            matched = _matches(condition, tag)
+        else:
+            raise ValueError(f"unsupported field {field_name!r}")
+        if not matched:
+            return False
+    return True
+
+
+def verify_coverage(rules: list[dict[str, Any]], buckets: list[models.Asset]) -> tuple[list[str], list[str]]:
+    """Check that every bucket matches exactly one rule.
+
+    Buckets with the same account, region and tags match the same rules, so each distinct
+    combination is evaluated once.
+
+    Returns:
+        Names of the buckets matching no rule and of those matching more than one.
+    """
+    matches: dict[tuple, int] = {}
+    uncovered, overlapping = [], []
+    for bucket in buckets:
+        signature = (bucket.aws_account_id, bucket.aws_region, tuple(sorted(bucket.tags.items())))
+        count = matches.get(signature)
+        if count is None:
+            count = matches[signature] = sum(rule_matches(rule, bucket) for rule in rules)
+        if count == 0:
+            uncovered.append(bucket.native_id)
+        elif count > 1:
+            overlapping.append(bucket.native_id)
+    return uncovered, overlapping
+
@@ -0,0 +1,258 @@
+# Token-minimal renderings of generated configuration for LLM clients.
+
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from clumio_terraform_mcp import hcl, models
+
+# Arguments Terraform requires to be static, which therefore cannot refer to local values
+_STATIC_ARGUMENTS = frozenset({
+    "provider", "providers", "count", "for_each", "depends_on", "source", "version", "alias",
+    "ignore_changes", "replace_triggered_by", "create_before_destroy", "prevent_destroy",
+})
+_WORDS = frozenset({"ident", "number", "string", "template"})
+_OPENERS = frozenset("{[(")
+_CLOSERS = frozenset("}])")
+_ESTIMATE_RE = re.compile(r"[A-Za-z]+|\d+|\s+|[^\sA-Za-z\d]")
+_REFERENCE_RE = re.compile(r"[A-Za-z_][\w-]*(?:\.[A-Za-z_][\w-]*|\[\d+\])*")
+
+# Longest literal shown in a summary before it is elided
+SUMMARY_VALUE_LENGTH = 40
+
+
+@dataclass(slots=True)
+class _Value:
+    """The minified value of an argument, which may be replaced by a reference to a local value."""
+    name: str
+    source: str
+    hoistable: bool
+
+
+def _minify_block(text: str, hoistable: bool) -> list[str | _Value]:
+    """Re-emit a top-level block with the fewest characters the HCL grammar allows.
+
+    Whitespace only separates adjacent words, comments are dropped and multi-line expressions are
+    joined onto one line, with commas replacing the newlines that separate object attributes.
+    """
+    out: list[str | _Value] = []
+    # 'block' for block bodies, otherwise the opening bracket of an expression ('for' for object for-expressions)
+    stack: list[str] = []
+    previous: tuple[str, str] | None = None
+    argument: str | None = None
+    known = True
+    value_start = 0
+    pending_comma = False
+
+    def close_value() -> None:
+        nonlocal argument
+        source = "".join(out[value_start:])
+        del out[value_start:]
+        out.append(_Value(argument, source, hoistable and known and argument not in _STATIC_ARGUMENTS))
+        argument = None
+
+    for token in hcl.tokenize(text):
+        kind = token.kind
+        in_expression = bool(stack) and stack[-1] != 'block'
+        if kind == 'eof':
+            break
+        if kind == 'newline':
+            if in_expression:
+                pending_comma = stack[-1] == '{' and previous is not None and previous[1] not in ('{', ',')
+                continue
+            if argument is not None:
+                close_value()
+            if out and out[-1] != "\n":
+                out.append("\n")
+                previous = None
+            continue
+        value = token.value if kind == 'punct' else text[token.start:token.end]
+        if pending_comma:
+            pending_comma = False
+            if value not in (',', '}'):
+                out.append(",")
+                previous = ('punct', ',')
+        if previous is not None and (
+            (previous[0] in _WORDS and kind in _WORDS)
+            # "a - b" must not become the identifier "a-b", nor "a / /" a comment
+            or (previous[0] == 'ident' and value.startswith('-'))
+            or (previous[1].endswith('/') and value[0] in '/*')
+        ):
+            out.append(" ")
+        if argument is not None and (kind == 'template' or (kind == 'ident' and value not in ('true', 'false', 'null'))):
+            known = False
+        if kind == 'punct' and value in _OPENERS:
+            stack.append('block' if value == '{' and not in_expression and argument is None else value)
+        elif kind == 'punct' and value in _CLOSERS:
+            if not in_expression and argument is not None:
+                close_value()
+            if stack:
+                stack.pop()
+        elif kind == 'ident' and value == 'for' and previous == ('punct', '{') and stack[-1:] == ['{']:
+            stack[-1] = 'for'
+        out.append(value)
+        if kind == 'punct' and value == '=' and not in_expression and argument is None:
+            argument = previous[1]
+            known = True
+            value_start = len(out)
+        previous = (kind, value)
+        if kind == 'template' and value.startswith('<<'):
+            # A heredoc ends at its closing marker, which must be followed by a newline
+            out.append("\n")
+            previous = None
+    if argument is not None:
+        close_value()
+    return out
+
+
+def minify(configuration: str) -> str:
+    """Return configuration that is equivalent to Terraform with as few tokens as possible.
+
+    Besides dropping alignment whitespace and comments, identical blocks (such as a data source
+    emitted by several generators) are kept once and literal values repeated across resources (such
+    as the default storage classes of protection groups) are hoisted into a locals block when that
+    is shorter. Local values are named after the first resource using them and the argument, e.g.
+    ``pg0_storage_classes``. Resource addresses are unique within a module, so the outputs of several
+    calls can be combined in one.
+
+    Args:
+        configuration: Configuration in native syntax, e.g. the output of the generate_* tools
+    """
+    document = hcl.parse(configuration)
+    blocks: list[list[str | _Value]] = []
+    # Name of the first block using each hoistable value
+    owners: dict[tuple[str, str], str] = {}
+    seen: set[str] = set()
+    for block in document.blocks:
+        segments = _minify_block(configuration[block.start:block.end], hoistable=block.type in ('resource', 'data'))
+        key = "".join(segment if isinstance(segment, str) else segment.source for segment in segments)
+        if key not in seen:
+            seen.add(key)
+            blocks.append(segments)
+            for segment in segments:
+                if isinstance(segment, _Value) and segment.hoistable:
+                    owners.setdefault((segment.name, segment.source), block.labels[-1])
+
+    locals_: dict[tuple[str, str], str] = {}
+    if not any(block.type == 'locals' for block in document.blocks):
+        repeated = Counter(
+            (segment.name, segment.source)
+            for segments in blocks for segment in segments
+            if isinstance(segment, _Value) and segment.hoistable
+        )
+        names: set[str] = set()
+        for (name, source), count in repeated.items():
+            base = f"{owners[name, source]}_{name}"
+            local, suffix = base, 2
+            while local in names:
+                local, suffix = f"{base}_{suffix}", suffix + 1
+            # Every use shrinks to local.<name> at the cost of one definition
+            saved = count * (len(source) - len(local) - len("local.")) - len(local) - len(source) - 2
+            if count > 1 and saved > 0:
+                names.add(local)
+                locals_[name, source] = local
+
+    rendered = []
+    if locals_:
+        rendered.append("locals{\n" + "".join(f"{local}={source}\n" for (_, source), local in locals_.items()) + "}")
+    for segments in blocks:
+        rendered.append("".join(
+            segment if isinstance(segment, str)
+            else f"local.{locals_[segment.name, segment.source]}" if (segment.name, segment.source) in locals_
+            else segment.source
+            for segment in segments
+        ))
+    return "\n".join(rendered)
+
+
+def _brief(value) -> str:
+    if isinstance(value, hcl.Expression):
+        if value.function:
+            return f"{value.function}(…)"
+        return value.source if _REFERENCE_RE.fullmatch(value.source) else "…"
+    if isinstance(value, list):
+        return f"[{len(value)}]"
+    if isinstance(value, dict):
+        return "{" + ",".join(value) + "}"
+    literal = json.dumps(value, ensure_ascii=False)
+    if len(literal) > SUMMARY_VALUE_LENGTH:
+        return literal[:SUMMARY_VALUE_LENGTH - 2] + '…"'
+    return literal
+
+
+def _provider(block: hcl.Block) -> str | None:
+    attribute = block.attributes.get("provider")
+    return attribute.value.source if attribute and isinstance(attribute.value, hcl.Expression) else None
+
+
+def summarize(configuration: str) -> str:
+    """Describe every top-level block on one line instead of rendering its full text.
+
+    Each line holds the block address, its arguments with short literals and references spelled out
+    and everything else elided, and the number of nested blocks of each type. A provider shared by
+    every resource and data source is stated once.
+
+    Args:
+        configuration: Configuration in native syntax, e.g. the output of the generate_* tools
+    """
+    blocks = hcl.parse(configuration).blocks
+    providers = {_provider(block) for block in blocks if block.type in ('resource', 'data')}
+    shared = next(iter(providers)) if len(providers) == 1 else None
+    lines = [f"# provider={shared}"] if shared else []
+    for block in blocks:
+        parts = [block.address]
+        for name, attribute in block.attributes.items():
+            if not (name == "provider" and shared and block.type in ('resource', 'data')):
+                parts.append(f"{name}={_brief(attribute.value)}")
+        nested = Counter(child.type for child in block.blocks)
+        parts.extend(f"{name}[{count}]" for name, count in nested.items())
+        lines.append(" ".join(parts))
+    return "\n".join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of tokens an LLM tokenizer splits text into.
+
+    Letters count a token per four characters, digits per three, every punctuation character one
+    and every run of whitespace one, which is close to byte-pair encodings of source code.
+    """
+    count = 0
+    for match in _ESTIMATE_RE.finditer(text):
+        piece = match.group()
+        if piece[0].isalpha():
+            count += (len(piece) + 3) // 4
+        elif piece[0].isdigit():
+            count += (len(piece) + 2) // 3
+        else:
+            count += 1
+    return count
+
+
+def estimate(configuration: str, rendered: str) -> models.TokenEstimate:
+    """Compare the estimated tokens of a rendering with those of the configuration in native syntax."""
+    tokens, full = estimate_tokens(rendered), estimate_tokens(configuration)
+    return models.TokenEstimate(
+        tokens=tokens, hcl_tokens=full, saved_percent=round(100 * (full - tokens) / full) if full else 0,
+    )
+
+
+def render(configuration: str, output_format: str) -> str:
+    """Render configuration in a compact output format.
+
+    Args:
+        configuration: Configuration in native syntax
+        output_format: 'compact' for minified configuration or 'summary' for a structural summary.
+            Any other format returns the configuration unchanged.
+    """
+    if output_format == 'compact':
+        return minify(configuration)
+    if output_format == 'summary':
+        return summarize(configuration)
+    return configuration
+
+
+def render_estimated(configuration: str, output_format: str) -> tuple[str, models.TokenEstimate | None]:
+    """Render configuration like render, together with its token estimate unless it is returned unchanged."""
+    rendered = render(configuration, output_format)
+    return rendered, None if rendered is configuration else estimate(configuration, rendered)
@@ -0,0 +1,188 @@
+# Canonical policy fingerprints and merging of semantically identical policies.
+
+import hashlib
+import json
+import re
+from typing import Any
+
+from clumio_terraform_mcp import hcl, models
+
+# Units of fixed length in minutes, and calendar units in months. The two scales are not comparable.
+_FIXED_UNITS = {'minutes': 1, 'hours': 60, 'days': 24 * 60, 'weeks': 7 * 24 * 60}
+_CALENDAR_UNITS = {'months': 1, 'years': 12}
+
+_POLICY_REFERENCE_RE = re.compile(r'(?<![\w."])clumio_policy\.([A-Za-z_][\w-]*)\b')
+
+
+def canonical_time_unit(time_unit: models.TimeUnit) -> models.TimeUnit:
+    """Express a duration in the largest unit that represents it exactly, e.g. 24 hours as 1 days."""
+    scale = _FIXED_UNITS if time_unit.unit in _FIXED_UNITS else _CALENDAR_UNITS
+    amount = time_unit.value * scale[time_unit.unit]
+    for unit, size in sorted(scale.items(), key=lambda item: -item[1]):
+        if amount % size == 0:
+            return models.TimeUnit(value=amount // size, unit=unit)
+    raise AssertionError("the smallest unit divides every amount")
+
+
+def canonical_sla(sla: models.SLA) -> models.SLA:
+    return models.SLA(
+        retention_duration=canonical_time_unit(sla.retention_duration),
+        rpo_frequency=canonical_time_unit(sla.rpo_frequency),
+    )
+
+
+def _sorted(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+
+
+def canonical_operation(operation: models.Operation) -> dict[str, Any]:
+    """Return the operation as rendered by the policy template, with canonical and sorted SLAs."""
+    return {
+        "type": operation.type,
+        "action_setting": "window" if operation.backup_window_tz else "immediate",
+        "slas": _sorted([canonical_sla(sla).model_dump() for sla in operation.slas]),
+        "advanced_settings": operation.generate_advanced_setting(),
+        "backup_aws_region": operation.backup_aws_region,
+        "backup_window_tz": operation.backup_window_tz.model_dump() if operation.backup_window_tz else None,
+        "timezone": operation.timezone,
+    }
+
+
+def policy_fingerprint(operations: list[dict[str, Any]], clumio_provider_alias: str | None = None) -> str:
+    """Hash canonical operations. The display name is not part of the fingerprint.
+
+    Args:
+        operations: Operations as returned by canonical_operation
+        clumio_provider_alias: Alias of the Clumio provider, since policies are owned by an OU
+    """
+    encoded = json.dumps(
+        {"provider": clumio_provider_alias, "operations": _sorted(operations)}, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+def _flatten(block: hcl.Block) -> dict[str, Any]:
+    """Convert a block into a dictionary, with nested blocks keyed by their type."""
+    values: dict[str, Any] = {name: attribute.value for name, attribute in block.attributes.items()}
+    for nested in block.blocks:
+        values[nested.type] = _flatten(nested)
+    return values
+
+
+def _provider_alias(block: hcl.Block) -> str | None:
+    provider = block.attributes.get("provider")
+    if provider is None:
+        return None
+    source = provider.value.source if isinstance(provider.value, hcl.Expression) else str(provider.value)
+    return source.partition(".")[2] or None
+
+
+def imported_operations(block: hcl.Block) -> list[dict[str, Any]] | None:
+    """Canonicalize the operations of a clumio_policy block, or return None if any value is unknown."""
+    operations = []
+    for nested in block.blocks:
+        if nested.type != "operations":
+            continue
+        values = _flatten(nested)
+        values["slas"] = [_flatten(sla) for sla in nested.blocks if sla.type == "slas"]
+        if not hcl.is_known(values):
+            return None
+        try:
+            canonical = canonical_operation(models.Operation.model_validate(values))
+        except ValueError:
+            return None
+        # Keep settings as written, since they may differ from what the generator would produce
+        canonical["action_setting"] = values.get("action_setting")
+        canonical["advanced_settings"] = values.get("advanced_settings", {})
+        operations.append(canonical)
+    return operations
+
+
+def _remove_blocks(text: str, blocks: list[hcl.Block]) -> str:
+    parts = []
+    position = 0
+    for block in sorted(blocks, key=lambda block: block.start):
+        parts.append(text[position:block.start].rstrip("\n"))
+        position = block.end
+    parts.append(text[position:])
+    return "".join(parts).lstrip("\n")
+
+
+def deduplicate(specs: list[models.ResourceSpec], configuration: str = "") -> models.PolicyDeduplication:
+    """Merge policies whose canonical operations are identical and rewrite references to them.
+
+    Policies of the imported configuration are preferred as the policy to keep, because they already
+    exist. Otherwise the first policy of a fingerprint is kept.
+
+    Args:
+        specs: Resource specs of the workspace
+        configuration: Imported Terraform configuration
+
+    Returns:
+        The merged resource specs and configuration.
+    """
+    fingerprints: dict[str, str] = {}
+    keep: dict[str, str] = {}
+    merged: dict[str, str] = {}
+    removed_blocks = []
+
+    def add(policy_name: str, fingerprint: str) -> bool:
+        """Record a policy and return whether it duplicates one recorded before."""
+        known = fingerprints.get(policy_name)
+        if known is not None and known != fingerprint:
+            raise ValueError(f"policy {policy_name!r} is defined more than once with different operations")
+        fingerprints[policy_name] = fingerprint
+        kept = keep.setdefault(fingerprint, policy_name)
+        if kept == policy_name:
+            return known is not None
+        merged[policy_name] = kept
+        return True
+
+    document = hcl.parse(configuration) if configuration else None
+    policies_before = set()
+    for block in document.blocks if document else []:
+        if block.type != "resource" or block.labels[0] != "clumio_policy":
+            continue
+        policy_name = block.labels[1]
+        policies_before.add(policy_name)
+        operations = imported_operations(block)
+        if operations is None:
+            # Policies with values only known after apply are kept as they are
+            operations = [{"address": policy_name}]
+        if add(policy_name, policy_fingerprint(operations, _provider_alias(block))):
+            removed_blocks.append(block)
+
+    resources = []
+    for spec in specs:
+        if spec.kind == "policy":
+            arguments = spec.arguments
+            policies_before.add(arguments["policy_name"])
+            operations = [canonical_operation(models.Operation.model_validate(op)) for op in arguments["operations"]]
+            if add(arguments["policy_name"], policy_fingerprint(operations, arguments.get("clumio_provider_alias"))):
+                continue
+        resources.append(spec)
+
+    for index, spec in enumerate(resources):
+        if spec.kind in ("policy_rule", "protection_group") and spec.arguments.get("policy_name") in merged:
+            arguments = {**spec.arguments, "policy_name": merged[spec.arguments["policy_name"]]}
+            resources[index] = spec.model_copy(update={"arguments": arguments})
+
+    if document:
+        configuration = _remove_blocks(configuration, removed_blocks)
+        configuration = _POLICY_REFERENCE_RE.sub(
+            lambda match: f"clumio_policy.{merged.get(match.group(1), match.group(1))}", configuration
+        )
+
+    duplicates: dict[str, list[str]] = {}
+    for duplicate, kept in merged.items():
+        duplicates.setdefault(kept, []).append(duplicate)
+    return models.PolicyDeduplication(
+        resources=resources,
+        configuration=configuration,
+        merges=[
+            models.PolicyMerge(policy_name=kept, fingerprint=fingerprints[kept], duplicates=names)
+            for kept, names in duplicates.items()
+        ],
+        policies_before=len(policies_before),
+        policies_after=len(policies_before) - len(merged),
+    )
@@ -0,0 +1,333 @@
+# Streaming drift analysis of Terraform state against generated configuration.
+
+import hashlib
+import json
+import re
+from collections.abc import Iterable, Iterator
+from typing import IO, Any
+
+from clumio_terraform_mcp import hcl, models
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE_RE = re.compile(r"\s*")
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+_PLAIN_RE = re.compile(r'[^"\[\]{}]+')
+_DECODER = json.JSONDecoder()
+
+# Containers leading to resources in `terraform show -json` output
+_DESCEND = frozenset({"values", "root_module", "child_modules"})
+
+# Arguments handled by Terraform itself, which never appear in state attributes
+_META_ARGUMENTS = frozenset({"provider", "count", "for_each", "depends_on"})
+
+
+class _Stream:
+    """Incremental reader over a JSON text that keeps only the unconsumed part in memory."""
+
+    def __init__(self, file: IO[str], chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        # Read at least as much as is pending so retrying a large value stays linear
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"invalid state JSON: {message}")
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or an empty string at the end of input."""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def next(self) -> str:
+        char = self.peek()
+        if not char:
+            raise self.error("unexpected end of input")
+        self.pos += 1
+        return char
+
+    def expect(self, char: str) -> None:
+        found = self.next()
+        if found != char:
+            raise self.error(f"expected {char!r}, found {found!r}")
+
+    def string(self) -> str:
+        if self.peek() != '"':
+            raise self.error("expected a string")
+        while True:
+            match = _STRING_RE.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                return json.loads(match.group(0))
+            if not self.fill():
+                raise self.error("unterminated string")
+
+    def decode(self) -> Any:
+        """Decode the next value completely."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.fill():
+                    continue
+                raise self.error(str(e)) from None
+            if end == len(self.buffer) and not isinstance(value, (dict, list, str)) and self.fill():
+                continue  # a number may continue in the next chunk
+            self.pos = end
+            return value
+
+    def skip(self) -> None:
+        """Skip the next value without materializing it."""
+        if self.peek() not in "[{":
+            self.decode()
+            return
+        depth = 0
+        while True:
+            match = _PLAIN_RE.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+            if self.pos >= len(self.buffer):
+                if not self.fill():
+                    raise self.error("unexpected end of input")
+                continue
+            char = self.buffer[self.pos]
+            if char == '"':
+                match = _STRING_RE.match(self.buffer, self.pos)
+                if match is None:
+                    if not self.fill():
+                        raise self.error("unterminated string")
+                    continue
+                self.pos = match.end()
+                continue
+            self.pos += 1
+            depth += 1 if char in "[{" else -1
+            if depth == 0:
+                return
+
+
+def _walk_object(stream: _Stream) -> Iterator[dict[str, Any]]:
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.pos += 1
+        return
+    while True:
+        key = stream.string()
+        stream.expect(":")
+        container = stream.peek()
+        if key == "resources" and container == "[":
+            yield from _walk_array(stream, decode_items=True)
+        elif key in _DESCEND and container == "{":
+            yield from _walk_object(stream)
+        elif key in _DESCEND and container == "[":
+            yield from _walk_array(stream, decode_items=False)
+        else:
+            stream.skip()
+        separator = stream.next()
+        if separator == "}":
+            return
+        if separator != ",":
+            raise stream.error(f"expected ',' or '}}', found {separator!r}")
+
+
+def _walk_array(stream: _Stream, decode_items: bool) -> Iterator[dict[str, Any]]:
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.pos += 1
+        return
+    while True:
+        if decode_items:
+            item = stream.decode()
+            if isinstance(item, dict):
+                yield item
+        elif stream.peek() == "{":
+            yield from _walk_object(stream)
+        else:
+            stream.skip()
+        separator = stream.next()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise stream.error(f"expected ',' or ']', found {separator!r}")
+
+
+def iter_state_resources(file: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Stream managed clumio_* resource instances out of state JSON.
+
+    Accepts both the ``terraform.tfstate`` format and ``terraform show -json`` output. Only one
+    resource entry is decoded at a time; everything else is skipped without being materialized.
+
+    Args:
+        file: Text file positioned at the start of the JSON document
+        chunk_size: Number of characters read at a time
+
+    Yields:
+        Resource instance addresses and their attributes.
+    """
+    stream = _Stream(file, chunk_size)
+    if stream.peek() != "{":
+        raise stream.error("expected a JSON object")
+    for resource in _walk_object(stream):
+        if resource.get("mode", "managed") != "managed" or not str(resource.get("type", "")).startswith("clumio_"):
+            continue
+        if "address" in resource:
+            yield resource["address"], resource.get("values") or {}
+            continue
+        prefix = f"{resource['module']}." if resource.get("module") else ""
+        base = f"{prefix}{resource['type']}.{resource['name']}"
+        for instance in resource.get("instances", []):
+            key = instance.get("index_key")
+            yield base + ("" if key is None else f"[{json.dumps(key)}]"), instance.get("attributes") or {}
+
+
+class _JSONDocument:
+    """Expected value of a ``jsonencode(...)`` argument, stored as a JSON string in state."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+_UNKNOWN = object()
+
+
+def _expected_value(value: Any) -> Any:
+    if isinstance(value, hcl.Expression):
+        if value.function == "jsonencode" and len(value.args) == 1 and hcl.is_known(value.args[0]):
+            return _JSONDocument(value.args[0])
+        return _UNKNOWN
+    return value if hcl.is_known(value) else _UNKNOWN
+
+
+def expected_attributes(block: hcl.Block) -> dict[str, Any]:
+    """Return the attributes of a block whose values are known without running Terraform."""
+    attributes = {}
+    for name, attribute in block.attributes.items():
+        value = _expected_value(attribute.value)
+        if name not in _META_ARGUMENTS and value is not _UNKNOWN:
+            attributes[name] = value
+    for nested in block.blocks:
+        attributes.setdefault(nested.type, []).append(expected_attributes(nested))
+    return attributes
+
+
+def _project(expected: Any, actual: Any) -> Any:
+    """Reduce a state value to the shape of the expected value."""
+    if isinstance(expected, _JSONDocument):
+        if isinstance(actual, str):
+            try:
+                return json.loads(actual)
+            except ValueError:
+                return actual
+        return actual
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return {key: _project(value, actual.get(key)) for key, value in expected.items()}
+    if isinstance(expected, list) and isinstance(actual, list) and expected and all(isinstance(e, dict) for e in expected):
+        if len(expected) == len(actual):
+            return [_project(shape, item) for shape, item in zip(expected, actual)]
+        shape: dict[str, Any] = {}
+        for element in expected:
+            for key, value in element.items():
+                shape.setdefault(key, value)
+        return [_project(shape, item) for item in actual]
+    return actual
+
+
+def _canonical(value: Any) -> Any:
+    """Normalize a value so that equivalent configuration and state values compare equal."""
+    if isinstance(value, _JSONDocument):
+        return _canonical(value.value)
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, list):
+        # Nested blocks and sets are unordered in state, so compare them as multisets
+        items = [_canonical(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True)) or None
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _digest(value: Any) -> str:
+    encoded = json.dumps(_canonical(value), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=8).hexdigest()
+
+
+def expected_index(configurations: Iterable[str]) -> dict[str, tuple[dict[str, Any], dict[str, str]]]:
+    """Index the clumio_* resources in the given configurations by address.
+
+    Returns:
+        For each address, the known attributes and their digests.
+    """
+    index = {}
+    for configuration in configurations:
+        for block in hcl.parse(configuration).blocks:
+            if block.type == "resource" and block.labels[0].startswith("clumio_"):
+                expected = expected_attributes(block)
+                index[block.address] = (expected, {name: _digest(value) for name, value in expected.items()})
+    return index
+
+
+def analyze(
+    state: IO[str],
+    configurations: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> models.DriftReport:
+    """Compare state against configuration, holding only attribute digests of the state in memory.
+
+    Args:
+        state: State JSON, either ``terraform.tfstate`` or ``terraform show -json`` output
+        configurations: Terraform configurations describing the desired resources
+        chunk_size: Number of characters of state read at a time
+
+    Returns:
+        Drifted, orphaned and missing resources.
+    """
+    expected = expected_index(configurations)
+    actual: dict[str, dict[str, str] | None] = {}
+    for address, attributes in iter_state_resources(state, chunk_size):
+        if address not in expected:
+            actual[address] = None
+            continue
+        shape = expected[address][0]
+        projected = _project(shape, attributes)
+        actual[address] = {name: _digest(projected.get(name)) for name in shape}
+
+    drifted = []
+    in_sync = 0
+    for address, (_, digests) in expected.items():
+        found = actual.get(address)
+        if found is None:
+            continue
+        changed = sorted(name for name, digest in digests.items() if found.get(name) != digest)
+        if changed:
+            drifted.append(models.DriftedResource(address=address, attributes=changed))
+        else:
+            in_sync += 1
+    return models.DriftReport(
+        drifted=drifted,
+        orphaned=sorted(address for address, digests in actual.items() if digests is None),
+        missing=sorted(address for address in expected if address not in actual),
+        in_sync=in_sync,
+        state_resources=len(actual),
+    )
@@ -0,0 +1,396 @@
+# Lightweight parser for the subset of HCL emitted by the templates.
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<newline>\n)
+    | (?P<space>[ \t\r]+)
+    | (?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)
+    | (?P<heredoc><<-?(?P<marker>[A-Za-z_]\w*)[ \t]*\n)
+    | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    | (?P<ident>[A-Za-z_][\w-]*)
+    | (?P<quote>")
+    | (?P<punct>=>|==|!=|<=|>=|&&|\|\||\.\.\.|[{}\[\]().,=:?!<>+\-*/%])
+    """,
+    re.X | re.S,
+)
+_PLAIN_STRING_RE = re.compile(r'"((?:[^"\\$%\n]|\\.|\$(?!\{)|%(?!\{))*)"')
+_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)|\$\$\{|%%\{')
+_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", '"': '"', "\\": "\\"}
+_KEYWORDS = {"true": True, "false": False, "null": None}
+_CLOSERS = frozenset({",", ")", "]", "}"})
+# Tokens that start or end an operand, which must be separated by an operator
+_OPERANDS = frozenset({"string", "template", "number", "ident"})
+
+
+class HCLSyntaxError(ValueError):
+    """Raised when configuration text cannot be parsed."""
+
+
+class Token(NamedTuple):
+    kind: str
+    value: Any
+    start: int
+    end: int
+
+
+@dataclass(slots=True)
+class Expression:
+    """A value that is only known to Terraform: a reference, function call or template."""
+    source: str
+    function: str | None = None
+    args: list[Any] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Attribute:
+    """An ``name = value`` argument together with its source range."""
+    name: str
+    value: Any
+    start: int
+    end: int
+
+
+@dataclass(slots=True)
+class Block:
+    """A block such as ``resource "clumio_policy" "name" { ... }``."""
+    type: str
+    labels: list[str]
+    attributes: dict[str, Attribute]
+    blocks: list["Block"]
+    start: int
+    end: int
+
+    @property
+    def address(self) -> str:
+        """Terraform-style address of a top-level block."""
+        if self.type == "resource" and len(self.labels) == 2:
+            return ".".join(self.labels)
+        if self.type == "data" and len(self.labels) == 2:
+            return "data." + ".".join(self.labels)
+        if self.type == "variable" and self.labels:
+            return "var." + self.labels[0]
+        if self.type == "provider" and self.labels:
+            alias = self.attributes.get("alias")
+            if alias is not None and isinstance(alias.value, str):
+                return f"provider.{self.labels[0]}.{alias.value}"
+            return "provider." + self.labels[0]
+        return ".".join([self.type, *self.labels])
+
+
+@dataclass(slots=True)
+class Document:
+    """Parsed configuration file."""
+    text: str
+    blocks: list[Block]
+    _newlines: list[int] = field(default_factory=list, repr=False)
+
+    def line(self, offset: int) -> int:
+        """Return the 1-based line number of a character offset."""
+        if not self._newlines:
+            self._newlines.extend(m.start() for m in re.finditer("\n", self.text))
+        return bisect_right(self._newlines, offset - 1) + 1
+
+
+def _unescape(raw: str) -> str:
+    def replace(match: re.Match) -> str:
+        token = match.group(0)
+        if token == "$${":
+            return "${"
+        if token == "%%{":
+            return "%{"
+        escape = match.group(1)
+        if escape[0] in "uU" and len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        return _ESCAPES.get(escape, escape)
+
+    return _ESCAPE_RE.sub(replace, raw) if ("\\" in raw or "$${" in raw or "%%{" in raw) else raw
+
+
+def _scan_template(text: str, pos: int) -> int:
+    """Return the offset just past the string starting at ``text[pos] == '"'``."""
+    i = pos + 1
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if char == "\\":
+            i += 2
+        elif char == '"':
+            return i + 1
+        elif char in "$%" and text.startswith("{", i + 1) and not text.startswith(char, i - 1):
+            i = _scan_interpolation(text, i + 2)
+        elif char == "\n":
+            break
+        else:
+            i += 1
+    raise HCLSyntaxError(f"unterminated string starting at offset {pos}")
+
+
+def _scan_interpolation(text: str, pos: int) -> int:
+    depth = 1
+    i = pos
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if char == '"':
+            i = _scan_template(text, i)
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise HCLSyntaxError(f"unterminated interpolation starting at offset {pos}")
+
+
+def tokenize(text: str) -> list[Token]:
+    """Split configuration text into tokens, dropping whitespace and comments."""
+    tokens: list[Token] = []
+    append = tokens.append
+    pos = 0
+    length = len(text)
+    match = _TOKEN_RE.match
+    while pos < length:
+        m = match(text, pos)
+        if m is None:
+            raise HCLSyntaxError(f"unexpected character {text[pos]!r} at offset {pos}")
+        kind = m.lastgroup
+        if kind == "quote":
+            plain = _PLAIN_STRING_RE.match(text, pos)
+            if plain:
+                end = plain.end()
+                append(Token("string", _unescape(plain.group(1)), pos, end))
+            else:
+                end = _scan_template(text, pos)
+                append(Token("template", text[pos:end], pos, end))
+            pos = end
+            continue
+        if kind == "heredoc":
+            marker = m.group("marker")
+            closing = re.compile(rf"^[ \t]*{re.escape(marker)}[ \t]*$", re.M).search(text, m.end())
+            if closing is None:
+                raise HCLSyntaxError(f"unterminated heredoc {marker!r} at offset {pos}")
+            append(Token("template", text[pos:closing.end()], pos, closing.end()))
+            pos = closing.end()
+            continue
+        end = m.end()
+        if kind == "newline":
+            append(Token("newline", "\n", pos, end))
+        elif kind == "comment":
+            if "\n" in m.group(0):
+                append(Token("newline", "\n", end - 1, end))
+        elif kind == "number":
+            value = m.group(0)
+            append(Token("number", float(value) if "." in value or "e" in value.lower() else int(value), pos, end))
+        elif kind == "ident":
+            append(Token("ident", m.group(0), pos, end))
+        elif kind == "punct":
+            append(Token("punct", m.group(0), pos, end))
+        pos = end
+    append(Token("eof", None, length, length))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    def peek(self, ahead: int = 0) -> Token:
+        return self.tokens[min(self.index + ahead, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def error(self, message: str, token: Token) -> HCLSyntaxError:
+        line = self.text.count("\n", 0, token.start) + 1
+        return HCLSyntaxError(f"line {line}: {message}")
+
+    def expect(self, value: str) -> Token:
+        token = self.peek()
+        if token.kind != "punct" or token.value != value:
+            raise self.error(f"expected {value!r}, found {token.value!r}", token)
+        return self.advance()
+
+    def skip_newlines(self) -> None:
+        while self.peek().kind == "newline":
+            self.index += 1
+
+    def body(self, nested: bool) -> tuple[dict[str, Attribute], list[Block]]:
+        attributes: dict[str, Attribute] = {}
+        blocks: list[Block] = []
+        while True:
+            self.skip_newlines()
+            token = self.peek()
+            if token.kind == "eof":
+                if nested:
+                    raise self.error("unexpected end of file, expected '}'", token)
+                return attributes, blocks
+            if nested and token.kind == "punct" and token.value == "}":
+                return attributes, blocks
+            if token.kind != "ident":
+                raise self.error(f"expected an argument or block, found {token.value!r}", token)
+            self.advance()
+            following = self.peek()
+            if following.kind == "punct" and following.value == "=":
+                self.advance()
+                value, end = self.expression()
+                if token.value in attributes:
+                    raise self.error(f"duplicate argument {token.value!r}", token)
+                attributes[token.value] = Attribute(token.value, value, token.start, end)
+                continue
+            labels = []
+            while self.peek().kind in ("string", "ident"):
+                labels.append(self.advance().value)
+            self.expect("{")
+            nested_attributes, nested_blocks = self.body(nested=True)
+            closing = self.expect("}")
+            blocks.append(Block(token.value, labels, nested_attributes, nested_blocks, token.start, closing.end))
+
+    def expression(self) -> tuple[Any, int]:
+        """Parse an expression up to the end of line or an enclosing delimiter."""
+        first = self.peek()
+        first_index = self.index
+        terms: list[Any] = []
+        opaque = False
+        end = first.start
+        while True:
+            token = self.peek()
+            if token.kind in ("newline", "eof") or (token.kind == "punct" and token.value in _CLOSERS):
+                break
+            if token.kind in _OPERANDS and self.index > first_index:
+                previous = self.tokens[self.index - 1]
+                if previous.kind in _OPERANDS or (previous.kind == "punct" and previous.value in _CLOSERS):
+                    raise self.error(f"expected an operator before {token.value!r}", token)
+            if token.kind == "punct" and token.value == "[":
+                terms.append(self.collection("[", "]"))
+            elif token.kind == "punct" and token.value == "{":
+                terms.append(self.collection("{", "}"))
+            elif token.kind == "punct" and token.value == "(":
+                self.collection("(", ")")
+                opaque = True
+            elif token.kind == "ident" and self.peek(1).kind == "punct" and self.peek(1).value == "(":
+                terms.append(self.call())
+            else:
+                self.advance()
+                if token.kind in ("string", "number"):
+                    terms.append(token.value)
+                elif token.kind == "ident" and token.value in _KEYWORDS:
+                    terms.append(_KEYWORDS[token.value])
+                else:
+                    opaque = True
+            end = self.tokens[self.index - 1].end
+        if not terms and not opaque:
+            raise self.error("expected an expression", first)
+        if len(terms) == 1 and not opaque:
+            return terms[0], end
+        return Expression(self.text[first.start:end]), end
+
+    def call(self) -> Expression:
+        name = self.advance()
+        self.advance()
+        args = []
+        while True:
+            self.skip_newlines()
+            token = self.peek()
+            if token.kind == "punct" and token.value == ")":
+                break
+            value, _ = self.expression()
+            args.append(value)
+            self.skip_newlines()
+            token = self.peek()
+            if token.kind == "punct" and token.value in (",", "..."):
+                self.advance()
+        closing = self.expect(")")
+        return Expression(self.text[name.start:closing.end], function=name.value, args=args)
+
+    def collection(self, opener: str, closer: str) -> Any:
+        """Parse a tuple or object literal; falls back to an opaque expression for ``for`` forms."""
+        start = self.expect(opener)
+        self.skip_newlines()
+        if opener == "(" or (self.peek().kind == "ident" and self.peek().value == "for"):
+            return self.skip_balanced(start)
+        items: Any = [] if opener == "[" else {}
+        known = True
+        while True:
+            self.skip_newlines()
+            token = self.peek()
+            if token.kind == "punct" and token.value == closer:
+                break
+            if opener == "{":
+                key_token = self.advance()
+                if key_token.kind not in ("ident", "string", "number"):
+                    if key_token.kind == "punct" and key_token.value == "(":
+                        self.index -= 1
+                        self.collection("(", ")")
+                        known = False
+                    else:
+                        raise self.error(f"invalid object key {key_token.value!r}", key_token)
+                separator = self.advance()
+                if separator.kind != "punct" or separator.value not in ("=", ":"):
+                    raise self.error("expected '=' or ':' after object key", separator)
+                value, _ = self.expression()
+                items[str(key_token.value)] = value
+            else:
+                value, _ = self.expression()
+                items.append(value)
+            self.skip_newlines()
+            token = self.peek()
+            if token.kind == "punct" and token.value == ",":
+                self.advance()
+        closing = self.expect(closer)
+        if not known:
+            return Expression(self.text[start.start:closing.end])
+        return items
+
+    def skip_balanced(self, opener: Token) -> Expression:
+        depth = 1
+        pairs = {"(": ")", "[": "]", "{": "}"}
+        while depth:
+            token = self.advance()
+            if token.kind == "eof":
+                raise self.error("unbalanced brackets", opener)
+            if token.kind == "punct":
+                if token.value in pairs:
+                    depth += 1
+                elif token.value in pairs.values():
+                    depth -= 1
+        return Expression(self.text[opener.start:self.tokens[self.index - 1].end])
+
+
+def parse(text: str) -> Document:
+    """Parse configuration text into a document of top-level blocks.
+
+    Args:
+        text: Terraform configuration in native syntax
+
+    Returns:
+        Parsed document. Literal values are converted to Python values, everything
+        else (references, templates, function calls) is kept as an ``Expression``.
+    """
+    parser = _Parser(text)
+    attributes, blocks = parser.body(nested=False)
+    if attributes:
+        name, attribute = next(iter(attributes.items()))
+        raise parser.error(f"unexpected top-level argument {name!r}", Token("ident", name, attribute.start, attribute.end))
+    return Document(text, blocks)
+
+
+def is_known(value: Any) -> bool:
+    """Return whether a parsed value is fully known without evaluating Terraform expressions."""
+    if isinstance(value, Expression):
+        return False
+    if isinstance(value, list):
+        return all(is_known(item) for item in value)
+    if isinstance(value, dict):
+        return all(is_known(item) for item in value.values())
+    return True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import Any, Literal
 
 CommonFilterAssetTypes = Literal[
     'aws_ec2_instance',
@@ -25,6 +25,16 @@ PolicyOperationType = Literal[
     'aws_s3_backtrack',
 ]
 
+ResourceKind = Literal[
+    'aws_connection',
+    'policy',
+    'protection_group',
+    'organizational_unit',
+    'policy_rule',
+    'user_assignment',
+    'report_configuration',
+]
+
 class ClumioAccount(BaseModel):
     """Clumio account to generate Clumio provider configurations."""
     alias: str | None = Field(default=None, description="The alias for the Clumio provider. This is used to reference the provider in Terraform. If there is only one provider, not need to give this.")
@@ -155,3 +165,181 @@ class AccessControlConfiguration(BaseModel):
     """Access control configuration for a user."""
     role_name: Literal['Super Admin', 'Organizational Unit Admin', 'Helpdesk Admin'] = Field(description="Role type assigned to the user.")
     organizational_unit_ids: list[str] = Field(default=["00000000-0000-0000-0000-000000000000"], description="List of OU IDs to assign the user to. Use '00000000-0000-0000-0000-000000000000' as global OU id.")
+
+
+class Asset(BaseModel):
+    """An AWS asset in an inventory."""
+    asset_type: CommonFilterAssetTypes
+    native_id: str = Field(description="The AWS native ID of the asset. This is the bucket name for S3 buckets.")
+    aws_account_id: str = Field(description="The AWS account native ID the asset belongs to.")
+    aws_region: str = Field(examples=["us-west-2", "ca-central-1"])
+    tags: dict[str, str] = {}
+    size_bytes: int = Field(default=0, ge=0)
+    object_count: int = Field(default=0, ge=0, description="The number of objects. This applies to S3 buckets only.")
+
+
+class ResourceSpec(BaseModel):
+    """A single resource generation request, as accepted by the generate_* tools."""
+    kind: ResourceKind = Field(description="The generator to use. This is the generate_* tool name without the 'generate_' prefix.")
+    arguments: dict[str, Any] = Field(description="Arguments for the generator, exactly as they would be passed to the generate_* tool.")
+    aws_account_id: str | None = Field(default=None, description="The AWS account native ID the resource applies to. Inferred from the arguments when not given.")
+    aws_region: str | None = Field(default=None, description="The AWS region the resource applies to. Inferred from the arguments when not given.", examples=["us-west-2", "ca-central-1"])
+
+
+class StatePartition(BaseModel):
+    """An independent root module produced by the state partitioner."""
+    name: str = Field(description="Name of the partition. This is also the suggested directory of the root module.")
+    resource_count: int = Field(description="Number of managed resources in the partition, which drives its plan time.")
+    addresses: list[str] = Field(description="Addresses of the managed resources in the partition.")
+    depends_on: list[str] = Field(default=[], description="Partitions whose state this partition reads and which must be applied first.")
+    configuration: str = Field(description="Complete Terraform configuration of the root module.")
+
+
+class PartitionPlan(BaseModel):
+    """Result of splitting an estate into independent root modules."""
+    partitions: list[StatePartition] = Field(description="Partitions in apply order.")
+    total_resources: int
+    largest_partition_size: int
+    unresolved_references: list[str] = Field(default=[], description="References to resources that are not part of the estate. They are kept as-is.")
+
+
+class ExampleScenario(BaseModel):
+    """An example scenario with a ready-to-adapt configuration."""
+    id: str
+    title: str
+    category: str
+    prompt: str = Field(description="The example prompt describing the scenario.")
+    resource_types: list[str] = Field(description="The Clumio resource types used in the configuration.")
+    services: list[str] = Field(description="The AWS services protected by the configuration.")
+    configuration: str = Field(description="The rendered Terraform configuration.")
+
+
+class DriftedResource(BaseModel):
+    """A resource whose state differs from the desired configuration."""
+    address: str
+    attributes: list[str] = Field(description="Top-level attributes and blocks whose state differs from the configuration.")
+
+
+class DriftReport(BaseModel):
+    """Differences between Terraform state and the desired configuration."""
+    drifted: list[DriftedResource] = []
+    orphaned: list[str] = Field(default=[], description="Addresses of clumio_* resources in state that are not in the configuration.")
+    missing: list[str] = Field(default=[], description="Addresses of clumio_* resources in the configuration that are not in state.")
+    in_sync: int = Field(description="Number of resources whose state matches the configuration.")
+    state_resources: int = Field(description="Number of clumio_* resource instances in state.")
+
+
+class PolicyMerge(BaseModel):
+    """Policies found to be semantically identical."""
+    policy_name: str = Field(description="The policy that is kept.")
+    fingerprint: str = Field(description="Hash of the canonical operations shared by the policies.")
+    duplicates: list[str] = Field(description="Policies merged into the kept policy.")
+
+
+class PolicyDeduplication(BaseModel):
+    """Result of merging semantically identical policies."""
+    resources: list[ResourceSpec] = Field(description="Resource specs without duplicate policies, with policy_name references rewritten.")
+    configuration: str = Field(default="", description="Imported configuration without duplicate policies, with references rewritten.")
+    merges: list[PolicyMerge] = []
+    policies_before: int
+    policies_after: int
+
+
+class TokenEstimate(BaseModel):
+    """Estimated size of a compact or summary rendering in LLM tokens."""
+    tokens: int = Field(description="Estimated tokens of the rendering.")
+    hcl_tokens: int = Field(description="Estimated tokens of the same configuration in native syntax.")
+    saved_percent: int = Field(description="Tokens saved against native syntax, in percent.")
+
+
+class CompactConfiguration(BaseModel):
+    """Configuration in a compact output format together with its estimated size."""
+    configuration: str = Field(description="Configuration in the requested output format.")
+    token_estimate: TokenEstimate = Field(description="Token estimate of the configuration against native syntax.")
+
+
+class SlotLoad(BaseModel):
+    """Report runs starting in a slot of the day, in UTC."""
+    start_time: str = Field(description="Start of the slot in UTC.")
+    peak_runs: int = Field(description="Most runs starting in this slot on any day.")
+    runs_per_day: float = Field(description="Average number of runs starting in this slot per day.")
+
+
+class StaggeredReports(BaseModel):
+    """Report configurations with staggered schedules."""
+    report_configurations: list[dict[str, Any]] = Field(description="Arguments for generate_report_configuration with the assigned schedules, in input order.")
+    configuration: str = Field(description="Rendered Terraform configuration of all reports.")
+    histogram: list[SlotLoad] = Field(description="Load of every slot in which reports start.")
+    peak_runs: int = Field(description="Most runs starting in the same slot on the same day.")
+    token_estimate: TokenEstimate | None = Field(default=None, description="Token estimate of compact and summary configuration.")
+
+
+class BucketGroup(BaseModel):
+    """A protection group of a balanced partition of S3 buckets."""
+    group_name: str
+    bucket_rule: dict[str, Any] = Field(description="Bucket rule selecting exactly the buckets of the group.")
+    bucket_count: int
+    object_count: int
+    size_bytes: int
+    buckets: list[str] = Field(default=[], description="Names of the buckets in the group.")
+
+
+class BucketPartition(BaseModel):
+    """Result of bin-packing S3 buckets into balanced protection groups."""
+    groups: list[BucketGroup] = Field(description="Groups, heaviest first.")
+    configuration: str = Field(description="Rendered Terraform configuration of the protection groups.")
+    tag_key: str | None = Field(description="Tag key whose values partition the buckets.")
+    imbalance: float = Field(description="Weight of the heaviest group divided by the mean group weight. 1.0 is perfectly balanced.")
+    uncovered: list[str] = Field(default=[], description="Buckets matched by no bucket rule.")
+    overlapping: list[str] = Field(default=[], description="Buckets matched by more than one bucket rule.")
+    token_estimate: TokenEstimate | None = Field(default=None, description="Token estimate of compact and summary configuration.")
+
+
+class OUNode(BaseModel):
+    """An organizational unit together with its child units."""
+    ou_name: str = Field(description="Resource name for the OU")
+    display_name: str
+    description: str
+    children: list['OUNode'] = []
+
+
+class OUTree(BaseModel):
+    """Configuration of an organizational unit hierarchy with the providers scoped to its units."""
+    configuration: str = Field(description="Rendered Terraform configuration of the providers and organizational units.")
+    organizational_units: list[str] = Field(description="OU resource names in creation order, parents before children.")
+    provider_aliases: dict[str, str] = Field(description="Alias of the Clumio provider scoped to each OU that has one.")
+    policy_rule_provider_aliases: list[str] = Field(description="Aliases of the providers allowed to manage policy rules, in addition to the default (global) provider.")
+    depth: int = Field(description="Number of levels of the hierarchy.")
+    token_estimate: TokenEstimate | None = Field(default=None, description="Token estimate of compact and summary configuration.")
+
+
+class FilePatch(BaseModel):
+    """Blocks patched into a configuration file in place."""
+    path: str = Field(description="Absolute path of the patched file.")
+    replaced: list[str] = Field(description="Addresses of the blocks that were replaced.")
+    inserted: list[str] = Field(description="Addresses of the blocks that were not in the file before and were added.")
+    bytes_written: int = Field(description="Bytes of new configuration written. The rest of the file was copied unchanged.")
+    file_size: int = Field(description="Size of the patched file in bytes.")
+
+
+class ClientQueueMetrics(BaseModel):
+    """Queue of one client of the server."""
+    client_id: str = Field(description="Client ID sent by the client, or else its session ID.")
+    weight: float = Field(description="Share of the server the client gets relative to the others.")
+    queued: int = Field(description="Calls waiting to be admitted.")
+    running: int = Field(description="Calls admitted and not completed yet.")
+    completed: int
+    rejected: int = Field(description="Calls rejected because the queue of the client was full.")
+    mean_wait_ms: float = Field(description="Mean time calls waited in the queue, over the recent calls.")
+    p95_wait_ms: float = Field(description="95th percentile of the time calls waited in the queue, over the recent calls.")
+    max_wait_ms: float = Field(description="Longest time a recent call waited in the queue.")
+
+
+class SchedulerMetrics(BaseModel):
+    """State of the fair scheduler that admits tool calls of all clients."""
+    running: int = Field(description="Calls admitted and not completed yet.")
+    queued: int = Field(description="Calls waiting to be admitted, over all clients.")
+    bytes_in_flight: int = Field(description="Estimated cost of the admitted calls in bytes.")
+    max_concurrency: int
+    max_bytes_in_flight: int
+    clients: list[ClientQueueMetrics]
@@ -0,0 +1,77 @@
+# Organizational unit hierarchies built in one pass, with the provider wiring every level needs.
+
+from collections import deque
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from clumio_terraform_mcp import models
+
+
+class PlacedOU(NamedTuple):
+    """An OU with its parent and depth, where top-level OUs have depth 1."""
+    node: models.OUNode
+    parent: models.OUNode | None
+    depth: int
+
+
+def walk(roots: list[models.OUNode]) -> Iterator[PlacedOU]:
+    """Yield every OU breadth-first, so parents always precede their children.
+
+    Raises:
+        ValueError: If two OUs share a resource name
+    """
+    seen: set[str] = set()
+    queue = deque(PlacedOU(root, None, 1) for root in roots)
+    while queue:
+        placed = queue.popleft()
+        if placed.node.ou_name in seen:
+            raise ValueError(f"duplicate organizational unit {placed.node.ou_name!r}")
+        seen.add(placed.node.ou_name)
+        yield placed
+        queue.extend(PlacedOU(child, placed.node, placed.depth + 1) for child in placed.node.children)
+
+
+class OUTreePlan(NamedTuple):
+    specs: list[models.ResourceSpec]
+    clumio_accounts: list[models.ClumioAccount]
+    provider_aliases: dict[str, str]
+    policy_rule_provider_aliases: list[str]
+    depth: int
+
+
+def plan(roots: list[models.OUNode], alias_prefix: str = "", leaf_providers: bool = False) -> OUTreePlan:
+    """Plan the OU resources of a hierarchy and the Clumio providers scoped to its units.
+
+    Child OUs are created through the provider scoped to their parent, so every OU with children gets
+    a provider. Policy rules may only be managed by the global provider or by providers of top-level
+    OUs, so top-level OUs always get a provider as well.
+
+    Args:
+        roots: Top-level OUs
+        alias_prefix: Prefix of the provider aliases, which are otherwise the OU resource names
+        leaf_providers: Also create providers for OUs without children, e.g. to manage their resources
+
+    Returns:
+        OU specs in creation order, the providers including the global one, and the provider aliases.
+    """
+    specs = []
+    clumio_accounts = [models.ClumioAccount()]
+    provider_aliases: dict[str, str] = {}
+    rule_aliases = []
+    depth = 0
+    for node, parent, level in walk(roots):
+        depth = max(depth, level)
+        specs.append(models.ResourceSpec(kind='organizational_unit', arguments={
+            "ou_name": node.ou_name,
+            "display_name": node.display_name,
+            "description": node.description,
+            "parent_name": parent.ou_name if parent else None,
+            "clumio_provider_alias": provider_aliases[parent.ou_name] if parent else None,
+        }))
+        if node.children or level == 1 or leaf_providers:
+            alias = f"{alias_prefix}{node.ou_name}"
+            provider_aliases[node.ou_name] = alias
+            clumio_accounts.append(models.ClumioAccount(alias=alias, ou_name=node.ou_name))
+            if level == 1:
+                rule_aliases.append(alias)
+    return OUTreePlan(specs, clumio_accounts, provider_aliases, rule_aliases, depth)
@@ -0,0 +1,276 @@
+# State partitioning of large estates into independent root modules.
+
+import json
+import re
+from collections import Counter, defaultdict, deque
+from typing import Any, Literal
+
+from clumio_terraform_mcp import hcl, models, utils
+
+PartitionDimension = Literal['ou', 'account', 'region']
+
+ROOT_SCOPE = "root"
+# Organizational units are referenced by provider contexts and users everywhere, so the whole
+# hierarchy lives in one partition that every other partition may depend on.
+ORGANIZATION_PARTITION = "organization"
+DEFAULT_REMOTE_STATE_CONFIG = {"path": "../{partition}/terraform.tfstate"}
+
+# Matches references such as clumio_policy.gold.id, but not data.clumio_role.x.id or quoted labels.
+_REFERENCE_RE = re.compile(r'(?<![\w."])(clumio_[a-z0-9_]+)\.([A-Za-z_][\w-]*)\.([a-z_]+)\b')
+_UNSAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def _safe_name(value: str) -> str:
+    return _UNSAFE_NAME_RE.sub("_", value).strip("_") or ROOT_SCOPE
+
+
+def _rule_value(rule: Any, field: str) -> str | None:
+    """Return the literal value of a ``{field: {"$eq": value}}`` condition, if present."""
+    if not isinstance(rule, dict):
+        return None
+    condition = rule.get(field)
+    if isinstance(condition, dict):
+        value = condition.get("$eq")
+        if isinstance(value, str) and "${" not in value:
+            return value
+    return None
+
+
+class _OUHierarchy:
+    """Parent lookup over the organizational units defined in the estate."""
+
+    def __init__(self, specs: list[models.ResourceSpec]):
+        self.parents: dict[str, str | None] = {}
+        self.display_names: dict[str, str] = {}
+        for spec in specs:
+            if spec.kind == "organizational_unit":
+                self.parents[spec.arguments["ou_name"]] = spec.arguments.get("parent_name")
+                self.display_names[spec.arguments["ou_name"]] = spec.arguments.get("display_name", spec.arguments["ou_name"])
+        counts = Counter(self.display_names.values())
+        # Data sources find OUs by display name, which only identifies OUs whose name no other OU shares
+        self.unique_display_names = {ou: name for ou, name in self.display_names.items() if counts[name] == 1}
+        self._chains: dict[str, list[str]] = {}
+
+    def chain(self, ou_name: str) -> list[str]:
+        """Return the path from the top-level OU down to ``ou_name``."""
+        cached = self._chains.get(ou_name)
+        if cached is not None:
+            return cached
+        pending = []
+        current: str | None = ou_name
+        while current is not None and current not in self._chains:
+            if current in pending:
+                raise ValueError(f"organizational unit hierarchy contains a cycle through {current!r}")
+            pending.append(current)
+            current = self.parents.get(current)
+        chain = list(self._chains[current]) if current is not None else []
+        for name in reversed(pending):
+            chain = [*chain, name]
+            self._chains[name] = chain
+        return self._chains[ou_name]
+
+    def ancestor(self, ou_name: str, depth: int | None) -> str:
+        chain = self.chain(ou_name)
+        if depth is None or len(chain) <= depth:
+            return ou_name
+        return chain[depth - 1]
+
+
+class Partitioner:
+    """Groups resource specs into partitions and rewrites references between them.
+
+    Args:
+        clumio_accounts: Clumio provider configurations, used to map provider aliases to OUs
+        aws_accounts: AWS provider configurations, used to infer connection regions
+        partition_by: Dimensions that make up the partition key
+        ou_depth: Collapse OUs deeper than this level into their ancestor at this level
+        cross_partition_references: How references to resources in other partitions are resolved
+        remote_state_backend: Backend type of the terraform_remote_state data sources
+        remote_state_config: Backend configuration; '{partition}' is replaced with the partition name
+    """
+
+    def __init__(
+        self,
+        clumio_accounts: list[models.ClumioAccount],
+        aws_accounts: list[models.AWSAccount],
+        partition_by: list[PartitionDimension],
+        ou_depth: int | None = None,
+        cross_partition_references: Literal['remote_state', 'data_source'] = 'remote_state',
+        remote_state_backend: str = "local",
+        remote_state_config: dict[str, str] | None = None,
+    ):
+        self.clumio_accounts = {account.alias: account for account in clumio_accounts}
+        self.aws_accounts = {account.alias: account for account in aws_accounts}
+        self.partition_by = set(partition_by)
+        self.ou_depth = ou_depth
+        self.cross_partition_references = cross_partition_references
+        self.remote_state_backend = remote_state_backend
+        self.remote_state_config = remote_state_config or DEFAULT_REMOTE_STATE_CONFIG
+
+    def partition_key(self, spec: models.ResourceSpec, hierarchy: _OUHierarchy) -> str:
+        if spec.kind == "organizational_unit":
+            return ORGANIZATION_PARTITION
+        arguments = spec.arguments
+        # Policy rules are ordered per OU through before_rule_name, so a chain must stay together
+        dimensions = self.partition_by & {"ou"} if spec.kind == "policy_rule" else self.partition_by
+        parts = []
+        if "ou" in dimensions:
+            alias = arguments.get("clumio_provider_alias")
+            account = self.clumio_accounts.get(alias)
+            if account is not None and account.ou_name:
+                parts.append(hierarchy.ancestor(account.ou_name, self.ou_depth))
+            else:
+                parts.append(alias or ROOT_SCOPE)
+        rule = arguments.get("condition_expression") or arguments.get("bucket_rule")
+        aws_alias = arguments.get("aws_provider_alias")
+        if "account" in dimensions:
+            account_id = spec.aws_account_id or _rule_value(rule, "aws_account_native_id") or aws_alias
+            if account_id:
+                parts.append(account_id)
+        if "region" in dimensions:
+            aws_account = self.aws_accounts.get(aws_alias) if spec.kind == "aws_connection" else None
+            region = spec.aws_region or _rule_value(rule, "aws_region") or (aws_account.region if aws_account else None)
+            if region:
+                parts.append(region)
+        return _safe_name("_".join(parts)) if parts else ROOT_SCOPE
+
+    def plan(self, specs: list[models.ResourceSpec], rendered: list[str]) -> models.PartitionPlan:
+        """Assign rendered resources to partitions and build one root module per partition.
+
+        Args:
+            specs: Resource specs of the whole estate
+            rendered: Configuration rendered for each spec, in the same order
+
+        Returns:
+            Partitions in apply order together with their sizes.
+        """
+        hierarchy = _OUHierarchy(specs)
+        blocks: dict[str, dict[str, str]] = defaultdict(dict)
+        resources: dict[str, list[str]] = defaultdict(list)
+        clumio_aliases: dict[str, set[str | None]] = defaultdict(set)
+        aws_aliases: dict[str, set[str | None]] = defaultdict(set)
+        owners: dict[str, str] = {}
+        for spec, text in zip(specs, rendered, strict=True):
+            name = self.partition_key(spec, hierarchy)
+            clumio_aliases[name].add(spec.arguments.get("clumio_provider_alias"))
+            if spec.kind == "aws_connection":
+                aws_aliases[name].add(spec.arguments.get("aws_provider_alias"))
+            for block in hcl.parse(text).blocks:
+                address = block.address
+                if block.type == "resource":
+                    if address in owners:
+                        raise ValueError(f"duplicate resource address {address!r}")
+                    owners[address] = name
+                    resources[name].append(address)
+                block_text = text[block.start:block.end]
+                if blocks[name].setdefault(address, block_text) != block_text:
+                    raise ValueError(f"conflicting definitions of {address!r} in partition {name!r}")
+
+        outputs: dict[str, dict[str, str]] = defaultdict(dict)
+        lookups: dict[str, dict[str, str]] = defaultdict(dict)
+        remote_states: dict[str, set[str]] = defaultdict(set)
+        depends_on: dict[str, set[str]] = defaultdict(set)
+        unresolved: set[str] = set()
+
+        def rewrite(partition: str, text: str) -> str:
+            def replace(match: re.Match) -> str:
+                resource_type, resource_name, attribute = match.groups()
+                address = f"{resource_type}.{resource_name}"
+                owner = owners.get(address)
+                if owner is None:
+                    unresolved.add(address)
+                    return match.group(0)
+                if owner == partition:
+                    return match.group(0)
+                # Lookups also need the OU to exist, so the owner is applied first either way
+                depends_on[partition].add(owner)
+                if (self.cross_partition_references == "data_source" and resource_type == "clumio_organizational_unit"
+                        and attribute == "id" and resource_name in hierarchy.unique_display_names):
+                    lookups[partition][resource_name] = hierarchy.unique_display_names[resource_name]
+                    return f"data.{address}.{attribute}"
+                output = _safe_name(f"{resource_type}_{resource_name}_{attribute}")
+                outputs[owner][output] = match.group(0)
+                remote_states[partition].add(owner)
+                return f"data.terraform_remote_state.{owner}.outputs.{output}"
+
+            return _REFERENCE_RE.sub(replace, text)
+
+        bodies: dict[str, list[str]] = {}
+        providers: dict[str, str] = {}
+        for name in blocks:
+            bodies[name] = [rewrite(name, text) for text in blocks[name].values()]
+            providers[name] = rewrite(name, self.render_providers(clumio_aliases[name], aws_aliases[name]))
+            if lookups[name] and None not in clumio_aliases[name]:
+                # Organizational units are looked up through the default provider
+                clumio_aliases[name].add(None)
+                providers[name] = rewrite(name, self.render_providers(clumio_aliases[name], aws_aliases[name]))
+
+        partitions = []
+        for name in self.apply_order(list(blocks), depends_on):
+            sections = [providers[name]]
+            sections.extend(self.render_remote_state(owner) for owner in sorted(remote_states[name]))
+            sections.extend(
+                f'data "clumio_organizational_unit" "{ou}" {{\n  name = {json.dumps(display)}\n}}'
+                for ou, display in sorted(lookups[name].items())
+            )
+            sections.extend(bodies[name])
+            sections.extend(
+                f'output "{output}" {{\n  value = {reference}\n}}' for output, reference in sorted(outputs[name].items())
+            )
+            partitions.append(models.StatePartition(
+                name=name,
+                resource_count=len(resources[name]),
+                addresses=resources[name],
+                depends_on=sorted(depends_on[name]),
+                configuration="\n\n".join(section.strip() for section in sections) + "\n",
+            ))
+        return models.PartitionPlan(
+            partitions=partitions,
+            total_resources=len(owners),
+            largest_partition_size=max((p.resource_count for p in partitions), default=0),
+            unresolved_references=sorted(unresolved),
+        )
+
+    def render_providers(self, clumio_aliases: set[str | None], aws_aliases: set[str | None]) -> str:
+        clumio_accounts = [
+            self.clumio_accounts.get(alias) or models.ClumioAccount(alias=alias)
+            for alias in sorted(clumio_aliases, key=lambda alias: alias or "")
+        ]
+        aws_accounts = [
+            self.aws_accounts.get(alias) or models.AWSAccount(alias=alias)
+            for alias in sorted(aws_aliases, key=lambda alias: alias or "") if alias is not None
+        ]
+        return utils.render_tf_template('provider.tf.j2', clumio_accounts=clumio_accounts, aws_accounts=aws_accounts)
+
+    def render_remote_state(self, partition: str) -> str:
+        config = "\n".join(
+            f"    {key} = {json.dumps(value.format(partition=partition))}" for key, value in self.remote_state_config.items()
+        )
+        return (
+            f'data "terraform_remote_state" "{partition}" {{\n'
+            f'  backend = "{self.remote_state_backend}"\n'
+            f"  config = {{\n{config}\n  }}\n"
+            "}"
+        )
+
+    @staticmethod
+    def apply_order(names: list[str], depends_on: dict[str, set[str]]) -> list[str]:
+        """Order partitions so that every partition comes after the ones it reads from."""
+        remaining = {name: set(depends_on.get(name, ())) for name in names}
+        dependents: dict[str, list[str]] = defaultdict(list)
+        for name, dependencies in remaining.items():
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+        ready = deque(name for name in names if not remaining[name])
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for dependent in dependents[name]:
+                remaining[dependent].discard(name)
+                if not remaining[dependent]:
+                    ready.append(dependent)
+        if len(order) != len(names):
+            cyclic = sorted(name for name in names if name not in order)
+            raise ValueError(f"partitions depend on each other cyclically: {', '.join(cyclic)}")
+        return order
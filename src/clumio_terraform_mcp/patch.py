@@ -0,0 +1,292 @@
+# In-place patching of top-level blocks in large configuration files through a cached byte-range index.
+
+import os
+import re
+import stat
+import tempfile
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from clumio_terraform_mcp import hcl, models
+
+# Characters that open strings, comments and heredocs, whose contents may hold braces, or are braces
+_SCAN_RE = re.compile(r'[{}"#]|//|/\*|<<-?[A-Za-z_]')
+_HEREDOC_RE = re.compile(r"<<-?([A-Za-z_]\w*)[ \t]*\n")
+_ALIAS_RE = re.compile(r'^[ \t]*alias[ \t]*=[ \t]*"([^"\\\n]*)"', re.M)
+
+
+@dataclass(slots=True)
+class BlockIndex:
+    """Byte ranges of the top-level blocks of one version of a file, by address."""
+    mtime_ns: int
+    size: int
+    ranges: dict[str, tuple[int, int]] = field(default_factory=dict)
+    duplicates: set[str] = field(default_factory=set)
+
+    def locate(self, address: str) -> tuple[int, int] | None:
+        """Return the byte range of a block, or None if the file has no block with this address.
+
+        Raises:
+            ValueError: If several blocks share the address
+        """
+        if address in self.duplicates:
+            raise ValueError(f"{address} is defined more than once")
+        return self.ranges.get(address)
+
+
+class _Splice(NamedTuple):
+    """Replacement of a byte range, with the offsets of the blocks within the new bytes."""
+    start: int
+    end: int
+    data: bytes
+    blocks: list[tuple[str, int, int]]
+
+
+# Indexes by real path, valid as long as the modification time and size of the file are unchanged
+_INDEXES: dict[str, BlockIndex] = {}
+# Locks by real path, held from indexing a file until its index is updated after the splice, so that
+# concurrent patches of one file never splice from offsets that another patch made stale
+_LOCKS: dict[str, threading.Lock] = {}
+_LOCKS_LOCK = threading.Lock()
+
+
+def scan(text: str) -> list[hcl.Block]:
+    """Find the top-level blocks of configuration text without parsing their bodies.
+
+    Only strings, comments and heredocs are skipped over to track brace depth, so a scan is much
+    cheaper than a full parse. The returned blocks hold no attributes, except the alias of providers.
+
+    Raises:
+        HCLSyntaxError: If the braces are unbalanced or a block header is malformed
+    """
+    blocks = []
+    depth = 0
+    start = 0
+    pos = 0
+    search = _SCAN_RE.search
+    while (match := search(text, pos)) is not None:
+        token = match.group()
+        index = match.start()
+        if token == '"':
+            pos = hcl._scan_template(text, index)
+        elif token in ("#", "//"):
+            newline = text.find("\n", index)
+            pos = len(text) if newline < 0 else newline
+        elif token == "/*":
+            closing = text.find("*/", index + 2)
+            if closing < 0:
+                raise hcl.HCLSyntaxError(f"unterminated comment at offset {index}")
+            pos = closing + 2
+        elif token.startswith("<<"):
+            heredoc = _HEREDOC_RE.match(text, index)
+            if heredoc is None:
+                pos = index + 2
+                continue
+            closing = re.compile(rf"^[ \t]*{re.escape(heredoc.group(1))}[ \t]*$", re.M).search(text, heredoc.end())
+            if closing is None:
+                raise hcl.HCLSyntaxError(f"unterminated heredoc at offset {index}")
+            pos = closing.end()
+        elif token == "{":
+            if depth == 0:
+                # The type, labels and opening brace of a block header share one line
+                line = text.rfind("\n", 0, index) + 1
+                start = line + len(text[line:index]) - len(text[line:index].lstrip())
+            depth += 1
+            pos = index + 1
+        else:
+            depth -= 1
+            if depth < 0:
+                raise hcl.HCLSyntaxError(f"unbalanced '}}' at offset {index}")
+            if depth == 0:
+                blocks.append(_block(text, start, index + 1))
+            pos = index + 1
+    if depth:
+        raise hcl.HCLSyntaxError(f"unterminated block starting at offset {start}")
+    return blocks
+
+
+def _block(text: str, start: int, end: int) -> hcl.Block:
+    header = hcl.tokenize(text[start:text.index("{", start)])[:-1]
+    if not header or header[0].kind != "ident" or any(token.kind not in ("string", "ident") for token in header[1:]):
+        raise hcl.HCLSyntaxError(f"invalid block header at offset {start}")
+    attributes = {}
+    if header[0].value == "provider":
+        alias = _ALIAS_RE.search(text, start, end)
+        if alias:
+            attributes["alias"] = hcl.Attribute("alias", alias.group(1), alias.start(), alias.end())
+    return hcl.Block(header[0].value, [token.value for token in header[1:]], attributes, [], start, end)
+
+
+def _byte_offsets(text: str, offsets: list[int]) -> dict[int, int]:
+    """Map sorted character offsets to UTF-8 byte offsets, encoding every character once."""
+    if text.isascii():
+        return {offset: offset for offset in offsets}
+    mapping = {}
+    previous = encoded = 0
+    for offset in offsets:
+        encoded += len(text[previous:offset].encode())
+        mapping[offset] = encoded
+        previous = offset
+    return mapping
+
+
+def index_file(path: str) -> BlockIndex:
+    """Return the byte-range index of the top-level blocks of a file, scanning it only if it changed.
+
+    Args:
+        path: Path to a configuration file in native syntax
+    """
+    key = os.path.realpath(path)
+    status = os.stat(key)
+    cached = _INDEXES.get(key)
+    if cached is not None and (cached.mtime_ns, cached.size) == (status.st_mtime_ns, status.st_size):
+        return cached
+    with open(key, "rb") as file:
+        data = file.read()
+    text = data.decode()
+    blocks = scan(text)
+    offsets = _byte_offsets(text, sorted({offset for block in blocks for offset in (block.start, block.end)}))
+    index = BlockIndex(status.st_mtime_ns, len(data))
+    for block in blocks:
+        if block.address in index.ranges:
+            index.duplicates.add(block.address)
+        index.ranges.setdefault(block.address, (offsets[block.start], offsets[block.end]))
+    _INDEXES[key] = index
+    return index
+
+
+def _write(descriptor: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(descriptor, view):]
+
+
+def _copy(source: int, target: int, start: int, end: int) -> None:
+    """Copy a byte range between files, within the kernel where the platform supports it."""
+    offset = start
+    while offset < end:
+        try:
+            copied = os.copy_file_range(source, target, end - offset, offset)
+        except (AttributeError, OSError):
+            copied = 0
+        if not copied:
+            chunk = os.pread(source, min(end - offset, 1 << 20), offset)
+            if not chunk:
+                raise OSError(f"file shrank while copying at offset {offset}")
+            _write(target, chunk)
+            copied = len(chunk)
+        offset += copied
+
+
+def _splice(path: str, splices: list[_Splice], size: int) -> None:
+    """Write the file with the byte ranges replaced to a temporary file and move it into place."""
+    directory, name = os.path.split(path)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with open(path, "rb") as source:
+            position = 0
+            for splice in splices:
+                _copy(source.fileno(), descriptor, position, splice.start)
+                _write(descriptor, splice.data)
+                position = splice.end
+            _copy(source.fileno(), descriptor, position, size)
+        os.fsync(descriptor)
+        os.close(descriptor)
+        descriptor = -1
+        os.chmod(temporary, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(temporary, path)
+    except BaseException:
+        if descriptor >= 0:
+            os.close(descriptor)
+        os.unlink(temporary)
+        raise
+
+
+def patch_file(path: str, configuration: str, address: str | None = None) -> models.FilePatch:
+    """Replace blocks of a configuration file with the blocks of the same address in new configuration.
+
+    Only the replaced blocks are written out; the bytes of every other block are copied unchanged.
+    Blocks of the configuration that the file does not define yet are inserted after the last replaced
+    block, or appended if none was replaced.
+
+    Args:
+        path: Path to the configuration file to patch
+        configuration: Configuration holding the new version of the blocks
+        address: Only patch the block with this address, e.g. "clumio_policy.gold"
+
+    Raises:
+        ValueError: If the address is not in the configuration or defined more than once in the file
+    """
+    path = os.path.realpath(path)
+    with _LOCKS_LOCK:
+        lock = _LOCKS.setdefault(path, threading.Lock())
+    with lock:
+        return _patch_file(path, configuration, address)
+
+
+def _patch_file(path: str, configuration: str, address: str | None) -> models.FilePatch:
+    index = index_file(path)
+    rendered = {}
+    for block in hcl.parse(configuration).blocks:
+        if block.address in rendered:
+            raise ValueError(f"{block.address} is defined more than once in the configuration")
+        rendered[block.address] = configuration[block.start:block.end].encode()
+    if address is not None:
+        if address not in rendered:
+            raise ValueError(f"{address} is not defined in the configuration")
+        rendered = {address: rendered[address]}
+
+    splices = []
+    inserted = []
+    for block_address, data in rendered.items():
+        located = index.locate(block_address)
+        if located is None:
+            inserted.append(block_address)
+        else:
+            splices.append(_Splice(*located, data, [(block_address, 0, len(data))]))
+    if inserted:
+        at = max((splice.end for splice in splices), default=index.size)
+        data = bytearray()
+        if at == index.size and index.size:
+            with open(path, "rb") as file:
+                file.seek(index.size - 1)
+                if file.read(1) != b"\n":
+                    data += b"\n"
+        blocks = []
+        for block_address in inserted:
+            data += b"\n"
+            blocks.append((block_address, len(data), len(data) + len(rendered[block_address])))
+            data += rendered[block_address]
+            if at == index.size:
+                data += b"\n"
+        splices.append(_Splice(at, at, bytes(data), blocks))
+    splices.sort(key=lambda splice: (splice.start, splice.end))
+    _splice(path, splices, index.size)
+
+    # Shift the ranges of untouched blocks instead of scanning the file again
+    ends = [splice.end for splice in splices]
+    shifts = []
+    total = 0
+    for splice in splices:
+        total += len(splice.data) - (splice.end - splice.start)
+        shifts.append(total)
+    ranges = {}
+    for block_address, (start, end) in index.ranges.items():
+        position = bisect_right(ends, start)
+        shift = shifts[position - 1] if position else 0
+        ranges[block_address] = (start + shift, end + shift)
+    for position, splice in enumerate(splices):
+        base = splice.start + (shifts[position - 1] if position else 0)
+        for block_address, start, end in splice.blocks:
+            ranges[block_address] = (base + start, base + end)
+    status = os.stat(path)
+    _INDEXES[path] = BlockIndex(status.st_mtime_ns, status.st_size, ranges, index.duplicates)
+    return models.FilePatch(
+        path=path,
+        replaced=[block_address for block_address in rendered if block_address not in inserted],
+        inserted=inserted,
+        bytes_written=sum(len(splice.data) for splice in splices),
+        file_size=status.st_size,
+    )
@@ -0,0 +1,174 @@
+# Pipelined tool calls over a single persistent MCP client session.
+
+import asyncio
+import random
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from fastmcp import Client
+from mcp.types import CallToolResult
+
+from clumio_terraform_mcp import models
+
+# Errors of the transport, as opposed to tool errors which fail the same way on every attempt
+RETRYABLE_ERRORS: tuple[type[BaseException], ...] = (ConnectionError, TimeoutError, httpx.TransportError)
+
+
+@dataclass(slots=True)
+class PipelineStats:
+    """Counters of a pipelined client, accumulated over the lifetime of the session."""
+    calls: int = 0  # attempts, including retries
+    completed: int = 0
+    failures: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    busy_seconds: float = 0.0
+    total_latency: float = 0.0  # of completed calls
+    max_latency: float = 0.0
+    _busy_since: float | None = field(default=None, repr=False)
+
+    @property
+    def throughput(self) -> float:
+        """Completed calls per second of time with at least one call in flight."""
+        busy = self.busy_seconds + (time.perf_counter() - self._busy_since if self._busy_since is not None else 0.0)
+        return self.completed / busy if busy else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean latency of completed calls in seconds."""
+        return self.total_latency / self.completed if self.completed else 0.0
+
+    def started(self) -> float:
+        now = time.perf_counter()
+        if self.in_flight == 0:
+            self._busy_since = now
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return now
+
+    def finished(self, started: float, failed: bool) -> None:
+        now = time.perf_counter()
+        self.calls += 1
+        if failed:
+            self.failures += 1
+        else:
+            latency = now - started
+            self.completed += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+        self.in_flight -= 1
+        if self.in_flight == 0 and self._busy_since is not None:
+            self.busy_seconds += now - self._busy_since
+            self._busy_since = None
+
+
+class PipelinedClient:
+    """Runs many tool calls concurrently over one session, so throughput is bound by the server.
+
+    Usage::
+
+        async with PipelinedClient("http://localhost:8000/mcp", concurrency=32) as client:
+            configurations = await client.generate(specs)
+        print(client.stats.throughput)
+
+    Args:
+        transport: Anything accepted by fastmcp.Client, e.g. a URL, a script path or a FastMCP server
+        concurrency: Maximum number of calls in flight
+        retries: Number of retries of a call that failed with one of retry_on
+        backoff: Delay before the first retry in seconds. It doubles with every retry.
+        max_backoff: Upper bound of the delay between retries in seconds
+        retry_on: Exception types that are retried
+    """
+
+    def __init__(
+        self,
+        transport: Any,
+        concurrency: int = 16,
+        retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 5.0,
+        retry_on: tuple[type[BaseException], ...] = RETRYABLE_ERRORS,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.client = transport if isinstance(transport, Client) else Client(transport)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.stats = PipelineStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self) -> "PipelinedClient":
+        await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.client.__aexit__(*exc_info)
+
+    async def call(self, name: str, arguments: dict[str, Any]) -> CallToolResult:
+        """Call a tool, waiting for a free slot and retrying transport errors with exponential backoff.
+
+        The slot is released while backing off, so a throttling backend does not stall the other calls.
+        """
+        for attempt in range(self.retries + 1):
+            async with self._semaphore:
+                started = self.stats.started()
+                try:
+                    result = await self.client.call_tool(name, arguments)
+                except self.retry_on:
+                    self.stats.finished(started, failed=True)
+                    if attempt == self.retries:
+                        raise
+                    self.stats.retries += 1
+                except BaseException:
+                    self.stats.finished(started, failed=True)
+                    raise
+                else:
+                    self.stats.finished(started, failed=False)
+                    return result
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        raise AssertionError("unreachable")
+
+    async def call_many(
+        self,
+        calls: Iterable[tuple[str, dict[str, Any]]],
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """Pipeline tool calls and return their results in the order of the calls.
+
+        Args:
+            calls: Tool names and arguments
+            return_exceptions: Return exceptions in place of results instead of raising the first one
+        """
+        calls = list(calls)
+        results: list[Any] = [None] * len(calls)
+        pending = enumerate(calls)
+
+        async def worker() -> None:
+            for index, (name, arguments) in pending:
+                try:
+                    results[index] = await self.call(name, arguments)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[index] = e
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        return results
+
+    async def generate(self, specs: Iterable[models.ResourceSpec]) -> list[str]:
+        """Render resource specs with the matching generate_* tools, in order."""
+        results = await self.call_many((f"generate_{spec.kind}", spec.arguments) for spec in specs)
+        return [result.data for result in results]
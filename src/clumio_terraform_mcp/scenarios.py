@@ -0,0 +1,399 @@
+# Prebuilt, searchable index of example scenarios and their rendered configurations.
+
+import json
+import re
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from clumio_terraform_mcp import hcl, models, utils
+
+INDEX_PATH = Path(__file__).parent / "data" / "example_scenarios.json"
+REPO_ROOT = Path(__file__).parents[2]
+PROMPTS_PATH = REPO_ROOT / "example_prompts.md"
+SOLUTION_PATH = REPO_ROOT / "complete_backup_solution.tf"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({"a", "an", "and", "as", "at", "for", "in", "it", "my", "of", "on", "or", "the", "to", "with"})
+_SECTION_RE = re.compile(r"^## (?P<category>[^\n]+)\n|^### (?P<title>[^\n]+)\n+```\n(?P<prompt>.*?)\n```", re.M | re.S)
+
+# Services are derived from the policy operation types and AWS connection flags of each scenario
+_SERVICE_PREFIXES = {
+    "aws_ebs_": "ebs",
+    "aws_ec2_": "ec2",
+    "aws_rds_": "rds",
+    "aws_dynamodb_": "dynamodb",
+    "aws_s3_": "s3",
+    "protection_group_": "s3",
+}
+
+
+def _sla(retention: tuple[int, str], rpo: tuple[int, str]) -> dict[str, Any]:
+    return {
+        "retention_duration": {"value": retention[0], "unit": retention[1]},
+        "rpo_frequency": {"value": rpo[0], "unit": rpo[1]},
+    }
+
+
+def _policy(name: str, display_name: str, types: list[str], sla: dict[str, Any], **operation: Any) -> dict[str, Any]:
+    return {"kind": "policy", "arguments": {
+        "policy_name": name,
+        "display_name": display_name,
+        "operations": [{"type": type_, "slas": [sla], **operation} for type_ in types],
+    }}
+
+
+def _connection(
+    name: str, description: str, services: list[str], alias: str | None = None, clumio_alias: str | None = None
+) -> dict[str, Any]:
+    arguments = {
+        "connection_name": name,
+        "description": description,
+        "services": {service: service in services for service in ("ebs", "rds", "s3", "dynamodb")},
+    }
+    if alias:
+        arguments["aws_provider_alias"] = alias
+    if clumio_alias:
+        arguments["clumio_provider_alias"] = clumio_alias
+    return {"kind": "aws_connection", "arguments": arguments}
+
+
+def _protection_group(name: str, display_name: str, policy_name: str, tags: dict[str, str]) -> dict[str, Any]:
+    tag_list = [{"key": key, "value": value} for key, value in tags.items()]
+    rule = {"$eq": tag_list[0]} if len(tag_list) == 1 else {"$all": tag_list}
+    return {"kind": "protection_group", "arguments": {
+        "group_name": name,
+        "display_name": display_name,
+        "policy_name": policy_name,
+        "description": f"S3 buckets tagged with {', '.join(f'{k}={v}' for k, v in tags.items())}",
+        "bucket_rule": {"aws_tag": rule},
+    }}
+
+
+def _policy_rule(name: str, display_name: str, policy_name: str, tags: dict[str, str], entity_types: list[str]) -> dict[str, Any]:
+    (key, value), = tags.items()
+    return {"kind": "policy_rule", "arguments": {
+        "rule_name": name,
+        "display_name": display_name,
+        "policy_name": policy_name,
+        "condition_expression": {
+            "aws_tag": {"$eq": {"key": key, "value": value}},
+            "entity_type": {"$in": entity_types},
+        },
+    }}
+
+
+_ALL_SERVICES = ["ebs", "rds", "s3", "dynamodb"]
+_ALL_ENTITY_TYPES = ["aws_ec2_instance", "aws_ebs_volume", "aws_dynamodb_table", "aws_rds_instance", "aws_rds_cluster"]
+_TIERS = [
+    _policy("critical_policy", "Critical", ["aws_ebs_volume_backup", "aws_rds_resource_granular_backup"], _sla((90, "days"), (1, "hours"))),
+    _policy("standard_policy", "Standard", ["aws_ebs_volume_backup", "aws_rds_resource_granular_backup"], _sla((30, "days"), (24, "hours"))),
+    _policy("archive_policy", "Archive", ["aws_ebs_volume_backup", "aws_rds_resource_granular_backup"], _sla((1, "years"), (1, "weeks"))),
+]
+
+# Scenario definitions keyed by their heading in example_prompts.md
+SCENARIOS: list[dict[str, Any]] = [
+    {
+        "title": "Multi-Service Connection",
+        "providers": {"clumio_accounts": [{}], "aws_accounts": [{"region": "us-west-2"}]},
+        "resources": [_connection("multi_service", "Multi-service production environment", _ALL_SERVICES)],
+    },
+    {
+        "title": "Critical Resources Policy",
+        "resources": [_policy(
+            "critical_data_policy", "critical-data-policy", ["aws_ebs_volume_backup"], _sla((90, "days"), (1, "hours")),
+            backup_window_tz={"start_time": "02:00", "end_time": "06:00"}, timezone="America/New_York",
+        )],
+    },
+    {
+        "title": "Tiered Protection Policies",
+        "resources": _TIERS,
+    },
+    {
+        "title": "Tag-Based Groups",
+        "resources": [
+            _policy("s3_policy", "S3 Protection", ["protection_group_backup"], _sla((30, "days"), (1, "days"))),
+            _protection_group("finance_prod_resources", "finance-prod-resources", "s3_policy",
+                              {"Environment": "Production", "Department": "Finance"}),
+        ],
+    },
+    {
+        "title": "Multi-Account Enterprise Setup",
+        "providers": {
+            "clumio_accounts": [
+                {},
+                {"alias": "production", "ou_name": "production_ou"},
+                {"alias": "staging", "ou_name": "staging_ou"},
+                {"alias": "development", "ou_name": "development_ou"},
+            ],
+            "aws_accounts": [
+                {"alias": "production", "region": "us-east-1"},
+                {"alias": "staging", "region": "us-west-2"},
+                {"alias": "development", "region": "eu-west-1"},
+            ],
+        },
+        "resources": [
+            *({"kind": "organizational_unit", "arguments": {
+                "ou_name": f"{env}_ou", "display_name": env.title(), "description": f"{env.title()} environment",
+            }} for env in ("production", "staging", "development")),
+            _connection("production", "Production account", _ALL_SERVICES, "production", "production"),
+            _connection("staging", "Staging account", ["ebs", "rds"], "staging", "staging"),
+            _connection("development", "Development account", ["ebs"], "development", "development"),
+            _policy("production_policy", "Production", ["aws_ebs_volume_backup", "aws_rds_resource_granular_backup",
+                    "aws_dynamodb_table_backup", "protection_group_backup"], _sla((90, "days"), (1, "hours"))),
+            _policy("staging_policy", "Staging", ["aws_ebs_volume_backup", "aws_rds_resource_granular_backup"],
+                    _sla((30, "days"), (24, "hours"))),
+            _policy("development_policy", "Development", ["aws_ebs_volume_backup"], _sla((7, "days"), (1, "days"))),
+            *({"kind": "user_assignment", "arguments": {
+                "user_name": f"{env}_admin",
+                "email": f"{env}-admin@company.com",
+                "full_name": f"{env.title()} Admin",
+                "access_control_configuration": [{
+                    "role_name": "Organizational Unit Admin",
+                    "organizational_unit_ids": [f"${{clumio_organizational_unit.{env}_ou.id}}"],
+                }],
+            }} for env in ("production", "staging", "development")),
+        ],
+    },
+    {
+        "title": "Disaster Recovery Setup",
+        "providers": {"clumio_accounts": [{}], "aws_accounts": [{"region": "us-east-1"}]},
+        "resources": [
+            _connection("primary", "Primary region us-east-1", _ALL_SERVICES),
+            _policy("dr_critical_policy", "DR Critical", ["aws_ebs_volume_backup", "aws_ec2_instance_backup",
+                    "aws_rds_resource_granular_backup", "aws_dynamodb_table_backup"], _sla((30, "days"), (15, "minutes")),
+                    backup_aws_region="us-west-2"),
+            _policy("dr_standard_policy", "DR Standard", ["aws_ebs_volume_backup", "aws_ec2_instance_backup",
+                    "aws_rds_resource_granular_backup", "aws_dynamodb_table_backup", "protection_group_backup"],
+                    _sla((30, "days"), (4, "hours"))),
+        ],
+    },
+    {
+        "title": "Compliance Reporting",
+        "resources": [{"kind": "report_configuration", "arguments": {
+            "config_name": "compliance_report",
+            "config_display_name": "Daily Compliance Report",
+            "email_list": ["admin@company.com", "compliance@company.com"],
+            "controls": {
+                "asset_backup": {
+                    "look_back_period": {"value": 7, "unit": "days"},
+                    "minimum_retention_duration": {"value": 7, "unit": "days"},
+                    "window_size": {"value": 1, "unit": "days"},
+                },
+                "asset_protection": {"should_ignore_deactivated_policy": False},
+                "policy": {
+                    "minimum_retention_duration": {"value": 7, "unit": "days"},
+                    "minimum_rpo_frequency": {"value": 1, "unit": "days"},
+                },
+            },
+            "filters": {
+                "common": {"asset_types": ["aws_ebs_volume", "aws_rds", "aws_ec2_instance"]},
+                "asset": {"tag_op_mode": "equal", "tags": [{"key": "Environment", "value": "Production"}]},
+            },
+            "schedule": {"frequency": "daily", "start_time": "08:00", "timezone": "America/New_York"},
+        }}],
+    },
+    {
+        "title": "Complete Workflow Example",
+        "resources": [
+            _connection("production", "Production account", _ALL_SERVICES),
+            _policy("critical_policy", "Critical", ["aws_ebs_volume_backup", "aws_ec2_instance_backup",
+                    "aws_rds_resource_granular_backup", "protection_group_backup"], _sla((30, "days"), (1, "days"))),
+            _protection_group("production_buckets", "Production Buckets", "critical_policy", {"Environment": "Production"}),
+            _policy_rule("production_rule", "Production Rule", "critical_policy", {"Environment": "Production"}, _ALL_ENTITY_TYPES),
+        ],
+    },
+    {
+        "title": "Step-by-Step Enterprise Setup",
+        "providers": {
+            "clumio_accounts": [{}],
+            "aws_accounts": [{"alias": env, "region": "us-west-2"} for env in ("prod", "staging", "dev")],
+        },
+        "resources": [
+            *(_connection(env, f"{env.title()} account", _ALL_SERVICES, env) for env in ("prod", "staging", "dev")),
+            *_TIERS,
+            *(_protection_group(f"{department.lower()}_buckets", f"{department} Buckets", "standard_policy",
+                                {"Department": department}) for department in ("Finance", "Engineering", "Operations")),
+            *(_policy_rule(f"{tier}_rule", f"{tier.title()} Rule", f"{tier}_policy", {"BackupTier": tier.title()},
+                           ["aws_ebs_volume", "aws_rds_instance", "aws_rds_cluster"]) for tier in ("critical", "standard", "archive")),
+        ],
+    },
+    {
+        "title": "Complete Backup Solution",
+        "category": "Complete Solutions",
+        "prompt": (
+            "Generate a complete backup solution with one AWS connection, a unified policy for EC2, EBS, "
+            "DynamoDB, RDS and S3, a protection group for S3 buckets tagged backup=true and a policy rule "
+            "applying the policy to resources tagged backup=true."
+        ),
+        "configuration_file": SOLUTION_PATH.name,
+    },
+]
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase search tokens with naive plural folding."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _prompt_sections(markdown: str) -> dict[str, tuple[str, str]]:
+    """Map each ``###`` heading with a fenced prompt to its ``##`` category and prompt text."""
+    sections = {}
+    category = ""
+    for match in _SECTION_RE.finditer(markdown):
+        if match.group("category"):
+            category = match.group("category").strip()
+        else:
+            sections[match.group("title").strip()] = (category, match.group("prompt").strip())
+    return sections
+
+
+def _services(configuration: str) -> list[str]:
+    services = set()
+    for block in hcl.parse(configuration).blocks:
+        if block.type == "module":
+            for name in ("ebs", "rds", "s3", "dynamodb"):
+                flag = block.attributes.get(f"is_{name}_enabled")
+                if flag is not None and flag.value is True:
+                    services.add(name)
+        for operation in block.blocks:
+            operation_type = operation.attributes.get("type")
+            if operation.type == "operations" and operation_type is not None:
+                services.update(
+                    service for prefix, service in _SERVICE_PREFIXES.items() if str(operation_type.value).startswith(prefix)
+                )
+    return sorted(services)
+
+
+def build_index(
+    render: Callable[[models.ResourceSpec], str],
+    prompts_path: Path = PROMPTS_PATH,
+    solution_path: Path = SOLUTION_PATH,
+) -> dict[str, Any]:
+    """Render every scenario and build the inverted token index over them.
+
+    Args:
+        render: Renders a single resource spec, e.g. app.render_resource
+        prompts_path: Markdown file holding the scenario prompts
+        solution_path: Terraform file holding the complete backup solution
+
+    Returns:
+        JSON-serializable index with the scenario documents and token posting lists.
+    """
+    sections = _prompt_sections(prompts_path.read_text())
+    scenarios = []
+    postings: dict[str, set[int]] = {}
+    for position, definition in enumerate(SCENARIOS):
+        title = definition["title"]
+        category, prompt = sections.get(title, (definition.get("category", ""), definition.get("prompt", "")))
+        if "configuration_file" in definition:
+            configuration = solution_path.read_text().strip()
+        else:
+            parts = []
+            if "providers" in definition:
+                providers = definition["providers"]
+                parts.append(utils.render_tf_template(
+                    'provider.tf.j2',
+                    clumio_accounts=[models.ClumioAccount(**account) for account in providers["clumio_accounts"]],
+                    aws_accounts=[models.AWSAccount(**account) for account in providers["aws_accounts"]],
+                ).strip())
+            parts.extend(render(models.ResourceSpec(**spec)) for spec in definition["resources"])
+            configuration = "\n\n".join(parts)
+        resource_types = sorted({
+            block.labels[0] for block in hcl.parse(configuration).blocks
+            if block.type == "resource" and block.labels[0].startswith("clumio_")
+        })
+        services = _services(configuration)
+        scenarios.append({
+            "id": re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_"),
+            "title": title,
+            "category": category,
+            "prompt": prompt,
+            "resource_types": resource_types,
+            "services": services,
+            "configuration": configuration,
+        })
+        keys = [
+            *tokenize(f"{title} {category} {prompt}"),
+            *(f"resource:{resource_type}" for resource_type in resource_types),
+            *(f"service:{service}" for service in services),
+        ]
+        for key in keys:
+            postings.setdefault(key, set()).add(position)
+    return {
+        "version": 1,
+        "scenarios": scenarios,
+        "postings": {key: sorted(positions) for key, positions in sorted(postings.items())},
+    }
+
+
+class ScenarioIndex:
+    """Read-only view over a prebuilt scenario index."""
+
+    def __init__(self, raw_index: dict[str, Any]):
+        self.scenarios = [models.ExampleScenario(**scenario) for scenario in raw_index["scenarios"]]
+        self.postings = {key: frozenset(positions) for key, positions in raw_index["postings"].items()}
+
+    def _matching(self, keys: Iterable[str]) -> set[int]:
+        result = set(range(len(self.scenarios)))
+        for key in keys:
+            result &= self.postings.get(key, frozenset())
+        return result
+
+    def search(
+        self,
+        query: str | None = None,
+        resource_type: str | None = None,
+        service: str | None = None,
+        limit: int = 5,
+    ) -> list[models.ExampleScenario]:
+        """Return scenarios matching every filter, best keyword matches first.
+
+        All query tokens must match; if none of the scenarios matches all of them, scenarios
+        matching the most query tokens are returned instead.
+        """
+        filters = []
+        if resource_type:
+            resource_type = resource_type.lower()
+            filters.append("resource:" + (resource_type if resource_type.startswith("clumio_") else "clumio_" + resource_type))
+        if service:
+            filters.append("service:" + service.lower())
+        candidates = self._matching(filters)
+        tokens = set(tokenize(query or ""))
+        if not tokens:
+            return [self.scenarios[position] for position in sorted(candidates)[:limit]]
+        scores = dict.fromkeys(candidates, 0)
+        for token in tokens:
+            for position in self.postings.get(token, frozenset()) & candidates:
+                scores[position] += 1
+        ranked = sorted((position for position, score in scores.items() if score), key=lambda p: (-scores[p], p))
+        complete = [position for position in ranked if scores[position] == len(tokens)]
+        ranked = complete or ranked
+        return [self.scenarios[position] for position in ranked[:limit]]
+
+
+@lru_cache(maxsize=None)
+def load_index(path: Path = INDEX_PATH) -> ScenarioIndex:
+    """Load the prebuilt scenario index once per process."""
+    with open(path) as f:
+        return ScenarioIndex(json.load(f))
+
+
+if __name__ == "__main__":
+    from clumio_terraform_mcp import app
+
+    INDEX_PATH.parent.mkdir(exist_ok=True)
+    with open(INDEX_PATH, "w") as f:
+        json.dump(build_index(app.render_resource), f, indent=1)
+        f.write("\n")
+    print(f"Wrote {len(SCENARIOS)} scenarios to {INDEX_PATH}")
@@ -0,0 +1,337 @@
+# Weighted fair scheduling of tool calls from many clients sharing one server.
+
+import asyncio
+import functools
+import heapq
+import itertools
+import math
+import os
+import time
+import uuid
+import weakref
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import anyio.to_thread
+import pydantic_core
+from fastmcp.server.dependencies import get_access_token
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.server.middleware.rate_limiting import RateLimitError
+
+from clumio_terraform_mcp import models
+
+# Cost charged for every call on top of its input size, so that floods of tiny calls are not free
+BASE_COST = 256
+# Wait times kept per client for the metrics
+WAIT_SAMPLES = 1024
+# Once more clients than this are known, idle ones are forgotten together with their metrics
+MAX_CLIENTS = 1024
+ANONYMOUS_CLIENT = "anonymous"
+# Environment variables configuring the scheduler of the server
+MAX_CONCURRENCY_VARIABLE = "CLUMIO_MCP_MAX_CONCURRENCY"
+MAX_BYTES_IN_FLIGHT_VARIABLE = "CLUMIO_MCP_MAX_BYTES_IN_FLIGHT"
+MAX_QUEUED_PER_CLIENT_VARIABLE = "CLUMIO_MCP_MAX_QUEUED_PER_CLIENT"
+CLIENT_WEIGHTS_VARIABLE = "CLUMIO_MCP_CLIENT_WEIGHTS"
+
+
+@dataclass(slots=True)
+class _Client:
+    client_id: str
+    weight: float
+    queue: deque["_Request"] = field(default_factory=deque)
+    last_finish: float = 0.0
+    running: int = 0
+    completed: int = 0
+    rejected: int = 0
+    waits: deque[float] = field(default_factory=lambda: deque(maxlen=WAIT_SAMPLES))
+
+
+@dataclass(slots=True, eq=False)
+class _Request:
+    client: _Client
+    cost: int
+    finish: float
+    enqueued: float
+    granted: asyncio.Future
+
+
+class FairScheduler:
+    """Admits calls from per-client queues in weighted fair order, within concurrency and byte budgets.
+
+    Uses self-clocked fair queuing: every call is tagged with the virtual time at which it would finish
+    if each client were served at a rate proportional to its weight, ``max(v, previous tag) + cost / weight``,
+    and the queued call with the smallest tag is admitted next, advancing ``v`` to its tag. A client
+    submitting large calls thus delays others by no more than its share, and small interactive calls
+    overtake queued bulk work. A call is admitted only if the bytes of all admitted calls stay within the
+    byte budget, except when nothing else runs, so that calls larger than the budget still make progress.
+
+    Rendering holds the GIL, so more rendering calls in flight add little throughput, but a few keep
+    I/O bound tools such as analyze_state_drift from holding up every other client.
+
+    Args:
+        max_concurrency: Maximum number of calls admitted at once
+        max_bytes_in_flight: Budget for the estimated cost of all admitted calls, in bytes
+        max_queued_per_client: Calls a client may have waiting before further calls are rejected
+        weights: Share of each client ID relative to the others
+        default_weight: Weight of clients without an entry in weights
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_bytes_in_flight: int = 16 << 20,
+        max_queued_per_client: int = 64,
+        weights: dict[str, float] = {},
+        default_weight: float = 1.0,
+    ):
+        if max_concurrency < 1 or max_bytes_in_flight < 1 or max_queued_per_client < 1:
+            raise ValueError("max_concurrency, max_bytes_in_flight and max_queued_per_client must be at least 1")
+        if default_weight <= 0 or any(weight <= 0 for weight in weights.values()):
+            raise ValueError("weights must be positive")
+        self.max_concurrency = max_concurrency
+        self.max_bytes_in_flight = max_bytes_in_flight
+        self.max_queued_per_client = max_queued_per_client
+        self.weights = dict(weights)
+        self.default_weight = default_weight
+        self.running = 0
+        self.bytes_in_flight = 0
+        self._clients: dict[str, _Client] = {}
+        # Head call of every client queue by tag. Entries of withdrawn or admitted calls are skipped.
+        self._heads: list[tuple[float, int, _Request]] = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._dispatch_pending = False
+
+    def _client(self, client_id: str) -> _Client:
+        client = self._clients.get(client_id)
+        if client is None:
+            client = self._clients[client_id] = _Client(client_id, self.weights.get(client_id, self.default_weight))
+        return client
+
+    def _forget_if_idle(self, client: _Client) -> None:
+        if not client.queue and not client.running and len(self._clients) > MAX_CLIENTS:
+            del self._clients[client.client_id]
+
+    def _push_head(self, client: _Client) -> None:
+        if client.queue:
+            heapq.heappush(self._heads, (client.queue[0].finish, next(self._sequence), client.queue[0]))
+
+    def _schedule_dispatch(self) -> None:
+        # Dispatching on the next loop iteration lets every call that arrived while a synchronous tool
+        # blocked the loop join its queue before the next one is picked
+        if not self._dispatch_pending:
+            self._dispatch_pending = True
+            asyncio.get_running_loop().call_soon(self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._dispatch_pending = False
+        now = time.perf_counter()
+        while self._heads and self.running < self.max_concurrency:
+            finish, _, request = self._heads[0]
+            client = request.client
+            if not client.queue or client.queue[0] is not request:
+                heapq.heappop(self._heads)
+                continue
+            if request.granted.cancelled():
+                # Cancelled, but its task has not withdrawn it yet
+                heapq.heappop(self._heads)
+                client.queue.popleft()
+                self._push_head(client)
+                continue
+            if self.running and self.bytes_in_flight + request.cost > self.max_bytes_in_flight:
+                break
+            heapq.heappop(self._heads)
+            client.queue.popleft()
+            self._push_head(client)
+            self._virtual_time = finish
+            self.running += 1
+            self.bytes_in_flight += request.cost
+            client.running += 1
+            client.waits.append(now - request.enqueued)
+            request.granted.set_result(None)
+
+    async def acquire(self, client_id: str, cost: int) -> _Request:
+        """Wait until a call of a client is admitted.
+
+        Raises:
+            RateLimitError: If the client already has the maximum number of calls waiting
+        """
+        client = self._client(client_id)
+        if len(client.queue) >= self.max_queued_per_client:
+            client.rejected += 1
+            raise RateLimitError(f"Too many queued calls for client: {client_id}")
+        finish = max(self._virtual_time, client.last_finish) + cost / client.weight
+        client.last_finish = finish
+        request = _Request(client, cost, finish, time.perf_counter(), asyncio.get_running_loop().create_future())
+        client.queue.append(request)
+        if len(client.queue) == 1:
+            self._push_head(client)
+        self._schedule_dispatch()
+        try:
+            await request.granted
+        except asyncio.CancelledError:
+            if not request.granted.cancelled():
+                # Admitted just before the cancellation
+                self.release(request)
+            elif request in client.queue:
+                was_head = client.queue[0] is request
+                client.queue.remove(request)
+                if was_head:
+                    self._push_head(client)
+                    self._schedule_dispatch()
+                self._forget_if_idle(client)
+            raise
+        return request
+
+    def release(self, request: _Request) -> None:
+        """Return the budget of an admitted call once it completed."""
+        client = request.client
+        self.running -= 1
+        self.bytes_in_flight -= request.cost
+        client.running -= 1
+        client.completed += 1
+        self._forget_if_idle(client)
+        if self._heads:
+            self._schedule_dispatch()
+
+    @asynccontextmanager
+    async def slot(self, client_id: str, cost: int) -> AsyncIterator[None]:
+        """Hold an admitted slot for a call while the context is active."""
+        request = await self.acquire(client_id, cost)
+        try:
+            yield
+        finally:
+            self.release(request)
+
+    def metrics(self) -> models.SchedulerMetrics:
+        """Return the queue depth, admitted calls and wait times of every client."""
+        clients = []
+        for client in self._clients.values():
+            waits = sorted(client.waits)
+            clients.append(models.ClientQueueMetrics(
+                client_id=client.client_id,
+                weight=client.weight,
+                queued=len(client.queue),
+                running=client.running,
+                completed=client.completed,
+                rejected=client.rejected,
+                mean_wait_ms=round(1000 * sum(waits) / len(waits), 3) if waits else 0.0,
+                p95_wait_ms=round(1000 * waits[math.ceil(0.95 * len(waits)) - 1], 3) if waits else 0.0,
+                max_wait_ms=round(1000 * waits[-1], 3) if waits else 0.0,
+            ))
+        return models.SchedulerMetrics(
+            running=self.running,
+            queued=sum(client.queued for client in clients),
+            bytes_in_flight=self.bytes_in_flight,
+            max_concurrency=self.max_concurrency,
+            max_bytes_in_flight=self.max_bytes_in_flight,
+            clients=clients,
+        )
+
+
+def scheduler_from_environment(environ: Mapping[str, str] = os.environ) -> FairScheduler:
+    """Create the scheduler of a server from environment variables, with defaults for unset ones.
+
+    CLUMIO_MCP_MAX_CONCURRENCY, CLUMIO_MCP_MAX_BYTES_IN_FLIGHT and CLUMIO_MCP_MAX_QUEUED_PER_CLIENT set
+    the limits. CLUMIO_MCP_CLIENT_WEIGHTS gives authenticated clients a weight, e.g. ``ci=0.5,ops=2``.
+
+    Raises:
+        ValueError: If a variable is not a valid number or weight list
+    """
+    limits = {}
+    for name, variable in (
+        ("max_concurrency", MAX_CONCURRENCY_VARIABLE),
+        ("max_bytes_in_flight", MAX_BYTES_IN_FLIGHT_VARIABLE),
+        ("max_queued_per_client", MAX_QUEUED_PER_CLIENT_VARIABLE),
+    ):
+        if environ.get(variable):
+            try:
+                limits[name] = int(environ[variable])
+            except ValueError:
+                raise ValueError(f"{variable} must be an integer: {environ[variable]}") from None
+    weights = {}
+    for entry in filter(None, environ.get(CLIENT_WEIGHTS_VARIABLE, "").split(",")):
+        client_id, _, weight = entry.rpartition("=")
+        try:
+            weights[client_id.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f"{CLIENT_WEIGHTS_VARIABLE} entries must be client_id=weight: {entry}") from None
+        if not client_id.strip():
+            raise ValueError(f"{CLIENT_WEIGHTS_VARIABLE} entries must be client_id=weight: {entry}")
+    return FairScheduler(weights=weights, **limits)
+
+
+def estimate_cost(arguments: dict[str, Any] | None) -> int:
+    """Estimate the cost of a tool call from the size of its arguments, which drives rendering time."""
+    return BASE_COST + len(pydantic_core.to_json(arguments or {}))
+
+
+# Identity of every open transport session, assigned by the server so that clients cannot choose it
+_session_ids: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+
+def default_client_id(context: MiddlewareContext) -> str:
+    """Identify the client of a call by its authenticated client ID, or else by its transport session.
+
+    The client ID a client sends with its requests is ignored, since any client could claim another's
+    weight with it, or send a new one with every call to escape its queue limit. Sessions are identified
+    as ``session:<uuid>``, which never matches the weights of authenticated clients.
+    """
+    access_token = get_access_token()
+    if access_token is not None:
+        return access_token.client_id
+    if context.fastmcp_context is None:
+        return ANONYMOUS_CLIENT
+    try:
+        session = context.fastmcp_context.session
+    except ValueError:
+        return ANONYMOUS_CLIENT
+    session_id = _session_ids.get(session)
+    if session_id is None:
+        session_id = _session_ids[session] = f"session:{uuid.uuid4()}"
+    return session_id
+
+
+def run_in_thread(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a synchronous tool function in an asynchronous one that runs it on a worker thread.
+
+    Otherwise the tool would block the event loop, so that calls arriving meanwhile could neither be
+    read nor join their queue, and admission order would not matter. A worker thread cannot be
+    interrupted, so a cancelled call keeps its slot until the thread returns.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+    return wrapper
+
+
+class FairSchedulingMiddleware(Middleware):
+    """Middleware that runs tool calls through a FairScheduler.
+
+    Calls are admitted after FastMCP validated their arguments. Synchronous tools should be registered
+    through run_in_thread, so that the event loop keeps queueing calls while they run.
+
+    Args:
+        scheduler: Scheduler to admit calls with
+        get_client_id: Function identifying the client of a call, by default its authenticated client or session
+        exempt_tools: Tools that bypass the queues, e.g. the one reporting their metrics
+    """
+
+    def __init__(
+        self,
+        scheduler: FairScheduler | None = None,
+        get_client_id: Callable[[MiddlewareContext], str] = default_client_id,
+        exempt_tools: set[str] = set(),
+    ):
+        self.scheduler = scheduler or FairScheduler()
+        self.get_client_id = get_client_id
+        self.exempt_tools = set(exempt_tools)
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext) -> Any:
+        if context.message.name in self.exempt_tools:
+            return await call_next(context)
+        async with self.scheduler.slot(self.get_client_id(context), estimate_cost(context.message.arguments)):
+            return await call_next(context)
@@ -0,0 +1,245 @@
+# Offline validation of generated configuration against a bundled Clumio provider schema.
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from clumio_terraform_mcp import hcl
+
+SCHEMA_PATH = Path(__file__).parent / "schemas" / "clumio_provider_schema.json"
+PROVIDER_SOURCE = "registry.terraform.io/clumio-code/clumio"
+
+# Arguments and blocks handled by Terraform itself rather than the provider.
+META_ARGUMENTS = frozenset({"provider", "count", "for_each", "depends_on"})
+META_BLOCKS = frozenset({"lifecycle", "provisioner", "connection"})
+PROVIDER_META_ARGUMENTS = frozenset({"alias", "version"})
+
+# Functions whose result type is always a string.
+STRING_FUNCTIONS = frozenset({"jsonencode", "format", "join", "lower", "upper", "trimspace", "replace", "base64encode"})
+
+
+@dataclass(frozen=True, slots=True)
+class AttributeSchema:
+    type: Any
+    required: bool
+    read_only: bool
+
+
+@dataclass(frozen=True, slots=True)
+class BlockSchema:
+    attributes: dict[str, AttributeSchema]
+    blocks: dict[str, "NestedBlockSchema"]
+
+
+@dataclass(frozen=True, slots=True)
+class NestedBlockSchema:
+    nesting_mode: str
+    min_items: int
+    max_items: int | None
+    block: BlockSchema
+
+
+@dataclass(frozen=True, slots=True)
+class Diagnostic:
+    """A single schema violation found in a configuration."""
+    line: int
+    address: str
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        location = f"{self.address}.{self.path}" if self.path else self.address
+        return f"line {self.line}: {location}: {self.message}"
+
+
+def _compile_block(raw: dict[str, Any]) -> BlockSchema:
+    attributes = {
+        name: AttributeSchema(
+            type=spec.get("type", "dynamic"),
+            required=bool(spec.get("required")),
+            read_only=bool(spec.get("computed")) and not spec.get("optional") and not spec.get("required"),
+        )
+        for name, spec in raw.get("attributes", {}).items()
+    }
+    blocks = {
+        name: NestedBlockSchema(
+            nesting_mode=spec.get("nesting_mode", "list"),
+            min_items=spec.get("min_items", 0),
+            max_items=1 if spec.get("nesting_mode") == "single" else spec.get("max_items"),
+            block=_compile_block(spec.get("block", {})),
+        )
+        for name, spec in raw.get("block_types", {}).items()
+    }
+    return BlockSchema(attributes, blocks)
+
+
+def _type_name(type_: Any) -> str:
+    if isinstance(type_, str):
+        return type_
+    kind, element = type_
+    if kind == "object":
+        return "object({" + ", ".join(f"{k}={_type_name(v)}" for k, v in element.items()) + "})"
+    if kind == "tuple":
+        return "tuple([" + ", ".join(_type_name(v) for v in element) + "])"
+    return f"{kind}({_type_name(element)})"
+
+
+def _conforms(value: Any, type_: Any) -> bool:
+    """Return whether a parsed value can be converted to a schema type."""
+    if value is None or type_ == "dynamic":
+        return True
+    if isinstance(value, hcl.Expression):
+        if value.function in STRING_FUNCTIONS:
+            return type_ in ("string", "dynamic")
+        return True
+    if type_ == "string":
+        return isinstance(value, (str, int, float))
+    if type_ == "number":
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, str):
+            try:
+                float(value)
+            except ValueError:
+                return False
+        return isinstance(value, (str, int, float))
+    if type_ == "bool":
+        return isinstance(value, bool) or value in ("true", "false")
+    kind, element = type_
+    if kind in ("list", "set"):
+        return isinstance(value, list) and all(_conforms(item, element) for item in value)
+    if kind == "map":
+        return isinstance(value, dict) and all(_conforms(item, element) for item in value.values())
+    if kind == "object":
+        return isinstance(value, dict) and all(
+            key in element and _conforms(item, element[key]) for key, item in value.items()
+        )
+    if kind == "tuple":
+        return isinstance(value, list) and len(value) == len(element) and all(
+            _conforms(item, item_type) for item, item_type in zip(value, element)
+        )
+    return False
+
+
+class SchemaIndex:
+    """Attribute and block lookup index compiled from ``terraform providers schema -json`` output."""
+
+    def __init__(self, raw_schema: dict[str, Any], provider_source: str = PROVIDER_SOURCE):
+        provider = raw_schema["provider_schemas"][provider_source]
+        self.provider = _compile_block(provider.get("provider", {}).get("block", {}))
+        self.resources = {
+            name: _compile_block(spec["block"]) for name, spec in provider.get("resource_schemas", {}).items()
+        }
+        self.data_sources = {
+            name: _compile_block(spec["block"]) for name, spec in provider.get("data_source_schemas", {}).items()
+        }
+
+    def validate(self, configuration: str | hcl.Document) -> list[Diagnostic]:
+        """Validate every Clumio resource, data source and provider block in a configuration.
+
+        Args:
+            configuration: Terraform configuration text or an already parsed document
+
+        Returns:
+            Diagnostics in source order; an empty list means the configuration conforms to the schema.
+        """
+        document = hcl.parse(configuration) if isinstance(configuration, str) else configuration
+        diagnostics: list[Diagnostic] = []
+        for block in document.blocks:
+            if block.type == "provider" and block.labels == ["clumio"]:
+                self._check_body(document, block, self.provider, block.address, "", diagnostics, PROVIDER_META_ARGUMENTS)
+                continue
+            if block.type not in ("resource", "data") or not block.labels or not block.labels[0].startswith("clumio_"):
+                continue
+            catalog = self.resources if block.type == "resource" else self.data_sources
+            block_schema = catalog.get(block.labels[0])
+            if block_schema is None:
+                kind = "resource" if block.type == "resource" else "data source"
+                diagnostics.append(Diagnostic(document.line(block.start), block.address, "", f"unknown {kind} type {block.labels[0]!r}"))
+                continue
+            self._check_body(document, block, block_schema, block.address, "", diagnostics, META_ARGUMENTS)
+        diagnostics.sort(key=lambda diagnostic: diagnostic.line)
+        return diagnostics
+
+    def _check_body(
+        self,
+        document: hcl.Document,
+        block: hcl.Block,
+        block_schema: BlockSchema,
+        address: str,
+        path: str,
+        diagnostics: list[Diagnostic],
+        meta_arguments: frozenset[str] = frozenset(),
+    ) -> None:
+        prefix = path + "." if path else ""
+        for name, attribute in block.attributes.items():
+            if name in meta_arguments:
+                continue
+            line = document.line(attribute.start)
+            attribute_schema = block_schema.attributes.get(name)
+            if attribute_schema is None:
+                if name in block_schema.blocks:
+                    message = f"{name!r} is a block, not an argument"
+                else:
+                    message = f"unsupported argument {name!r}"
+                diagnostics.append(Diagnostic(line, address, path, message))
+            elif attribute_schema.read_only:
+                diagnostics.append(Diagnostic(line, address, path, f"{name!r} is read-only and cannot be set"))
+            elif not _conforms(attribute.value, attribute_schema.type):
+                message = f"incorrect type for {name!r}: expected {_type_name(attribute_schema.type)}"
+                diagnostics.append(Diagnostic(line, address, path, message))
+        line = document.line(block.start)
+        for name, attribute_schema in block_schema.attributes.items():
+            if attribute_schema.required and name not in block.attributes:
+                diagnostics.append(Diagnostic(line, address, path, f"missing required argument {name!r}"))
+
+        nested_blocks: dict[str, list[hcl.Block]] = {}
+        for nested in block.blocks:
+            nested_blocks.setdefault(nested.type, []).append(nested)
+        for name, occurrences in nested_blocks.items():
+            if name in META_BLOCKS and not path:
+                continue
+            nested_schema = block_schema.blocks.get(name)
+            if nested_schema is None:
+                if name in block_schema.attributes:
+                    message = f"{name!r} is an argument, use '{name} = ...'"
+                else:
+                    message = f"unsupported block type {name!r}"
+                diagnostics.append(Diagnostic(document.line(occurrences[0].start), address, path, message))
+                continue
+            if nested_schema.max_items is not None and len(occurrences) > nested_schema.max_items:
+                message = f"too many {name!r} blocks: at most {nested_schema.max_items} allowed"
+                diagnostics.append(Diagnostic(document.line(occurrences[-1].start), address, path, message))
+            for i, nested in enumerate(occurrences):
+                nested_path = f"{prefix}{name}" if nested_schema.max_items == 1 else f"{prefix}{name}[{i}]"
+                self._check_body(document, nested, nested_schema.block, address, nested_path, diagnostics)
+        for name, nested_schema in block_schema.blocks.items():
+            if len(nested_blocks.get(name, ())) < nested_schema.min_items:
+                message = f"at least {nested_schema.min_items} {name!r} block(s) required"
+                diagnostics.append(Diagnostic(line, address, path, message))
+
+
+@lru_cache(maxsize=None)
+def load_schema_index(path: Path = SCHEMA_PATH) -> SchemaIndex:
+    """Load and compile the bundled provider schema snapshot once per process."""
+    with open(path) as f:
+        return SchemaIndex(json.load(f))
+
+
+def validate_configuration(configuration: str) -> list[Diagnostic]:
+    """Validate configuration text against the bundled Clumio provider schema."""
+    return load_schema_index().validate(configuration)
+
+
+def check_configuration(configuration: str) -> str:
+    """Return configuration text unchanged after validating it against the bundled Clumio provider schema.
+
+    Raises:
+        ValueError: If the configuration does not conform to the schema, listing every diagnostic
+    """
+    diagnostics = validate_configuration(configuration)
+    if diagnostics:
+        raise ValueError("configuration does not match the Clumio provider schema:\n" + "\n".join(map(str, diagnostics)))
+    return configuration
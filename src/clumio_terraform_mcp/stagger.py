@@ -0,0 +1,127 @@
+# Staggering of report schedules so that runs spread evenly over the day, week and month.
+
+from datetime import datetime, timezone as dt_timezone
+from typing import get_args
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from clumio_terraform_mcp import models
+
+DAYS_OF_WEEK: tuple[str, ...] = get_args(models.Schedule.model_fields["day_of_week"].annotation)
+# Monthly reports run on days 1-28, so load is modelled over four weeks in which day 1 is a Monday.
+# Reports on the last day of the month (-1) are modelled on the last day of the cycle.
+CYCLE_DAYS = 28
+LAST_DAY_OF_MONTH = -1
+# Offsets are taken at a fixed instant, so that schedules do not depend on the date of the call
+REFERENCE_INSTANT = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+MINUTES_PER_DAY = 24 * 60
+_FREQUENCY_ORDER = {'daily': 0, 'weekly': 1, 'monthly': 2}
+
+
+def utc_offset_minutes(timezone: str) -> int:
+    """Return the standard UTC offset of an IANA timezone in minutes, ignoring daylight saving time."""
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"unknown timezone {timezone!r}") from None
+    local = REFERENCE_INSTANT.astimezone(zone)
+    return int((local.utcoffset() - local.dst()).total_seconds()) // 60
+
+
+def parse_start_time(start_time: str) -> int:
+    """Return the minute of the day of an ``HH:MM`` start time."""
+    try:
+        hour, minute = (int(part) for part in start_time.split(":"))
+    except ValueError:
+        raise ValueError(f"start_time must be HH:MM: {start_time!r}") from None
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError(f"start_time must be HH:MM: {start_time!r}")
+    return hour * 60 + minute
+
+
+class ReportScheduler:
+    """Assigns report start times and days greedily to the least loaded slot of a four-week cycle.
+
+    Reports are placed daily first, then weekly, then monthly, since reports that run more often
+    constrain the load of more days. Each report takes the candidate slot whose busiest day is the
+    least loaded afterwards, breaking ties by the total load of the days it runs on. A start time set
+    explicitly in a schedule is kept, and only the day of weekly and monthly reports is picked for it.
+
+    Args:
+        allowed_hours: Hours of the day, in the timezone of each report, at which reports may start
+        slot_minutes: Length of a slot in minutes; start times are aligned to slots
+    """
+
+    def __init__(self, allowed_hours: list[int] | None = None, slot_minutes: int = 15):
+        hours = sorted(set(range(24) if allowed_hours is None else allowed_hours))
+        if not hours or hours[0] < 0 or hours[-1] > 23:
+            raise ValueError("allowed_hours must contain hours between 0 and 23")
+        if slot_minutes < 1 or 60 % slot_minutes:
+            raise ValueError("slot_minutes must divide 60")
+        self.slot_minutes = slot_minutes
+        self.local_starts = [hour * 60 + minute for hour in hours for minute in range(0, 60, slot_minutes)]
+        # Number of runs starting in each UTC slot on each day of the cycle
+        self.load = [[0] * CYCLE_DAYS for _ in range(MINUTES_PER_DAY // slot_minutes)]
+
+    def _candidates(self, schedule: models.Schedule, offset: int):
+        """Yield local start minute, local day choice and affected UTC cells of every placement."""
+        if "start_time" in schedule.model_fields_set:
+            local_starts = [parse_start_time(schedule.start_time)]
+        else:
+            local_starts = self.local_starts
+        for local_start in local_starts:
+            shift, utc_start = divmod(local_start - offset, MINUTES_PER_DAY)
+            slot = utc_start // self.slot_minutes
+            if schedule.frequency == 'daily':
+                yield local_start, None, slot, range(CYCLE_DAYS)
+            elif schedule.frequency == 'weekly':
+                for weekday in range(7):
+                    yield local_start, weekday, slot, [(weekday + shift + week * 7) % CYCLE_DAYS for week in range(4)]
+            else:
+                days = [CYCLE_DAYS - 1] if schedule.day_of_month == LAST_DAY_OF_MONTH else range(CYCLE_DAYS)
+                for day in days:
+                    yield local_start, day, slot, [(day + shift) % CYCLE_DAYS]
+
+    def place(self, schedule: models.Schedule) -> models.Schedule:
+        """Pick the start time and day of a schedule and record its load.
+
+        Raises:
+            ValueError: If the timezone is unknown, the start time is malformed or day_of_month is 0
+        """
+        if schedule.frequency == 'monthly' and schedule.day_of_month == 0:
+            raise ValueError("day_of_month must be between 1 and 28, or -1 for the last day of the month")
+        offset = utc_offset_minutes(schedule.timezone)
+        best = None
+        best_cost = None
+        for local_start, day, slot, days in self._candidates(schedule, offset):
+            cells = self.load[slot]
+            cost = (max(cells[d] for d in days) + 1, sum(cells[d] for d in days))
+            if best_cost is None or cost < best_cost:
+                best, best_cost = (local_start, day, slot, days), cost
+        local_start, day, slot, days = best
+        for d in days:
+            self.load[slot][d] += 1
+        update = {"start_time": f"{local_start // 60:02d}:{local_start % 60:02d}"}
+        if schedule.frequency == 'weekly':
+            update["day_of_week"] = DAYS_OF_WEEK[day]
+        elif schedule.frequency == 'monthly' and schedule.day_of_month != LAST_DAY_OF_MONTH:
+            update["day_of_month"] = day + 1
+        return schedule.model_copy(update=update)
+
+    def assign(self, schedules: list[models.Schedule]) -> list[models.Schedule]:
+        """Stagger schedules, keeping their frequency and timezone. The result is in input order."""
+        placed: list[models.Schedule | None] = [None] * len(schedules)
+        order = sorted(range(len(schedules)), key=lambda index: _FREQUENCY_ORDER[schedules[index].frequency])
+        for index in order:
+            placed[index] = self.place(schedules[index])
+        return placed
+
+    def histogram(self) -> list[models.SlotLoad]:
+        """Return the load of every UTC slot in which at least one report starts."""
+        return [
+            models.SlotLoad(
+                start_time=f"{slot * self.slot_minutes // 60:02d}:{slot * self.slot_minutes % 60:02d}",
+                peak_runs=max(cells),
+                runs_per_day=round(sum(cells) / CYCLE_DAYS, 3),
+            )
+            for slot, cells in enumerate(self.load) if any(cells)
+        ]
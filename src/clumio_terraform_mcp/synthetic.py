@@ -0,0 +1,330 @@
+# Seeded generator of synthetic Clumio estates for scale testing.
+
+import argparse
+import json
+import random
+import sys
+from collections.abc import Iterator
+from typing import get_args
+
+from clumio_terraform_mcp import models
+
+REGIONS = ["us-east-1", "us-east-2", "us-west-2", "ca-central-1", "eu-west-1", "eu-central-1", "ap-southeast-2"]
+OPERATION_TYPES: list[str] = list(get_args(models.PolicyOperationType))
+ASSET_TYPES: list[str] = list(get_args(models.CommonFilterAssetTypes))
+RULE_ENTITY_TYPES = ["aws_ebs_volume", "aws_ec2_instance", "aws_rds_instance", "aws_rds_cluster", "aws_dynamodb_table"]
+ENVIRONMENTS = ["production", "staging", "development", "sandbox"]
+TIERS = ["gold", "silver", "bronze"]
+
+# (unit, smallest value, largest value) used for randomly drawn SLAs, retention always outlasting the RPO
+_RPO_UNITS = [("minutes", 15, 60), ("hours", 1, 24), ("days", 1, 7)]
+_RETENTION_UNITS = [("days", 7, 90), ("weeks", 2, 12), ("months", 1, 24), ("years", 1, 7)]
+
+
+class SyntheticEstate:
+    """A deterministic synthetic organisation that is generated lazily.
+
+    Every stream is an independent generator seeded from ``seed`` and the stream name, so
+    iterating a stream twice yields the same records and memory use does not depend on the
+    size of the estate. Names are derived from record indexes, which keeps references between
+    streams consistent without remembering what was generated.
+
+    Args:
+        seed: Seed for all random choices
+        accounts: Number of AWS accounts, each with one AWS connection
+        organizational_units: Number of OUs, arranged as complete trees
+        ou_fanout: Number of top-level OUs and of children per OU
+        policies: Number of policies
+        rule_chain_length: Number of policy rules chained together with before_rule_name
+        rules: Number of policy rules
+        protection_groups: Number of S3 protection groups
+        users: Number of users
+        report_configurations: Number of compliance report configurations
+        assets_per_account: Number of assets generated per AWS account
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        accounts: int = 100,
+        organizational_units: int = 40,
+        ou_fanout: int = 3,
+        policies: int = 50,
+        rules: int = 100,
+        rule_chain_length: int = 5,
+        protection_groups: int = 50,
+        users: int = 100,
+        report_configurations: int = 20,
+        assets_per_account: int = 10,
+    ):
+        if ou_fanout < 1 or rule_chain_length < 1:
+            raise ValueError("ou_fanout and rule_chain_length must be positive")
+        if (rules or protection_groups) and not policies:
+            raise ValueError("policy rules and protection groups need at least one policy to reference")
+        self.seed = seed
+        self.accounts = accounts
+        self.organizational_units = organizational_units
+        self.ou_fanout = ou_fanout
+        self.policies = policies
+        self.rules = rules
+        self.rule_chain_length = rule_chain_length
+        self.protection_groups = protection_groups
+        self.users = users
+        self.report_configurations = report_configurations
+        self.assets_per_account = assets_per_account
+
+    def _random(self, stream: str) -> random.Random:
+        return random.Random(f"{self.seed}:{stream}")
+
+    # Naming helpers, shared by all streams
+
+    @staticmethod
+    def account_id(index: int) -> str:
+        return f"{100000000000 + index:012d}"
+
+    @staticmethod
+    def ou_name(index: int) -> str:
+        return f"ou_{index}"
+
+    def ou_parent(self, index: int) -> int | None:
+        """Parent of an OU; the first ``ou_fanout`` OUs are top-level and the rest are numbered breadth-first."""
+        return None if index < self.ou_fanout else index // self.ou_fanout - 1
+
+    def ou_depth(self, index: int) -> int:
+        """Depth of an OU in the tree, where top-level OUs have depth 1."""
+        depth = 1
+        while index >= self.ou_fanout:
+            index = index // self.ou_fanout - 1
+            depth += 1
+        return depth
+
+    def account_ou(self, index: int) -> int | None:
+        return index % self.organizational_units if self.organizational_units else None
+
+    def account_region(self, index: int) -> str:
+        return REGIONS[index % len(REGIONS)]
+
+    def provider_alias(self, ou_index: int | None) -> str | None:
+        return None if ou_index is None else self.ou_name(ou_index)
+
+    # Streams
+
+    def clumio_accounts(self) -> Iterator[models.ClumioAccount]:
+        """Clumio providers: the global one and one scoped to each OU."""
+        yield models.ClumioAccount()
+        for index in range(self.organizational_units):
+            yield models.ClumioAccount(alias=self.ou_name(index), ou_name=self.ou_name(index))
+
+    def aws_accounts(self) -> Iterator[models.AWSAccount]:
+        for index in range(self.accounts):
+            yield models.AWSAccount(
+                alias=f"account_{index}",
+                region=self.account_region(index),
+                assume_role=models.AssumeRole(role_arn=f"arn:aws:iam::{self.account_id(index)}:role/clumio-terraform"),
+            )
+
+    def resources(self) -> Iterator[models.ResourceSpec]:
+        """All resources of the estate, ordered so that referenced resources come first."""
+        yield from self.organizational_unit_specs()
+        yield from self.aws_connection_specs()
+        yield from self.policy_specs()
+        yield from self.protection_group_specs()
+        yield from self.policy_rule_specs()
+        yield from self.user_specs()
+        yield from self.report_configuration_specs()
+
+    def organizational_unit_specs(self) -> Iterator[models.ResourceSpec]:
+        for index in range(self.organizational_units):
+            parent = self.ou_parent(index)
+            yield models.ResourceSpec(kind="organizational_unit", arguments={
+                "ou_name": self.ou_name(index),
+                "display_name": f"Organizational Unit {index}",
+                "description": f"Synthetic OU at depth {self.ou_depth(index)}",
+                "parent_name": None if parent is None else self.ou_name(parent),
+                "clumio_provider_alias": self.provider_alias(parent),
+            })
+
+    def aws_connection_specs(self) -> Iterator[models.ResourceSpec]:
+        rng = self._random("aws_connections")
+        for index in range(self.accounts):
+            yield models.ResourceSpec(
+                kind="aws_connection",
+                aws_account_id=self.account_id(index),
+                aws_region=self.account_region(index),
+                arguments={
+                    "connection_name": f"account_{index}",
+                    "description": f"Synthetic account {self.account_id(index)}",
+                    "services": {service: rng.random() < 0.7 for service in ("ebs", "rds", "s3", "dynamodb")},
+                    "aws_provider_alias": f"account_{index}",
+                    "clumio_provider_alias": self.provider_alias(self.account_ou(index)),
+                },
+            )
+
+    @staticmethod
+    def _sla(rng: random.Random) -> dict:
+        rpo_unit, rpo_min, rpo_max = rng.choice(_RPO_UNITS)
+        retention_unit, retention_min, retention_max = rng.choice(_RETENTION_UNITS)
+        return {
+            "rpo_frequency": {"unit": rpo_unit, "value": rng.randint(rpo_min, rpo_max)},
+            "retention_duration": {"unit": retention_unit, "value": rng.randint(retention_min, retention_max)},
+        }
+
+    def policy_specs(self) -> Iterator[models.ResourceSpec]:
+        rng = self._random("policies")
+        for index in range(self.policies):
+            operations = []
+            for operation_type in rng.sample(OPERATION_TYPES, rng.randint(1, 4)):
+                operation = {"type": operation_type, "slas": [self._sla(rng) for _ in range(rng.randint(1, 3))]}
+                if rng.random() < 0.3:
+                    operation["backup_aws_region"] = rng.choice(REGIONS)
+                if rng.random() < 0.2:
+                    operation["backup_window_tz"] = {"start_time": f"{rng.randint(18, 23)}:00", "end_time": f"0{rng.randint(1, 6)}:00"}
+                    operation["timezone"] = "UTC"
+                operations.append(operation)
+            yield models.ResourceSpec(kind="policy", arguments={
+                "policy_name": f"policy_{index}",
+                "display_name": f"{rng.choice(TIERS).title()} Policy {index}",
+                "operations": operations,
+            })
+
+    def protection_group_specs(self) -> Iterator[models.ResourceSpec]:
+        rng = self._random("protection_groups")
+        for index in range(self.protection_groups):
+            account = rng.randrange(self.accounts) if self.accounts else None
+            bucket_rule = {"aws_tag": {"$eq": {"key": "environment", "value": rng.choice(ENVIRONMENTS)}}}
+            if account is not None:
+                bucket_rule["aws_account_native_id"] = {"$eq": self.account_id(account)}
+                bucket_rule["aws_region"] = {"$eq": self.account_region(account)}
+            yield models.ResourceSpec(kind="protection_group", arguments={
+                "group_name": f"protection_group_{index}",
+                "display_name": f"Protection Group {index}",
+                "policy_name": f"policy_{rng.randrange(self.policies)}",
+                "description": "Synthetic S3 protection group",
+                "bucket_rule": bucket_rule,
+                "clumio_provider_alias": self.provider_alias(None if account is None else self.account_ou(account)),
+            })
+
+    def policy_rule_specs(self) -> Iterator[models.ResourceSpec]:
+        rng = self._random("policy_rules")
+        # Policy rules may only be managed by the global provider or immediate child OU providers
+        rule_scopes = [None, *range(min(self.organizational_units, self.ou_fanout))]
+        previous = None
+        for index in range(self.rules):
+            if index % self.rule_chain_length == 0:
+                previous = None
+                scope = rng.choice(rule_scopes)
+            account = rng.randrange(self.accounts) if self.accounts else None
+            condition = {
+                "entity_type": {"$in": rng.sample(RULE_ENTITY_TYPES, rng.randint(1, len(RULE_ENTITY_TYPES)))},
+                "aws_tag": {"$eq": {"key": "tier", "value": rng.choice(TIERS)}},
+            }
+            if account is not None:
+                condition["aws_account_native_id"] = {"$eq": self.account_id(account)}
+                condition["aws_region"] = {"$eq": self.account_region(account)}
+            yield models.ResourceSpec(kind="policy_rule", arguments={
+                "rule_name": f"rule_{index}",
+                "display_name": f"Rule {index}",
+                "policy_name": f"policy_{rng.randrange(self.policies)}",
+                "condition_expression": condition,
+                "before_rule_name": previous,
+                "clumio_provider_alias": self.provider_alias(scope),
+            })
+            previous = f"rule_{index}"
+
+    def user_specs(self) -> Iterator[models.ResourceSpec]:
+        rng = self._random("users")
+        roles = ["Super Admin", "Organizational Unit Admin", "Helpdesk Admin"]
+        for index in range(self.users):
+            role = rng.choice(roles)
+            if role == "Super Admin" or not self.organizational_units:
+                ou_ids = ["00000000-0000-0000-0000-000000000000"]
+            else:
+                ou_ids = [
+                    f"${{clumio_organizational_unit.{self.ou_name(ou)}.id}}"
+                    for ou in sorted(rng.sample(range(self.organizational_units), min(3, self.organizational_units)))
+                ]
+            yield models.ResourceSpec(kind="user_assignment", arguments={
+                "user_name": f"user_{index}",
+                "email": f"user{index}@example.com",
+                "full_name": f"User {index}",
+                "access_control_configuration": [{"role_name": role, "organizational_unit_ids": ou_ids}],
+            })
+
+    def report_configuration_specs(self) -> Iterator[models.ResourceSpec]:
+        rng = self._random("report_configurations")
+        for index in range(self.report_configurations):
+            frequency = rng.choice(["daily", "weekly", "monthly"])
+            ous = [
+                f"${{clumio_organizational_unit.{self.ou_name(rng.randrange(self.organizational_units))}.id}}"
+            ] if self.organizational_units else []
+            yield models.ResourceSpec(kind="report_configuration", arguments={
+                "config_name": f"report_{index}",
+                "config_display_name": f"Compliance Report {index}",
+                "email_list": [f"compliance{index}@example.com"],
+                "controls": {
+                    "asset_backup": {
+                        "look_back_period": {"value": 7, "unit": "days"},
+                        "minimum_retention_duration": {"value": rng.randint(1, 30), "unit": "days"},
+                        "window_size": {"value": 1, "unit": "days"},
+                    },
+                    "asset_protection": {"should_ignore_deactivated_policy": rng.random() < 0.5},
+                    "policy": {
+                        "minimum_retention_duration": {"value": rng.randint(1, 30), "unit": "days"},
+                        "minimum_rpo_frequency": {"value": 1, "unit": "days"},
+                    },
+                },
+                "filters": {
+                    "asset": {"tag_op_mode": "equal", "tags": [{"key": "environment", "value": rng.choice(ENVIRONMENTS)}]},
+                    "common": {"asset_types": rng.sample(ASSET_TYPES, 2), "organizational_units": ous},
+                },
+                "schedule": {"frequency": frequency},
+            })
+
+    def assets(self) -> Iterator[models.Asset]:
+        """Asset inventory of every account, with heavy-tailed sizes and S3 object counts."""
+        rng = self._random("assets")
+        for account in range(self.accounts):
+            for index in range(self.assets_per_account):
+                asset_type = rng.choice(ASSET_TYPES)
+                is_bucket = asset_type == "aws_s3_bucket"
+                object_count = int(rng.paretovariate(1.2) * 1000) if is_bucket else 0
+                yield models.Asset(
+                    asset_type=asset_type,
+                    native_id=f"{asset_type}-{account}-{index}",
+                    aws_account_id=self.account_id(account),
+                    aws_region=self.account_region(account),
+                    tags={"environment": rng.choice(ENVIRONMENTS), "tier": rng.choice(TIERS)},
+                    size_bytes=int(rng.lognormvariate(20, 2)) if not is_bucket else object_count * rng.randint(1_000, 5_000_000),
+                    object_count=object_count,
+                )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Write a synthetic estate to stdout as JSON lines, one record per line."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--organizational-units", type=int, default=40)
+    parser.add_argument("--ou-fanout", type=int, default=3)
+    parser.add_argument("--policies", type=int, default=50)
+    parser.add_argument("--rules", type=int, default=100)
+    parser.add_argument("--rule-chain-length", type=int, default=5)
+    parser.add_argument("--protection-groups", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--report-configurations", type=int, default=20)
+    parser.add_argument("--assets-per-account", type=int, default=10)
+    args = vars(parser.parse_args(argv))
+    estate = SyntheticEstate(**args)
+    streams = [
+        ("clumio_account", estate.clumio_accounts()),
+        ("aws_account", estate.aws_accounts()),
+        ("resource", estate.resources()),
+        ("asset", estate.assets()),
+    ]
+    for record_type, records in streams:
+        for record in records:
+            sys.stdout.write(json.dumps({"type": record_type, **record.model_dump(exclude_none=True)}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
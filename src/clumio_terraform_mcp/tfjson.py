@@ -0,0 +1,469 @@
+# Terraform JSON syntax (.tf.json) built directly from the models, as an alternative to the HCL templates.
+
+import json
+import re
+import time
+from typing import Any
+
+from clumio_terraform_mcp import hcl, models
+
+# Meta-arguments that take bare references rather than expressions in JSON syntax
+_BARE_ATTRIBUTES = frozenset({"provider", "providers", "depends_on"})
+# A string that is one interpolated reference with an attribute path, such as
+# "${clumio_organizational_unit.prod.id}". A bare "${center}" is taken literally.
+_REFERENCE = r"\$\{[A-Za-z_][\w-]*(?:\.[\w-]+)+\}"
+_REFERENCE_RE = re.compile(_REFERENCE)
+# The same reference as a whole JSON string after escaping
+_ESCAPED_REFERENCE_RE = re.compile(rf'"\$({_REFERENCE})"')
+
+
+def dumps(document: dict[str, Any]) -> str:
+    """Encode a document with the C-accelerated encoder of the json module."""
+    return json.dumps(document, separators=(",", ":"))
+
+
+def merge(documents: list[dict[str, Any]]) -> dict[str, Any]:
+    """Combine documents into one, as Terraform does with the files of a module.
+
+    Raises:
+        ValueError: If two documents define the same block differently
+    """
+    merged: dict[str, Any] = {}
+
+    def merge_into(target: dict[str, Any], source: dict[str, Any], path: str) -> None:
+        for key, value in source.items():
+            if key not in target:
+                target[key] = value
+            elif isinstance(target[key], dict) and isinstance(value, dict):
+                merge_into(target[key], value, f"{path}.{key}")
+            elif isinstance(target[key], list) and isinstance(value, list) and path.count(".") == 1:
+                target[key] = target[key] + value  # provider configurations
+            elif target[key] != value:
+                raise ValueError(f"conflicting definitions of {path}.{key}".lstrip("."))
+
+    for document in documents:
+        merge_into(merged, document, "")
+    return merged
+
+
+def _escape(value: str) -> str:
+    """Escape template sequences, since JSON syntax interprets every string as a template."""
+    return value.replace("${", "$${").replace("%{", "%%{")
+
+
+def _literal(value: str) -> str:
+    """Escape a value that the templates render into a quoted string.
+
+    A value that is a single reference is kept, since Terraform resolves it in the templates as well.
+    """
+    return value if _REFERENCE_RE.fullmatch(value) else _escape(value)
+
+
+def _reference(expression: str) -> str:
+    return f"${{{expression}}}"
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _jsonencode(value: Any) -> str:
+    """Return the string Terraform's jsonencode produces, which needs no function call in JSON syntax.
+
+    Strings of the value that are a single reference stay interpolated, as in the jsonencode() of the templates.
+    """
+    return _ESCAPED_REFERENCE_RE.sub(r'"\1"', _escape(_encode(value)))
+
+
+def _with_provider(body: dict[str, Any], clumio_provider_alias: str | None) -> dict[str, Any]:
+    return {"provider": f"clumio.{clumio_provider_alias}", **body} if clumio_provider_alias else body
+
+
+def _time_unit(time_unit: models.TimeUnit) -> list[dict[str, Any]]:
+    return [{"unit": time_unit.unit, "value": time_unit.value}]
+
+
+def providers(clumio_accounts: list[models.ClumioAccount], aws_accounts: list[models.AWSAccount]) -> dict[str, Any]:
+    clumio_providers = []
+    variables: dict[str, Any] = {}
+    for account in clumio_accounts:
+        suffix = f"_{account.alias}" if account.alias else ""
+        provider: dict[str, Any] = {
+            "clumio_api_token": _reference(f"var.clumio_api_token{suffix}"),
+            "clumio_api_base_url": _reference(f"var.clumio_api_base_url{suffix}"),
+        }
+        if account.ou_name:
+            provider["clumio_organizational_unit_context"] = _reference(f"clumio_organizational_unit.{account.ou_name}.id")
+        if account.alias:
+            provider["alias"] = account.alias
+        clumio_providers.append(provider)
+        variables[f"clumio_api_token{suffix}"] = {"description": "Clumio API Token", "type": "string", "sensitive": True}
+        variables[f"clumio_api_base_url{suffix}"] = {"description": "Clumio API Base URL", "type": "string"}
+    variables["aws_region"] = {"description": "AWS Region", "type": "string", "default": "us-west-2"}
+
+    aws_providers = []
+    for account in aws_accounts:
+        provider = {"alias": account.alias} if account.alias else {}
+        provider["region"] = _literal(account.region) if account.region else _reference("var.aws_region")
+        if account.profile:
+            provider["profile"] = _literal(account.profile)
+        if account.assume_role:
+            assume_role = {
+                "role_arn": _literal(account.assume_role.role_arn),
+                "session_name": _literal(account.assume_role.session_name or "clumio-session"),
+            }
+            if account.assume_role.external_id:
+                assume_role["external_id"] = _literal(account.assume_role.external_id)
+            provider["assume_role"] = [assume_role]
+        aws_providers.append(provider)
+    if not aws_providers:
+        aws_providers.append({"region": _reference("var.aws_region")})
+
+    return {
+        "terraform": {"required_providers": {"clumio": {"source": "clumio-code/clumio"}, "aws": {}}},
+        "provider": {"clumio": clumio_providers, "aws": aws_providers} if clumio_providers else {"aws": aws_providers},
+        "variable": variables,
+    }
+
+
+def aws_connection(
+    connection_name: str,
+    description: str,
+    services: dict[str, bool],
+    clumio_provider_alias: str | None = None,
+    aws_provider_alias: str | None = None,
+    wait_for_data_plane_resources: bool = False,
+    wait_for_ingestion: bool = False,
+) -> dict[str, Any]:
+    data_name = aws_provider_alias or "current"
+    data_body = {"provider": f"aws.{aws_provider_alias}"} if aws_provider_alias else {}
+    connection = f"clumio_aws_connection.{connection_name}"
+    module: dict[str, Any] = {
+        "providers": {
+            "aws": f"aws.{aws_provider_alias}" if aws_provider_alias else "aws",
+            "clumio": f"clumio.{clumio_provider_alias}" if clumio_provider_alias else "clumio",
+        },
+        "source": "clumio-code/aws-template/clumio",
+        "clumio_token": _reference(f"{connection}.token"),
+        "role_external_id": _reference(f"{connection}.role_external_id"),
+        "aws_region": _reference(f"{connection}.aws_region"),
+        "aws_account_id": _reference(f"{connection}.account_native_id"),
+        "clumio_aws_account_id": _reference(f"{connection}.clumio_aws_account_id"),
+        "is_ebs_enabled": bool(services.get("ebs", False)),
+        "is_rds_enabled": bool(services.get("rds", False)),
+        "is_s3_enabled": bool(services.get("s3", False)),
+        "is_dynamodb_enabled": bool(services.get("dynamodb", False)),
+    }
+    if wait_for_data_plane_resources:
+        module["wait_for_data_plane_resources"] = True
+    if wait_for_ingestion:
+        module["wait_for_ingestion"] = True
+    return {
+        "data": {"aws_caller_identity": {data_name: data_body}, "aws_region": {data_name: dict(data_body)}},
+        "resource": {"clumio_aws_connection": {connection_name: _with_provider({
+            "account_native_id": _reference(f"data.aws_caller_identity.{data_name}.account_id"),
+            "aws_region": _reference(f"data.aws_region.{data_name}.region"),
+            "description": _literal(description),
+        }, clumio_provider_alias)}},
+        "module": {f"clumio_aws_resources_{aws_provider_alias}" if aws_provider_alias else "clumio_aws_resources": module},
+    }
+
+
+def _operation(operation: models.Operation) -> dict[str, Any]:
+    body: dict[str, Any] = {
+        "action_setting": "window" if operation.backup_window_tz else "immediate",
+        "type": operation.type,
+        "slas": [
+            {"retention_duration": _time_unit(sla.retention_duration), "rpo_frequency": _time_unit(sla.rpo_frequency)}
+            for sla in operation.slas
+        ],
+    }
+    advanced_settings = operation.generate_advanced_setting()
+    if advanced_settings:
+        body["advanced_settings"] = [{name: [values] for name, values in advanced_settings.items()}]
+    if operation.backup_aws_region:
+        body["backup_aws_region"] = _literal(operation.backup_aws_region)
+    if operation.backup_window_tz:
+        window = {"end_time": operation.backup_window_tz.end_time} if operation.backup_window_tz.end_time else {}
+        window["start_time"] = operation.backup_window_tz.start_time
+        body["backup_window_tz"] = [window]
+    if operation.timezone:
+        body["timezone"] = _literal(operation.timezone)
+    return body
+
+
+def policy(
+    policy_name: str,
+    display_name: str,
+    operations: list[models.Operation],
+    clumio_provider_alias: str | None = None,
+) -> dict[str, Any]:
+    return {"resource": {"clumio_policy": {policy_name: _with_provider({
+        "name": _literal(display_name),
+        "activation_status": "activated",
+        "operations": [_operation(operation) for operation in operations],
+    }, clumio_provider_alias)}}}
+
+
+def protection_group(
+    group_name: str,
+    display_name: str,
+    policy_name: str,
+    description: str,
+    bucket_rule: dict[str, Any],
+    storage_classes: list[str],
+    clumio_provider_alias: str | None = None,
+) -> dict[str, Any]:
+    return {"resource": {
+        "clumio_protection_group": {group_name: _with_provider({
+            "name": _literal(display_name),
+            "description": _literal(description),
+            "bucket_rule": _jsonencode(bucket_rule),
+            "object_filter": [{"storage_classes": [_literal(storage_class) for storage_class in storage_classes]}],
+        }, clumio_provider_alias)},
+        "clumio_policy_assignment": {f"{group_name}_assignment": _with_provider({
+            "entity_id": _reference(f"clumio_protection_group.{group_name}.id"),
+            "entity_type": "protection_group",
+            "policy_id": _reference(f"clumio_policy.{policy_name}.id"),
+        }, clumio_provider_alias)},
+    }}
+
+
+def organizational_unit(
+    ou_name: str,
+    display_name: str,
+    description: str,
+    parent_name: str | None = None,
+    clumio_provider_alias: str | None = None,
+) -> dict[str, Any]:
+    body = {"name": _literal(display_name), "description": _literal(description)}
+    if parent_name:
+        body["parent_id"] = _reference(f"clumio_organizational_unit.{parent_name}.id")
+    return {"resource": {"clumio_organizational_unit": {ou_name: _with_provider(body, clumio_provider_alias)}}}
+
+
+def policy_rule(
+    rule_name: str,
+    display_name: str,
+    policy_name: str,
+    condition_expression: dict[str, Any],
+    before_rule_name: str | None = None,
+    clumio_provider_alias: str | None = None,
+) -> dict[str, Any]:
+    return {"resource": {"clumio_policy_rule": {rule_name: _with_provider({
+        "policy_id": _reference(f"clumio_policy.{policy_name}.id"),
+        "name": _literal(display_name),
+        "before_rule_id": _reference(f"clumio_policy_rule.{before_rule_name}.id") if before_rule_name else "",
+        "condition": _jsonencode(condition_expression),
+    }, clumio_provider_alias)}}}
+
+
+def _role_name(access_control: models.AccessControlConfiguration) -> str:
+    return f"role_{access_control.role_name.replace(' ', '_').lower()}"
+
+
+def user_assignment(
+    user_name: str,
+    email: str,
+    full_name: str,
+    access_control_configuration: list[models.AccessControlConfiguration],
+    clumio_provider_alias: str | None = None,
+) -> dict[str, Any]:
+    return {
+        "data": {"clumio_role": {
+            _role_name(access_control): _with_provider({"name": access_control.role_name}, clumio_provider_alias)
+            for access_control in access_control_configuration
+        }},
+        "resource": {"clumio_user": {user_name: _with_provider({
+            "email": _literal(email),
+            "full_name": _literal(full_name),
+            "access_control_configuration": [
+                {
+                    "role_id": _reference(f"data.clumio_role.{_role_name(access_control)}.id"),
+                    "organizational_unit_ids": [_literal(ou_id) for ou_id in access_control.organizational_unit_ids],
+                }
+                for access_control in access_control_configuration
+            ],
+        }, clumio_provider_alias)}},
+    }
+
+
+def _filters(filters: models.ComplianceFilter) -> dict[str, Any]:
+    body: dict[str, Any] = {}
+    if filters.asset:
+        asset: dict[str, Any] = {}
+        if filters.asset.groups:
+            asset["groups"] = [
+                {
+                    **({"id": _literal(group.group_id)} if group.group_id else {}),
+                    **({"region": _literal(group.region)} if group.region else {}),
+                    **({"type": group.asset_type} if group.asset_type else {}),
+                }
+                for group in filters.asset.groups
+            ]
+        if filters.asset.tag_op_mode:
+            asset["tag_op_mode"] = filters.asset.tag_op_mode
+        if filters.asset.tags:
+            asset["tags"] = [{"key": _literal(tag["key"]), "value": _literal(tag["value"])} for tag in filters.asset.tags]
+        body["asset"] = [asset]
+    if filters.common:
+        common: dict[str, Any] = {}
+        if filters.common.asset_types:
+            common["asset_types"] = list(filters.common.asset_types)
+        if filters.common.data_sources:
+            common["data_sources"] = list(filters.common.data_sources)
+        if filters.common.organizational_units:
+            common["organizational_units"] = [_literal(ou) for ou in filters.common.organizational_units]
+        body["common"] = [common]
+    return body
+
+
+def report_configuration(
+    config_name: str,
+    config_display_name: str,
+    email_list: list[str],
+    controls: models.ComplianceControl,
+    filters: models.ComplianceFilter,
+    schedule: models.Schedule,
+    clumio_provider_alias: str | None = None,
+) -> dict[str, Any]:
+    asset_backup = controls.asset_backup
+    schedule_body: dict[str, Any] = {}
+    if schedule.frequency == 'monthly':
+        schedule_body["day_of_month"] = schedule.day_of_month
+    elif schedule.frequency == 'weekly':
+        schedule_body["day_of_week"] = schedule.day_of_week
+    schedule_body.update(
+        frequency=schedule.frequency, start_time=_literal(schedule.start_time), timezone=_literal(schedule.timezone),
+    )
+    return {"resource": {"clumio_report_configuration": {config_name: _with_provider({
+        "name": _literal(config_display_name),
+        "notification": [{"email_list": [_literal(email) for email in email_list]}],
+        "parameter": [{
+            "controls": [{
+                "asset_backup": [{
+                    "look_back_period": _time_unit(asset_backup.look_back_period),
+                    "minimum_retention_duration": _time_unit(asset_backup.minimum_retention_duration),
+                    "window_size": _time_unit(asset_backup.window_size),
+                }],
+                "asset_protection": [{
+                    "should_ignore_deactivated_policy": controls.asset_protection.should_ignore_deactivated_policy,
+                }],
+                "policy": [{
+                    "minimum_retention_duration": _time_unit(controls.policy.minimum_retention_duration),
+                    "minimum_rpo_frequency": _time_unit(controls.policy.minimum_rpo_frequency),
+                }],
+            }],
+            "filters": [_filters(filters)],
+        }],
+        "schedule": [schedule_body],
+    }, clumio_provider_alias)}}}
+
+
+# Builders by resource kind, matching the generate_* tools
+BUILDERS = {
+    'aws_connection': aws_connection,
+    'policy': policy,
+    'protection_group': protection_group,
+    'organizational_unit': organizational_unit,
+    'policy_rule': policy_rule,
+    'user_assignment': user_assignment,
+    'report_configuration': report_configuration,
+}
+
+
+def _value(value: Any, bare: bool = False) -> Any:
+    if isinstance(value, hcl.Expression):
+        if value.function == "jsonencode" and len(value.args) == 1 and hcl.is_known(value.args[0]):
+            return _escape(_encode(value.args[0]))
+        if value.source.startswith('"'):
+            return json.loads(value.source)
+        return value.source if bare else _reference(value.source)
+    if isinstance(value, dict):
+        return {key: _value(item, bare) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_value(item, bare) for item in value]
+    return _escape(value) if isinstance(value, str) else value
+
+
+def _body(block: hcl.Block) -> dict[str, Any]:
+    body = {}
+    for name, attribute in block.attributes.items():
+        bare = name in _BARE_ATTRIBUTES or (block.type == "variable" and name == "type")
+        body[name] = _value(attribute.value, bare)
+    for nested in block.blocks:
+        if block.type == "terraform":
+            body[nested.type] = _body(nested)
+        else:
+            body.setdefault(nested.type, []).append(_body(nested))
+    return body
+
+
+def from_hcl(text: str) -> dict[str, Any]:
+    """Convert HCL configuration into the equivalent JSON syntax document.
+
+    Supports the constructs used by the templates: literals, references, quoted templates and
+    jsonencode() of literal values.
+    """
+    document: dict[str, Any] = {}
+    for block in hcl.parse(text).blocks:
+        body = _body(block)
+        if block.type in ("resource", "data"):
+            document.setdefault(block.type, {}).setdefault(block.labels[0], {})[block.labels[1]] = body
+        elif block.type == "provider":
+            document.setdefault("provider", {}).setdefault(block.labels[0], []).append(body)
+        elif block.type == "terraform":
+            document.setdefault("terraform", {}).update(body)
+        else:
+            document.setdefault(block.type, {})[block.labels[0]] = body
+    return document
+
+
+def benchmark(specs: list[models.ResourceSpec], repeat: int = 3) -> dict[str, float]:
+    """Time rendering and parsing of the specs in both output formats.
+
+    Parsing uses the json module for JSON syntax and the bundled HCL parser for native syntax,
+    which is the decoding Terraform does before it can validate a configuration.
+
+    Returns:
+        Best of ``repeat`` runs in seconds for each step.
+    """
+    from clumio_terraform_mcp import app
+
+    def render(output_format: str) -> list[str]:
+        return [app.render_resource(spec, output_format=output_format) for spec in specs]
+
+    def best(function) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    hcl_texts = render('hcl')
+    json_texts = render('json')
+    return {
+        "hcl_render": best(lambda: render('hcl')),
+        "json_render": best(lambda: render('json')),
+        "hcl_parse": best(lambda: [hcl.parse(text) for text in hcl_texts]),
+        "json_parse": best(lambda: [json.loads(text) for text in json_texts]),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+    from clumio_terraform_mcp import synthetic
+
+    parser = argparse.ArgumentParser(description="Benchmark HCL and JSON output of a synthetic estate.")
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    estate = synthetic.SyntheticEstate(seed=args.seed, accounts=args.accounts)
+    specs = list(estate.resources())
+    for step, seconds in benchmark(specs).items():
+        print(f"{step:12} {seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
 # Template-based config generation using Jinja2.
 
 import jinja2
+from functools import lru_cache
 from pathlib import Path
 
+@lru_cache(maxsize=None)
+def _environment() -> jinja2.Environment:
+    """Return the shared template environment so templates are compiled only once."""
+    template_dir = Path(__file__).parent / "templates"
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(template_dir)),
+        trim_blocks=False,
+        lstrip_blocks=False,
+    )
+
 def render_tf_template(template_name: str, **context) -> str:
     """Convenience function to render a Terraform template.
 
@@ -13,12 +24,5 @@ def render_tf_template(template_name: str, **context) -> str:
     Returns:
         Rendered Terraform configuration as string
     """
-    template_dir = Path(__file__).parent / "templates"
-
-    environment = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(str(template_dir)),
-        trim_blocks=False,
-        lstrip_blocks=False,
-    )
-    template = environment.get_template(template_name)
+    template = _environment().get_template(template_name)
     return template.render(**context)
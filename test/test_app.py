@@ -1,6 +1,8 @@
 import pytest
 from fastmcp import Client
-from clumio_terraform_mcp import app
+from fastmcp.exceptions import ToolError
+from clumio_terraform_mcp import app, compact
+import json
 import uuid
 
 @pytest.fixture(scope="module")
@@ -136,3 +138,230 @@ async def test_generate_user_assignment_tool(mcp_server):
         })
         assert isinstance(result.data, str)
         assert "resource" in result.data
+
+@pytest.mark.asyncio
+async def test_validate_configuration_tool(mcp_server):
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("validate_configuration", {
+            "configuration": 'resource "clumio_organizational_unit" "ou" {\n  description = "desc"\n}\n'
+        })
+        assert result.data == ["line 1: clumio_organizational_unit.ou: missing required argument 'name'"]
+
+@pytest.mark.asyncio
+async def test_plan_state_partitions_tool(mcp_server):
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("plan_state_partitions", {
+            "resources": [
+                {"kind": "organizational_unit", "arguments": {"ou_name": "ou", "display_name": "OU", "description": "desc"}},
+                {"kind": "policy_rule", "arguments": {
+                    "rule_name": "rule", "display_name": "Rule", "policy_name": "policy", "clumio_provider_alias": "ou",
+                    "condition_expression": {"aws_tag": {"$eq": {"key": "k", "value": "v"}}},
+                }},
+            ],
+            "clumio_accounts": [{"alias": "ou", "ou_name": "ou"}],
+        })
+        plan = result.structured_content
+        assert [p["name"] for p in plan["partitions"]] == ["organization", "ou"]
+        assert plan["unresolved_references"] == ["clumio_policy.policy"]
+
+@pytest.mark.asyncio
+async def test_get_example_scenarios_tool(mcp_server):
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("get_example_scenarios", {"query": "compliance report"})
+        scenarios = result.structured_content["result"]
+        assert scenarios[0]["id"] == "compliance_reporting"
+        assert "clumio_report_configuration" in scenarios[0]["configuration"]
+
+@pytest.mark.asyncio
+async def test_analyze_state_drift_tool(mcp_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("CLUMIO_MCP_WORKSPACE", str(tmp_path))
+    state_path = tmp_path / "terraform.tfstate"
+    state_path.write_text(json.dumps({"version": 4, "resources": [
+        {"mode": "managed", "type": "clumio_organizational_unit", "name": "ou",
+         "instances": [{"attributes": {"id": "1", "name": "Renamed", "description": "desc"}}]},
+        {"mode": "managed", "type": "clumio_user", "name": "user", "instances": [{"attributes": {"id": "2"}}]},
+    ]}))
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("analyze_state_drift", {
+            "state_path": str(state_path),
+            "resources": [{"kind": "organizational_unit", "arguments": {"ou_name": "ou", "display_name": "OU", "description": "desc"}}],
+        })
+        report = result.structured_content
+        assert report["drifted"] == [{"address": "clumio_organizational_unit.ou", "attributes": ["name"]}]
+        assert report["orphaned"] == ["clumio_user.user"]
+        assert report["missing"] == []
+
+@pytest.mark.asyncio
+async def test_analyze_state_drift_reads_only_the_workspace(mcp_server, tmp_path, monkeypatch):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    monkeypatch.setenv("CLUMIO_MCP_WORKSPACE", str(workspace))
+    (tmp_path / "terraform.tfstate").write_text(json.dumps({"version": 4, "resources": []}))
+    (workspace / "terraform.tfstate").write_text(json.dumps({"version": 4, "resources": []}))
+    async with Client(mcp_server) as client:
+        for path in [str(tmp_path / "terraform.tfstate"), "../terraform.tfstate", "/etc/passwd"]:
+            with pytest.raises(ToolError, match="outside the workspace"):
+                await client.call_tool("analyze_state_drift", {"state_path": path})
+        result = await client.call_tool("analyze_state_drift", {"state_path": "terraform.tfstate"})
+        assert result.structured_content["orphaned"] == []
+
+@pytest.mark.asyncio
+async def test_deduplicate_policies_tool(mcp_server):
+    def policy(name, retention):
+        return {"kind": "policy", "arguments": {"policy_name": name, "display_name": name, "operations": [{
+            "type": "aws_ebs_volume_backup",
+            "slas": [{"retention_duration": retention, "rpo_frequency": {"unit": "days", "value": 1}}],
+        }]}}
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("deduplicate_policies", {"resources": [
+            policy("weekly", {"unit": "weeks", "value": 1}),
+            policy("seven_days", {"unit": "days", "value": 7}),
+        ]})
+        deduplication = result.structured_content
+        assert deduplication["merges"][0]["duplicates"] == ["seven_days"]
+        assert deduplication["policies_after"] == 1
+
+@pytest.mark.asyncio
+async def test_generate_organizational_unit_json_output(mcp_server):
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("generate_organizational_unit", {
+            "ou_name": "ou", "display_name": "OU", "description": "desc", "parent_name": "root", "output_format": "json",
+        })
+        assert json.loads(result.data) == {"resource": {"clumio_organizational_unit": {"ou": {
+            "name": "OU", "description": "desc", "parent_id": "${clumio_organizational_unit.root.id}",
+        }}}}
+
+@pytest.mark.asyncio
+async def test_stagger_report_schedules_tool(mcp_server):
+    time_unit = {"unit": "days", "value": 7}
+    report = {
+        "config_display_name": "Report", "email_list": ["a@example.com"], "filters": {},
+        "controls": {
+            "asset_backup": {"look_back_period": time_unit, "minimum_retention_duration": time_unit, "window_size": time_unit},
+            "asset_protection": {},
+            "policy": {"minimum_retention_duration": time_unit, "minimum_rpo_frequency": time_unit},
+        },
+    }
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("stagger_report_schedules", {
+            "report_configurations": [{**report, "config_name": f"report_{i}"} for i in range(4)]
+                + [{**report, "config_name": "pinned", "schedule": {"start_time": "09:00"}}],
+            "allowed_hours": [22, 23],
+            "slot_minutes": 30,
+        })
+        staggered = result.structured_content
+        assert [r["schedule"]["start_time"] for r in staggered["report_configurations"]] == ["22:00", "22:30", "23:00", "23:30", "09:00"]
+        assert staggered["peak_runs"] == 1
+        assert staggered["configuration"].count('resource "clumio_report_configuration"') == 5
+
+@pytest.mark.asyncio
+async def test_partition_protection_groups_tool(mcp_server):
+    def bucket(name, objects, env):
+        return {"asset_type": "aws_s3_bucket", "native_id": name, "aws_account_id": "111111111111",
+                "aws_region": "us-west-2", "tags": {"env": env}, "object_count": objects}
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("partition_protection_groups", {
+            "buckets": [bucket("a", 10, "prod"), bucket("b", 6, "dev"), bucket("c", 4, "test")],
+            "group_count": 2,
+            "policy_name": "s3_policy",
+            "include_bucket_names": True,
+        })
+        partition = result.structured_content
+        assert [group["buckets"] for group in partition["groups"]] == [["a"], ["b", "c"]]
+        assert partition["imbalance"] == 1.0
+        assert partition["uncovered"] == partition["overlapping"] == []
+        assert partition["configuration"].count('resource "clumio_protection_group"') == 2
+
+@pytest.mark.asyncio
+async def test_generate_organizational_unit_tree_tool(mcp_server):
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("generate_organizational_unit_tree", {"roots": [{
+            "ou_name": "eng", "display_name": "Engineering", "description": "desc", "children": [
+                {"ou_name": "web", "display_name": "Web", "description": "desc", "children": [
+                    {"ou_name": "frontend", "display_name": "Frontend", "description": "desc"},
+                ]},
+            ],
+        }]})
+        tree = result.structured_content
+        assert tree["organizational_units"] == ["eng", "web", "frontend"]
+        assert tree["policy_rule_provider_aliases"] == ["eng"]
+        assert "provider    = clumio.web" in tree["configuration"]
+
+@pytest.mark.asyncio
+async def test_generate_policy_rule_compact_output(mcp_server):
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("generate_policy_rule", {
+            "rule_name": "rule", "display_name": "Rule", "policy_name": "gold",
+            "condition_expression": {"entity_type": {"$eq": "aws_ebs_volume"}}, "output_format": "compact",
+        })
+        compact_configuration = result.structured_content["result"]
+        configuration = compact_configuration["configuration"]
+        assert 'condition=jsonencode({"entity_type":{"$eq":"aws_ebs_volume"}})' in configuration
+        assert "# ~" not in configuration
+        estimate = compact_configuration["token_estimate"]
+        assert estimate["tokens"] == compact.estimate_tokens(configuration)
+        assert estimate["tokens"] < estimate["hcl_tokens"] and estimate["saved_percent"] > 0
+
+@pytest.mark.asyncio
+async def test_estimate_output_tokens_tool(mcp_server):
+    configuration = app.generate_policy_rule(
+        rule_name="rule", display_name="Rule", policy_name="gold",
+        condition_expression={"entity_type": {"$eq": "aws_ebs_volume"}},
+    )
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("estimate_output_tokens", {"configuration": configuration, "output_format": "summary"})
+        assert result.structured_content["hcl_tokens"] == compact.estimate_tokens(configuration)
+        assert result.structured_content["tokens"] < result.structured_content["hcl_tokens"]
+
+@pytest.mark.asyncio
+async def test_patch_configuration_file_tool(mcp_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("CLUMIO_MCP_WORKSPACE", str(tmp_path))
+    path = tmp_path / "main.tf"
+    path.write_text('resource "clumio_organizational_unit" "ou" {\n  name = "Old"\n}\n\nresource "clumio_policy" "p" {\n  name = "P"\n}\n')
+    async with Client(mcp_server) as client:
+        result = await client.call_tool("patch_configuration_file", {
+            "path": str(path),
+            "resource": {"kind": "organizational_unit", "arguments": {"ou_name": "ou", "display_name": "New", "description": "desc"}},
+        })
+        assert result.structured_content["replaced"] == ["clumio_organizational_unit.ou"]
+        text = path.read_text()
+        assert 'name        = "New"' in text
+        assert text.endswith('resource "clumio_policy" "p" {\n  name = "P"\n}\n')
+
+@pytest.mark.asyncio
+async def test_patch_configuration_file_stays_in_workspace(mcp_server, tmp_path, monkeypatch):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    monkeypatch.setenv("CLUMIO_MCP_WORKSPACE", str(workspace))
+    (tmp_path / "outside.tf").write_text("")
+    (workspace / "notes.txt").write_text("")
+    (workspace / "main.tf").write_text("")
+    (workspace / "link.tf").symlink_to(tmp_path / "outside.tf")
+    resource = {"kind": "organizational_unit", "arguments": {"ou_name": "ou", "display_name": "OU", "description": "desc"}}
+    async with Client(mcp_server) as client:
+        for path, message in [
+            (str(tmp_path / "outside.tf"), "outside the workspace"),
+            ("../outside.tf", "outside the workspace"),
+            ("link.tf", "outside the workspace"),
+            ("notes.txt", "not a .tf file"),
+        ]:
+            with pytest.raises(ToolError, match=message):
+                await client.call_tool("patch_configuration_file", {"path": path, "resource": resource})
+        result = await client.call_tool("patch_configuration_file", {"path": "main.tf", "resource": resource})
+        assert result.structured_content["inserted"] == ["clumio_organizational_unit.ou"]
+    assert (tmp_path / "outside.tf").read_text() == ""
+
+@pytest.mark.asyncio
+async def test_get_scheduler_metrics_tool(mcp_server):
+    async with Client(mcp_server) as client:
+        await client.call_tool("generate_organizational_unit", {"ou_name": "ou", "display_name": "OU", "description": "desc"})
+        result = await client.call_tool("get_scheduler_metrics", {})
+        metrics = result.structured_content
+        assert metrics["running"] == 0 and metrics["queued"] == 0
+        assert sum(client["completed"] for client in metrics["clients"]) >= 1
+
+@pytest.mark.asyncio
+async def test_invalid_arguments_are_rejected(mcp_server):
+    async with Client(mcp_server) as client:
+        with pytest.raises(ToolError, match="validation error"):
+            await client.call_tool("generate_policy", {"policy_name": 3})
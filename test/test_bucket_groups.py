@@ -0,0 +1,87 @@
+import random
+
+import pytest
+from clumio_terraform_mcp import bucket_groups, models
+
+def bucket(name, objects, team=None, account="111111111111", region="us-west-2"):
+    return models.Asset(
+        asset_type="aws_s3_bucket", native_id=name, aws_account_id=account, aws_region=region,
+        tags={"team": team} if team else {}, object_count=objects,
+    )
+
+def inventory(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        bucket(
+            f"bucket-{i}",
+            int(rng.paretovariate(1.2) * 1000),
+            team=rng.choice([None, *(f"team{t}" for t in range(40))]),
+            account=f"{rng.randrange(20):012d}",
+            region=rng.choice(["us-west-2", "us-east-1", "eu-west-1"]),
+        )
+        for i in range(count)
+    ]
+
+def weights(groups):
+    return [sum(b.object_count for b in members) for _, members in groups]
+
+def test_groups_by_tag_values():
+    buckets = [bucket("a", 50, "x"), bucket("b", 30, "y"), bucket("c", 20, "z"), bucket("d", 10)]
+    groups = bucket_groups.BucketPartitioner(2).partition(buckets)
+    assert weights(groups) == [60, 50]
+    rules = [rule for rule, _ in groups]
+    other_teams = [{"key": "team", "value": "y"}, {"key": "team", "value": "z"}]
+    # Untagged buckets join the group of x, selected as those not tagged with another team
+    assert rules == [{"aws_tag": {"$not_in": other_teams}}, {"aws_tag": {"$in": other_teams}}]
+    assert bucket_groups.verify_coverage(rules, buckets) == ([], [])
+
+def test_heavy_tag_value_is_split_by_account():
+    buckets = [
+        bucket("a", 100, "x", account="111111111111"),
+        bucket("b", 100, "x", account="222222222222"),
+        bucket("c", 90, "y"),
+        bucket("d", 10, "z"),
+    ]
+    groups = bucket_groups.BucketPartitioner(3).partition(buckets)
+    rules = [rule for rule, _ in groups]
+    assert {"aws_tag": {"$eq": {"key": "team", "value": "x"}}, "aws_account_native_id": {"$eq": "111111111111"}} in rules
+    assert sorted(weights(groups)) == [100, 100, 100]
+    assert bucket_groups.verify_coverage(rules, buckets) == ([], [])
+
+def test_single_group_covers_untagged_buckets():
+    buckets = [bucket("a", 1, "x"), bucket("b", 1, account="222222222222")]
+    groups = bucket_groups.BucketPartitioner(1).partition(buckets)
+    assert groups[0][0] == {"aws_account_native_id": {"$in": ["111111111111", "222222222222"]}}
+
+def test_large_inventory_is_balanced_and_covered_exactly_once():
+    buckets = inventory(50000)
+    partitioner = bucket_groups.BucketPartitioner(10)
+    lookups = 0
+    value = partitioner._value
+
+    def counting_value(bucket, dimension):
+        nonlocal lookups
+        lookups += 1
+        return value(bucket, dimension)
+
+    partitioner._value = counting_value
+    groups = partitioner.partition(buckets)
+    uncovered, overlapping = bucket_groups.verify_coverage([rule for rule, _ in groups], buckets)
+    assert (uncovered, overlapping) == ([], [])
+    assert sum(len(members) for _, members in groups) == len(buckets)
+    assert partitioner.tag_key == "team"
+    group_weights = weights(groups)
+    assert max(group_weights) / (sum(group_weights) / len(group_weights)) < 1.2
+    # Every bucket is looked at no more than once per dimension, whatever the number of groups
+    assert lookups <= len(buckets) * len(partitioner.split_by)
+
+def test_verify_coverage_reports_gaps_and_overlaps():
+    buckets = [bucket("a", 1, "x"), bucket("b", 1, "y"), bucket("c", 1)]
+    rules = [{"aws_tag": {"$in": [{"key": "team", "value": "x"}, {"key": "team", "value": "y"}]}}, {"aws_tag": {"$eq": {"key": "team", "value": "y"}}}]
+    assert bucket_groups.verify_coverage(rules, buckets) == (["c"], ["b"])
+
+def test_invalid_options_raise():
+    with pytest.raises(ValueError):
+        bucket_groups.BucketPartitioner(0)
+    with pytest.raises(ValueError):
+        bucket_groups.BucketPartitioner(2, split_by=[])
@@ -0,0 +1,85 @@
+import pytest
+from clumio_terraform_mcp import app, compact, hcl, models, schema, tfjson
+
+from test_tfjson import SPECS
+
+def inline_locals(text):
+    """Replace references to local values with their definitions and drop the locals block."""
+    document = hcl.parse(text)
+    for block in document.blocks:
+        if block.type == "locals":
+            definitions = {name: text[attribute.start:attribute.end].split("=", 1)[1] for name, attribute in block.attributes.items()}
+            text = text[:block.start] + text[block.end:]
+            for name, source in definitions.items():
+                text = text.replace(f"=local.{name}\n", f"={source}\n")
+    return text
+
+def protection_groups(count, prefix="pg"):
+    return "\n\n".join(
+        app.generate_protection_group(
+            group_name=f"{prefix}{index}", display_name=f"PG {index}", policy_name="gold", description="Buckets",
+            bucket_rule={"aws_tag": {"$eq": {"key": "team", "value": f"team{index}"}}}, clumio_provider_alias="eng",
+        )
+        for index in range(count)
+    )
+
+@pytest.mark.parametrize("name", SPECS)
+def test_compact_output_is_equivalent_to_hcl(name):
+    spec = models.ResourceSpec(kind=name.removesuffix("_defaults"), arguments=SPECS[name])
+    configuration = app.render_resource(spec)
+    minified = compact.minify(configuration)
+    assert len(minified) < len(configuration)
+    assert tfjson.from_hcl(inline_locals(minified)) == tfjson.from_hcl(configuration)
+    assert schema.validate_configuration(minified) == []
+
+def test_repeated_values_are_hoisted_into_locals():
+    configuration = protection_groups(3)
+    minified = compact.minify(configuration)
+    assert minified.startswith('locals{\npg0_storage_classes=["S3 Standard","S3 Standard-IA",')
+    assert minified.count("storage_classes=local.pg0_storage_classes\n") == 3
+    # The provider meta-argument must stay a static reference
+    assert minified.count("provider=clumio.eng\n") == 6
+    assert tfjson.from_hcl(inline_locals(minified)) == tfjson.from_hcl(configuration)
+    # Outputs of separate calls for different resources can be combined in one module
+    combined = minified + "\n" + compact.minify(protection_groups(2, prefix="archive"))
+    local_names = [name for block in hcl.parse(combined).blocks if block.type == "locals" for name in block.attributes]
+    assert local_names == ["pg0_storage_classes", "archive0_storage_classes"]
+    # A single use is shorter without a local value
+    assert "locals" not in compact.minify(protection_groups(1))
+
+def test_identical_blocks_are_kept_once():
+    user = app.generate_user_assignment(
+        user_name="alice", email="alice@example.com", full_name="Alice",
+        access_control_configuration=[{"role_name": "Super Admin", "organizational_unit_ids": ["a"]}, {"role_name": "Super Admin", "organizational_unit_ids": ["b"]}],
+    )
+    assert user.count('data "clumio_role" "role_super_admin"') == 2
+    minified = compact.minify(user)
+    assert minified.count('data "clumio_role" "role_super_admin"') == 1
+    assert tfjson.from_hcl(minified) == tfjson.from_hcl(user)
+
+def test_expression_whitespace_is_preserved_where_it_matters():
+    configuration = 'resource "x" "y" {\n  a = b - c  # comment\n  m = {\n    k = "v"\n    n = [1,\n      2]\n  }\n  s = "spaced  string"\n}\n'
+    assert compact.minify(configuration) == 'resource "x" "y"{\na=b -c\nm={k="v",n=[1,2]}\ns="spaced  string"\n}'
+
+def test_summary_lists_blocks_with_shared_provider_once():
+    summary = compact.summarize(protection_groups(2))
+    assert summary.splitlines() == [
+        "# provider=clumio.eng",
+        'clumio_protection_group.pg0 name="PG 0" description="Buckets" bucket_rule=jsonencode(…) object_filter[1]',
+        'clumio_policy_assignment.pg0_assignment entity_id=clumio_protection_group.pg0.id entity_type="protection_group" policy_id=clumio_policy.gold.id',
+        'clumio_protection_group.pg1 name="PG 1" description="Buckets" bucket_rule=jsonencode(…) object_filter[1]',
+        'clumio_policy_assignment.pg1_assignment entity_id=clumio_protection_group.pg1.id entity_type="protection_group" policy_id=clumio_policy.gold.id',
+    ]
+
+def test_render_reports_token_savings():
+    configuration = protection_groups(10)
+    full = compact.estimate_tokens(configuration)
+    for output_format in ("compact", "summary"):
+        rendered, estimate = compact.render_estimated(configuration, output_format)
+        assert rendered == compact.render(configuration, output_format)
+        assert "# ~" not in rendered
+        tokens = compact.estimate_tokens(rendered)
+        assert estimate == models.TokenEstimate(tokens=tokens, hcl_tokens=full, saved_percent=round(100 * (full - tokens) / full))
+        assert tokens < full * 0.8
+    assert compact.render(configuration, "hcl") is configuration
+    assert compact.render_estimated(configuration, "hcl") == (configuration, None)
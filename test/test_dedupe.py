@@ -0,0 +1,80 @@
+import pytest
+from clumio_terraform_mcp import app, dedupe, models
+
+def sla(retention, rpo):
+    return {
+        "retention_duration": {"value": retention[0], "unit": retention[1]},
+        "rpo_frequency": {"value": rpo[0], "unit": rpo[1]},
+    }
+
+def policy(name, operations, display_name=None, **arguments):
+    return models.ResourceSpec(kind="policy", arguments={
+        "policy_name": name, "display_name": display_name or name, "operations": operations, **arguments,
+    })
+
+def rule(name, policy_name):
+    return models.ResourceSpec(kind="policy_rule", arguments={
+        "rule_name": name, "display_name": name, "policy_name": policy_name,
+        "condition_expression": {"entity_type": {"$eq": "aws_ebs_volume"}},
+    })
+
+EBS = {"type": "aws_ebs_volume_backup", "slas": [sla((30, "days"), (1, "days")), sla((1, "years"), (7, "days"))]}
+RDS = {"type": "aws_rds_resource_aws_snapshot", "slas": [sla((7, "days"), (12, "hours"))]}
+
+@pytest.mark.parametrize("value, unit, expected", [
+    (24, "hours", (1, "days")),
+    (36, "hours", (36, "hours")),
+    (14, "days", (2, "weeks")),
+    (90, "minutes", (90, "minutes")),
+    (24, "months", (2, "years")),
+    (18, "months", (18, "months")),
+])
+def test_canonical_time_unit(value, unit, expected):
+    canonical = dedupe.canonical_time_unit(models.TimeUnit(value=value, unit=unit))
+    assert (canonical.value, canonical.unit) == expected
+
+def test_merges_equivalent_policies_and_rewrites_references():
+    equivalent_ebs = {"type": "aws_ebs_volume_backup", "slas": [sla((12, "months"), (168, "hours")), sla((720, "hours"), (24, "hours"))]}
+    result = dedupe.deduplicate([
+        policy("gold", [EBS, RDS], display_name="Gold"),
+        policy("gold_copy", [RDS, equivalent_ebs], display_name="Gold (copy)"),
+        policy("silver", [RDS]),
+        rule("a", "gold"),
+        rule("b", "gold_copy"),
+    ])
+    assert [(m.policy_name, m.duplicates) for m in result.merges] == [("gold", ["gold_copy"])]
+    assert (result.policies_before, result.policies_after) == (3, 2)
+    assert [spec.arguments.get("policy_name") for spec in result.resources] == ["gold", "silver", "gold", "gold"]
+
+def test_keeps_policies_that_differ():
+    windowed = {**EBS, "backup_window_tz": {"start_time": "20:00", "end_time": "08:00"}}
+    result = dedupe.deduplicate([
+        policy("a", [EBS]),
+        policy("b", [windowed]),
+        policy("c", [EBS], clumio_provider_alias="ou"),
+        policy("d", [{**EBS, "slas": EBS["slas"][:1]}]),
+    ])
+    assert result.merges == []
+    assert result.policies_after == 4
+
+def test_imported_configuration_is_preferred_and_rewritten():
+    imported = "\n\n".join(app.render_resource(spec) for spec in [
+        policy("legacy", [EBS]),
+        policy("legacy_dup", [{**EBS, "slas": list(reversed(EBS["slas"]))}]),
+        rule("legacy_rule", "legacy_dup"),
+    ])
+    result = dedupe.deduplicate([policy("new", [EBS]), rule("new_rule", "new")], imported)
+    assert [(m.policy_name, sorted(m.duplicates)) for m in result.merges] == [("legacy", ["legacy_dup", "new"])]
+    assert [spec.arguments["policy_name"] for spec in result.resources] == ["legacy"]
+    assert 'resource "clumio_policy" "legacy_dup"' not in result.configuration
+    assert "policy_id           = clumio_policy.legacy.id" in result.configuration
+    assert result.configuration.startswith('resource "clumio_policy" "legacy"')
+
+def test_imported_advanced_settings_are_compared_as_written():
+    imported = app.render_resource(policy("cold", [EBS])).replace('backup_tier = "standard"', 'backup_tier = "cold"')
+    result = dedupe.deduplicate([policy("standard", [EBS])], imported)
+    assert result.merges == []
+
+def test_conflicting_definitions_raise():
+    with pytest.raises(ValueError, match="defined more than once"):
+        dedupe.deduplicate([policy("gold", [EBS]), policy("gold", [RDS])])
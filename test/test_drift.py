@@ -0,0 +1,136 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+from clumio_terraform_mcp import app, drift, models
+
+SLA = {"retention_duration": {"unit": "days", "value": 7}, "rpo_frequency": {"unit": "days", "value": 1}}
+
+def configuration():
+    specs = [
+        {"kind": "policy", "arguments": {
+            "policy_name": "gold", "display_name": "Gold", "operations": [{"type": "aws_ebs_volume_backup", "slas": [SLA]}],
+        }},
+        {"kind": "policy_rule", "arguments": {
+            "rule_name": "ebs", "display_name": "EBS", "policy_name": "gold",
+            "condition_expression": {"entity_type": {"$eq": "aws_ebs_volume"}},
+        }},
+        {"kind": "organizational_unit", "arguments": {"ou_name": "eng", "display_name": "Engineering", "description": "d"}},
+    ]
+    return [app.render_resource(models.ResourceSpec(**spec)) for spec in specs]
+
+def policy_attributes(retention=7):
+    return {
+        "id": "p-1",
+        "name": "Gold",
+        "activation_status": "activated",
+        "organizational_unit_id": "ou-1",
+        "operations": [{
+            "action_setting": "immediate",
+            "type": "aws_ebs_volume_backup",
+            "backup_aws_region": None,
+            "slas": [{
+                "retention_duration": [{"unit": "days", "value": retention}],
+                "rpo_frequency": [{"unit": "days", "value": 1, "offsets": None}],
+            }],
+            "advanced_settings": [{"aws_ebs_volume_backup": [{"backup_tier": "standard"}]}],
+        }],
+    }
+
+def rule_attributes(entity_type="aws_ebs_volume"):
+    return {
+        "id": "r-1",
+        "name": "EBS",
+        "policy_id": "p-1",
+        "before_rule_id": None,
+        "condition": json.dumps({"entity_type": {"$eq": entity_type}}),
+    }
+
+def tfstate(*resources):
+    return json.dumps({
+        "version": 4,
+        "terraform_version": "1.9.0",
+        "outputs": {"ids": {"value": ["a", "b"], "type": ["list", "string"]}},
+        "resources": [
+            {"mode": mode, "type": resource_type, "name": name, "provider": "provider[\"registry.terraform.io/clumio-code/clumio\"]",
+             "instances": [{"schema_version": 0, "attributes": attributes}]}
+            for mode, resource_type, name, attributes in resources
+        ],
+        "check_results": None,
+    }, indent=2)
+
+@pytest.mark.parametrize("chunk_size", [drift.DEFAULT_CHUNK_SIZE, 7])
+def test_reports_drifted_orphaned_and_missing(chunk_size):
+    state = tfstate(
+        ("managed", "clumio_policy", "gold", policy_attributes(retention=30)),
+        ("managed", "clumio_policy_rule", "ebs", rule_attributes()),
+        ("managed", "clumio_user", "alice", {"email": "alice@example.com"}),
+        ("data", "clumio_role", "admin", {"name": "Super Admin"}),
+        ("managed", "aws_iam_role", "role", {"name": "r"}),
+    )
+    report = drift.analyze(io.StringIO(state), configuration(), chunk_size=chunk_size)
+    assert report.drifted == [models.DriftedResource(address="clumio_policy.gold", attributes=["operations"])]
+    assert report.orphaned == ["clumio_user.alice"]
+    assert report.missing == ["clumio_organizational_unit.eng"]
+    assert report.in_sync == 1
+    assert report.state_resources == 3
+
+def test_json_encoded_attributes_are_compared_semantically():
+    state = tfstate(
+        ("managed", "clumio_policy", "gold", policy_attributes()),
+        ("managed", "clumio_policy_rule", "ebs", rule_attributes(entity_type="aws_rds_instance")),
+    )
+    report = drift.analyze(io.StringIO(state), configuration()[:2])
+    assert report.drifted == [models.DriftedResource(address="clumio_policy_rule.ebs", attributes=["condition"])]
+    compact = tfstate(("managed", "clumio_policy_rule", "ebs", rule_attributes()))
+    assert drift.analyze(io.StringIO(compact.replace(": ", ":")), configuration()[1:2]).in_sync == 1
+
+def test_reads_terraform_show_json():
+    state = json.dumps({
+        "format_version": "1.0",
+        "values": {
+            "outputs": {},
+            "root_module": {
+                "resources": [{"address": "clumio_policy.gold", "mode": "managed", "type": "clumio_policy", "name": "gold",
+                               "values": policy_attributes()}],
+                "child_modules": [{"address": "module.ou", "resources": [{
+                    "address": "module.ou.clumio_organizational_unit.eng", "mode": "managed",
+                    "type": "clumio_organizational_unit", "name": "eng", "values": {"name": "Engineering"},
+                }]}],
+            },
+        },
+    })
+    assert list(address for address, _ in drift.iter_state_resources(io.StringIO(state), chunk_size=5)) == [
+        "clumio_policy.gold", "module.ou.clumio_organizational_unit.eng",
+    ]
+
+def test_instance_addresses_include_module_and_index_key():
+    state = json.dumps({"version": 4, "resources": [{
+        "module": "module.accounts", "mode": "managed", "type": "clumio_aws_connection", "name": "conn",
+        "instances": [{"index_key": 0, "attributes": {}}, {"index_key": "prod", "attributes": {}}],
+    }]})
+    assert [address for address, _ in drift.iter_state_resources(io.StringIO(state))] == [
+        'module.accounts.clumio_aws_connection.conn[0]', 'module.accounts.clumio_aws_connection.conn["prod"]',
+    ]
+
+def test_rejects_truncated_state():
+    state = tfstate(("managed", "clumio_policy", "gold", policy_attributes()))
+    with pytest.raises(ValueError, match="invalid state JSON"):
+        list(drift.iter_state_resources(io.StringIO(state[:len(state) // 2]), chunk_size=16))
+
+def test_memory_stays_bounded_for_large_state():
+    unrelated = json.dumps({"mode": "managed", "type": "aws_s3_bucket", "name": "b", "instances": [
+        {"attributes": {"bucket": "x" * 200, "tags": {f"k{i}": "v" * 20 for i in range(20)}}},
+    ]})
+    resource_count = 20000
+    state = io.StringIO('{"version": 4, "resources": [' + ",".join([unrelated] * resource_count) + "]}")
+    size = len(state.getvalue())
+    tracemalloc.start()
+    try:
+        report = drift.analyze(state, configuration(), chunk_size=64 * 1024)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert report.missing == ["clumio_organizational_unit.eng", "clumio_policy.gold", "clumio_policy_rule.ebs"]
+    assert peak < size / 10
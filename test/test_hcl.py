@@ -0,0 +1,43 @@
+import pytest
+from clumio_terraform_mcp import hcl
+
+def test_parse_literals_references_and_blocks():
+    document = hcl.parse('''
+# comment
+resource "clumio_policy" "p" {
+  name    = "Daily \\"gold\\""
+  count   = 2
+  enabled = true
+  ids     = ["a", "b"]
+  parent  = clumio_organizational_unit.root.id
+  rule    = jsonencode({"aws_tag": {"$eq": {"key": "k", "value": "${var.v}"}}})
+  operations {
+    type = "aws_ebs_volume_backup"
+  }
+}
+data "aws_region" "current" {}
+''')
+    policy, region = document.blocks
+    assert policy.address == "clumio_policy.p"
+    assert region.address == "data.aws_region.current"
+    assert document.line(policy.start) == 3
+    values = {name: attribute.value for name, attribute in policy.attributes.items()}
+    assert values["name"] == 'Daily "gold"'
+    assert values["count"] == 2
+    assert values["enabled"] is True
+    assert values["ids"] == ["a", "b"]
+    assert values["parent"] == hcl.Expression("clumio_organizational_unit.root.id")
+    assert values["rule"].function == "jsonencode"
+    assert values["rule"].args[0]["aws_tag"]["$eq"]["key"] == "k"
+    assert not hcl.is_known(values["rule"].args[0])
+    assert policy.blocks[0].attributes["type"].value == "aws_ebs_volume_backup"
+    assert document.text[policy.start:policy.end].endswith("}\n}")
+
+def test_parse_rejects_unbalanced_blocks():
+    with pytest.raises(hcl.HCLSyntaxError):
+        hcl.parse('resource "clumio_policy" "p" {\n  name = "x"\n')
+
+@pytest.mark.parametrize("value", ['"He said "hi""', '"a" "b"', 'x 1', '[1] "b"', 'f(1) g'])
+def test_parse_rejects_operands_without_operator(value):
+    with pytest.raises(hcl.HCLSyntaxError, match="expected an operator"):
+        hcl.parse(f'resource "clumio_policy" "p" {{\n  name = {value}\n}}\n')
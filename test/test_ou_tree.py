@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from clumio_terraform_mcp import app, models, ou_tree, schema
+
+def node(name, *children):
+    return models.OUNode(ou_name=name, display_name=name.title(), description=f"{name} unit", children=list(children))
+
+def tree():
+    return [node("eng", node("web", node("frontend")), node("data")), node("finance")]
+
+def test_walk_visits_parents_before_children():
+    order = [(placed.node.ou_name, placed.depth) for placed in ou_tree.walk(tree())]
+    assert order == [("eng", 1), ("finance", 1), ("web", 2), ("data", 2), ("frontend", 3)]
+
+def test_plan_wires_child_ous_to_parent_providers():
+    plan = ou_tree.plan(tree())
+    providers = {spec.arguments["ou_name"]: spec.arguments["clumio_provider_alias"] for spec in plan.specs}
+    assert providers == {"eng": None, "finance": None, "web": "eng", "data": "eng", "frontend": "web"}
+    # finance has no children but, as a top-level OU, may manage policy rules
+    assert plan.provider_aliases == {"eng": "eng", "finance": "finance", "web": "web"}
+    assert plan.policy_rule_provider_aliases == ["eng", "finance"]
+    assert [account.alias for account in plan.clumio_accounts] == [None, "eng", "finance", "web"]
+    assert plan.depth == 3
+
+def test_plan_with_leaf_providers_and_prefix():
+    plan = ou_tree.plan(tree(), alias_prefix="ou_", leaf_providers=True)
+    assert plan.provider_aliases["frontend"] == "ou_frontend"
+    assert plan.specs[-1].arguments["clumio_provider_alias"] == "ou_web"
+
+def test_duplicate_names_raise():
+    with pytest.raises(ValueError, match="duplicate organizational unit 'web'"):
+        ou_tree.plan([node("eng", node("web")), node("web")])
+
+def test_generated_configuration_is_valid():
+    result = app.generate_organizational_unit_tree(roots=tree())
+    assert schema.validate_configuration(result.configuration) == []
+    assert 'alias = "web"' in result.configuration
+    document = json.loads(app.generate_organizational_unit_tree(roots=tree(), output_format='json').configuration)
+    assert [provider.get("alias") for provider in document["provider"]["clumio"]] == [None, "eng", "finance", "web"]
+    assert document["resource"]["clumio_organizational_unit"]["frontend"]["provider"] == "clumio.web"
+
+def test_wide_and_deep_trees_are_planned_in_one_pass(monkeypatch):
+    visits = []
+    walk = ou_tree.walk
+
+    def counting_walk(roots):
+        for placed in walk(roots):
+            visits.append(placed.node.ou_name)
+            yield placed
+
+    monkeypatch.setattr(ou_tree, "walk", counting_walk)
+    plan = ou_tree.plan([node(f"ou{i}", node(f"ou{i}_child")) for i in range(8000)])
+    # Every OU is visited exactly once, so planning is linear in the size of the tree
+    assert len(visits) == len(set(visits)) == len(plan.specs) == 16000
+    assert len(plan.clumio_accounts) == 8001
+
+    # Deeper than the recursion limit, which a recursive walk would exceed
+    deep = node("level0")
+    current = deep
+    for level in range(1, 5000):
+        child = node(f"level{level}")
+        current.children.append(child)
+        current = child
+    assert ou_tree.plan([deep]).depth == 5000
@@ -0,0 +1,97 @@
+import pytest
+from clumio_terraform_mcp import app, models, partition, schema
+
+SLA = {"retention_duration": {"unit": "days", "value": 7}, "rpo_frequency": {"unit": "days", "value": 1}}
+
+def estate():
+    return [models.ResourceSpec(**spec) for spec in [
+        {"kind": "organizational_unit", "arguments": {"ou_name": "eng", "display_name": "Engineering", "description": "d"}},
+        {"kind": "organizational_unit", "arguments": {
+            "ou_name": "web", "display_name": "Web", "description": "d", "parent_name": "eng", "clumio_provider_alias": "eng",
+        }},
+        {"kind": "policy", "arguments": {
+            "policy_name": "gold", "display_name": "Gold", "operations": [{"type": "aws_ebs_volume_backup", "slas": [SLA]}],
+        }},
+        {"kind": "policy_rule", "arguments": {
+            "rule_name": "web_rule", "display_name": "Web", "policy_name": "gold", "clumio_provider_alias": "eng",
+            "condition_expression": {
+                "entity_type": {"$eq": "aws_ebs_volume"},
+                "aws_account_native_id": {"$eq": "111111111111"},
+                "aws_region": {"$eq": "us-west-2"},
+            },
+        }},
+        {"kind": "aws_connection", "aws_account_id": "111111111111", "arguments": {
+            "connection_name": "prod", "description": "Prod", "services": {"ebs": True},
+            "aws_provider_alias": "prod", "clumio_provider_alias": "web",
+        }},
+    ]]
+
+def plan(**options):
+    specs = estate()
+    partitioner = partition.Partitioner(
+        [models.ClumioAccount(alias="eng", ou_name="eng"), models.ClumioAccount(alias="web", ou_name="web")],
+        [models.AWSAccount(alias="prod", region="us-west-2")],
+        options.pop("partition_by", ["ou", "account", "region"]),
+        **options,
+    )
+    return partitioner.plan(specs, [app.render_resource(spec) for spec in specs])
+
+def test_partitions_by_ou_account_and_region():
+    result = plan()
+    partitions = {p.name: p for p in result.partitions}
+    assert [p.name for p in result.partitions] == ["organization", "root", "web_111111111111_us-west-2", "eng"]
+    assert partitions["organization"].addresses == ["clumio_organizational_unit.eng", "clumio_organizational_unit.web"]
+    assert partitions["root"].addresses == ["clumio_policy.gold"]
+    assert partitions["eng"].addresses == ["clumio_policy_rule.web_rule"]
+    assert partitions["eng"].depends_on == ["organization", "root"]
+    assert partitions["web_111111111111_us-west-2"].addresses == ["clumio_aws_connection.prod"]
+    assert partitions["web_111111111111_us-west-2"].depends_on == ["organization"]
+    assert result.total_resources == 5
+    assert result.largest_partition_size == 2
+    assert result.unresolved_references == []
+
+    rule = partitions["eng"].configuration
+    assert "policy_id           = data.terraform_remote_state.root.outputs.clumio_policy_gold_id" in rule
+    assert "clumio_organizational_unit_context = data.terraform_remote_state.organization.outputs.clumio_organizational_unit_eng_id" in rule
+    assert 'output "clumio_policy_gold_id"' in partitions["root"].configuration
+    assert "parent_id   = clumio_organizational_unit.eng.id" in partitions["organization"].configuration
+    for p in result.partitions:
+        assert schema.validate_configuration(p.configuration) == []
+
+def test_ou_depth_and_data_source_lookups():
+    result = plan(ou_depth=1, partition_by=["ou"], cross_partition_references="data_source")
+    partitions = {p.name: p for p in result.partitions}
+    assert sorted(partitions) == ["eng", "organization", "root"]
+    assert partitions["eng"].addresses == ["clumio_policy_rule.web_rule", "clumio_aws_connection.prod"]
+    # Lookups only succeed once the OUs exist
+    assert partitions["eng"].depends_on == ["organization", "root"]
+    assert [p.name for p in result.partitions].index("organization") < [p.name for p in result.partitions].index("eng")
+    configuration = partitions["eng"].configuration
+    assert 'data "clumio_organizational_unit" "eng" {\n  name = "Engineering"\n}' in configuration
+    assert "clumio_organizational_unit_context = data.clumio_organizational_unit.web.id" in configuration
+    assert 'data "terraform_remote_state" "organization"' not in configuration
+
+def test_ambiguous_display_names_are_not_looked_up():
+    specs = estate()
+    specs.insert(2, models.ResourceSpec(kind="organizational_unit", arguments={"ou_name": "other_web", "display_name": "Web", "description": "d"}))
+    partitioner = partition.Partitioner(
+        [models.ClumioAccount(alias="eng", ou_name="eng"), models.ClumioAccount(alias="web", ou_name="web")],
+        [], ["ou"], ou_depth=1, cross_partition_references="data_source",
+    )
+    result = partitioner.plan(specs, [app.render_resource(spec) for spec in specs])
+    configuration = {p.name: p for p in result.partitions}["eng"].configuration
+    assert 'data "clumio_organizational_unit" "eng" {\n  name = "Engineering"\n}' in configuration
+    assert 'data "clumio_organizational_unit" "web"' not in configuration
+    assert "clumio_organizational_unit_context = data.terraform_remote_state.organization.outputs.clumio_organizational_unit_web_id" in configuration
+
+def test_unknown_aws_aliases_use_the_region_variable():
+    specs = estate()
+    partitioner = partition.Partitioner([], [], ["ou"])
+    result = partitioner.plan(specs, [app.render_resource(spec) for spec in specs])
+    configuration = {p.name: p for p in result.partitions}["web"].configuration
+    assert 'alias  = "prod"\n  region = "${var.aws_region}"' in configuration
+    assert '"None"' not in configuration
+
+def test_cyclic_partitions_are_rejected():
+    with pytest.raises(ValueError, match="cyclically"):
+        partition.Partitioner.apply_order(["a", "b"], {"a": {"b"}, "b": {"a"}})
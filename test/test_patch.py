@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+import pytest
+from clumio_terraform_mcp import app, hcl, models, patch
+
+SLA = {"retention_duration": {"unit": "days", "value": 30}, "rpo_frequency": {"unit": "hours", "value": 12}}
+
+def policy(name, days=30):
+    sla = {**SLA, "retention_duration": {"unit": "days", "value": days}}
+    return models.ResourceSpec(kind="policy", arguments={
+        "policy_name": name, "display_name": name.title(), "operations": [{"type": "aws_ebs_volume_backup", "slas": [sla]}],
+    })
+
+def write_configuration(path, count):
+    specs = [policy(f"policy_{index}") for index in range(count)]
+    path.write_text("\n\n".join([app.generate_providers([models.ClumioAccount()], []), *map(app.render_resource, specs)]) + "\n")
+    return path
+
+def addresses(data):
+    return [block.address for block in hcl.parse(data.decode()).blocks]
+
+def test_scan_finds_top_level_blocks():
+    text = (
+        '# header { not a block\nprovider "clumio" {\n  alias = "eng"\n}\n\n'
+        'resource "clumio_policy" "p" {\n  name = "a } b ${"}"}"\n  /* } */ rule = jsonencode({"a": {}})\n'
+        '  doc = <<EOT\n}\nEOT\n}\n'
+    )
+    blocks = patch.scan(text)
+    assert [block.address for block in blocks] == ["provider.clumio.eng", "clumio_policy.p"]
+    assert text[blocks[1].start:blocks[1].end] == text[text.index("resource"):].rstrip("\n")
+    with pytest.raises(hcl.HCLSyntaxError):
+        patch.scan('resource "a" "b" {\n')
+
+def test_patch_replaces_only_the_target_block(tmp_path):
+    path = write_configuration(tmp_path / "main.tf", 50)
+    original = path.read_bytes()
+    index = patch.index_file(str(path))
+    start, end = index.ranges["clumio_policy.policy_7"]
+
+    result = patch.patch_file(str(path), app.render_resource(policy("policy_7", days=90)))
+    patched = path.read_bytes()
+    assert result.replaced == ["clumio_policy.policy_7"] and result.inserted == []
+    assert patched[:start] == original[:start]
+    assert patched[-(len(original) - end):] == original[end:]
+    assert b"value = 90" in patched[start:]
+    assert result.bytes_written == len(patched) - len(original) + (end - start)
+    assert addresses(patched) == addresses(original)
+    assert os.listdir(tmp_path) == ["main.tf"]
+
+def test_index_is_cached_and_shifted_after_patching(tmp_path, monkeypatch):
+    path = write_configuration(tmp_path / "main.tf", 20)
+    patch.index_file(str(path))
+    scans = []
+    monkeypatch.setattr(patch, "scan", lambda text: scans.append(text) or [])
+
+    patch.patch_file(str(path), app.render_resource(policy("policy_3", days=365)))
+    patch.patch_file(str(path), app.render_resource(policy("policy_new")))
+    index = patch.index_file(str(path))
+    assert scans == []
+    # The shifted index matches a fresh scan of the patched file
+    text = path.read_text()
+    assert index.ranges == {block.address: (block.start, block.end) for block in hcl.parse(text).blocks}
+    assert text.endswith(app.render_resource(policy("policy_new")) + "\n")
+
+    # Edits by anyone else invalidate the index
+    path.write_text(text + "\n")
+    patch.index_file(str(path))
+    assert len(scans) == 1
+
+def test_byte_ranges_with_multibyte_characters(tmp_path):
+    path = tmp_path / "main.tf"
+    path.write_text('resource "clumio_policy" "a" {\n  name = "Żółw 🐢"\n}\n\nresource "clumio_policy" "b" {\n  name = "B"\n}\n', encoding="utf-8")
+    start, end = patch.index_file(str(path)).ranges["clumio_policy.b"]
+    assert path.read_bytes()[start:end].decode().startswith('resource "clumio_policy" "b"')
+    patch.patch_file(str(path), 'resource "clumio_policy" "b" {\n  name = "Ω"\n}')
+    assert path.read_text(encoding="utf-8").endswith('"Żółw 🐢"\n}\n\nresource "clumio_policy" "b" {\n  name = "Ω"\n}\n')
+
+def test_address_selects_one_rendered_block(tmp_path):
+    path = tmp_path / "main.tf"
+    group = models.ResourceSpec(kind="protection_group", arguments={
+        "group_name": "pg", "display_name": "PG", "policy_name": "gold", "description": "Buckets", "bucket_rule": {},
+    })
+    path.write_text(app.render_resource(group) + "\n")
+    result = patch.patch_file(str(path), app.render_resource(group).replace('"Buckets"', '"All buckets"'), "clumio_protection_group.pg")
+    assert result.replaced == ["clumio_protection_group.pg"]
+    assert '"All buckets"' in path.read_text()
+    with pytest.raises(ValueError, match="not defined in the configuration"):
+        patch.patch_file(str(path), app.render_resource(group), "clumio_policy.gold")
+
+def test_duplicate_addresses_in_file_raise(tmp_path):
+    path = tmp_path / "main.tf"
+    block = 'resource "clumio_policy" "a" {\n  name = "A"\n}\n'
+    path.write_text(block + block)
+    with pytest.raises(ValueError, match="defined more than once"):
+        patch.patch_file(str(path), block)
+    assert path.read_text() == block + block
+
+def test_patching_is_cheaper_than_parsing_the_file(tmp_path):
+    path = write_configuration(tmp_path / "main.tf", 2000)
+    patch.index_file(str(path))
+    configuration = app.render_resource(policy("policy_1000", days=7))
+    started = time.perf_counter()
+    for _ in range(5):
+        patch.patch_file(str(path), configuration)
+    elapsed = (time.perf_counter() - started) / 5
+    started = time.perf_counter()
+    hcl.parse(path.read_text())
+    assert elapsed < time.perf_counter() - started
+
+def test_concurrent_patches_of_one_file_keep_every_edit(tmp_path, monkeypatch):
+    path = write_configuration(tmp_path / "main.tf", 20)
+    splice = patch._splice
+
+    def slow_splice(*args):
+        # Without the lock, every other patch would index the file before this one replaces it
+        time.sleep(0.05)
+        splice(*args)
+
+    monkeypatch.setattr(patch, "_splice", slow_splice)
+    threads = [
+        threading.Thread(target=patch.patch_file, args=(str(path), app.render_resource(policy(f"policy_{index}", days=90 + index))))
+        for index in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    text = path.read_text()
+    assert addresses(text.encode()) == addresses(write_configuration(tmp_path / "expected.tf", 20).read_bytes())
+    for index in range(4):
+        assert app.render_resource(policy(f"policy_{index}", days=90 + index)) in text
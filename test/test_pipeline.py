@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+from clumio_terraform_mcp import app, models, pipeline
+
+OU = {"display_name": "OU", "description": "desc"}
+
+class TestPipelinedClient(unittest.IsolatedAsyncioTestCase):
+    async def test_generate_returns_results_in_order(self):
+        specs = [
+            models.ResourceSpec(kind="organizational_unit", arguments={"ou_name": f"ou{i}", **OU}) for i in range(20)
+        ]
+        async with pipeline.PipelinedClient(app.mcp, concurrency=4) as client:
+            configurations = await client.generate(specs)
+        self.assertEqual(len(configurations), 20)
+        for i, configuration in enumerate(configurations):
+            self.assertIn(f'resource "clumio_organizational_unit" "ou{i}"', configuration)
+        self.assertEqual(client.stats.calls, 20)
+        self.assertEqual(client.stats.completed, 20)
+        self.assertEqual(client.stats.failures, 0)
+        self.assertGreater(client.stats.throughput, 0)
+        self.assertLessEqual(client.stats.max_in_flight, 4)
+
+    async def test_concurrency_is_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def call_tool(name, arguments):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01 * (arguments["i"] % 3))
+            in_flight -= 1
+            return arguments["i"]
+
+        mock_client = MagicMock(spec=Client)
+        mock_client.call_tool = call_tool
+        client = pipeline.PipelinedClient(mock_client, concurrency=3)
+        results = await client.call_many(("tool", {"i": i}) for i in range(30))
+        self.assertEqual(results, list(range(30)))
+        self.assertEqual(peak, 3)
+
+    async def test_transport_errors_are_retried(self):
+        mock_client = MagicMock(spec=Client)
+        mock_client.call_tool = AsyncMock(side_effect=[ConnectionError("reset"), TimeoutError(), "ok"])
+        client = pipeline.PipelinedClient(mock_client, backoff=0.001)
+        self.assertEqual(await client.call("tool", {}), "ok")
+        self.assertEqual(client.stats.retries, 2)
+        self.assertEqual(client.stats.failures, 2)
+        # Only the successful attempt counts towards throughput and latency
+        self.assertEqual((client.stats.calls, client.stats.completed), (3, 1))
+        self.assertEqual(client.stats.total_latency, client.stats.mean_latency)
+
+    async def test_backoff_releases_the_slot(self):
+        calls = []
+
+        async def call_tool(name, arguments):
+            calls.append(name)
+            if name == "throttled" and calls.count(name) == 1:
+                raise ConnectionError("throttled")
+            return name
+
+        mock_client = MagicMock(spec=Client)
+        mock_client.call_tool = call_tool
+        client = pipeline.PipelinedClient(mock_client, concurrency=1, backoff=0.2)
+        throttled = asyncio.create_task(client.call("throttled", {}))
+        await asyncio.sleep(0)
+        # Runs while the throttled call backs off instead of waiting for its retry
+        self.assertEqual(await asyncio.wait_for(client.call("other", {}), 0.1), "other")
+        self.assertEqual(await throttled, "throttled")
+        self.assertEqual(calls, ["throttled", "other", "throttled"])
+
+    async def test_retries_are_limited(self):
+        mock_client = MagicMock(spec=Client)
+        mock_client.call_tool = AsyncMock(side_effect=ConnectionError("refused"))
+        client = pipeline.PipelinedClient(mock_client, retries=2, backoff=0.001)
+        with self.assertRaises(ConnectionError):
+            await client.call("tool", {})
+        self.assertEqual(mock_client.call_tool.await_count, 3)
+
+    async def test_tool_errors_are_not_retried(self):
+        async with pipeline.PipelinedClient(app.mcp) as client:
+            results = await client.call_many([
+                ("generate_organizational_unit", {"ou_name": "ok", **OU}),
+                ("generate_organizational_unit", {"ou_name": "missing_arguments"}),
+            ], return_exceptions=True)
+        self.assertIn("clumio_organizational_unit", results[0].data)
+        self.assertIsInstance(results[1], ToolError)
+        self.assertEqual(client.stats.retries, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+import json
+from clumio_terraform_mcp import app, scenarios, schema
+
+def test_prebuilt_index_is_up_to_date():
+    with open(scenarios.INDEX_PATH) as f:
+        prebuilt = json.load(f)
+    assert prebuilt == scenarios.build_index(app.render_resource), \
+        "Regenerate the index with: python -m clumio_terraform_mcp.scenarios"
+
+def test_scenario_configurations_are_valid():
+    for scenario in scenarios.load_index().scenarios:
+        assert schema.validate_configuration(scenario.configuration) == [], scenario.id
+
+def test_search_by_keyword_resource_type_and_service():
+    index = scenarios.load_index()
+    assert [s.id for s in index.search("tiered retention")][0] == "tiered_protection_policies"
+    assert all("clumio_policy_rule" in s.resource_types for s in index.search(resource_type="policy_rule"))
+    assert [s.id for s in index.search("compliance", resource_type="clumio_report_configuration")] == ["compliance_reporting"]
+    assert all("s3" in s.services for s in index.search(service="S3", limit=20))
+    assert index.search("kubernetes") == []
+
+def test_search_falls_back_to_partial_matches():
+    index_ids = [s.id for s in scenarios.load_index().search("disaster recovery kubernetes")]
+    assert index_ids == ["disaster_recovery_setup"]
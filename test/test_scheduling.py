@@ -0,0 +1,176 @@
+import asyncio
+import threading
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware.rate_limiting import RateLimitError
+from clumio_terraform_mcp import scheduling
+
+async def admitted_order(scheduler, calls):
+    """Queue calls behind one holding the only slot and return the order they are admitted in."""
+    order = []
+
+    async def call(client_id, cost, label):
+        async with scheduler.slot(client_id, cost):
+            order.append(label)
+            await asyncio.sleep(0)
+
+    holder = await scheduler.acquire("holder", 1)
+    tasks = [asyncio.create_task(call(*arguments)) for arguments in calls]
+    await asyncio.sleep(0)
+    scheduler.release(holder)
+    await asyncio.gather(*tasks)
+    return order
+
+@pytest.mark.asyncio
+async def test_small_calls_overtake_queued_bulk_calls():
+    scheduler = scheduling.FairScheduler(max_concurrency=1)
+    calls = [("bulk", 100_000, f"bulk{i}") for i in range(5)] + [("interactive", 300, f"small{i}") for i in range(3)]
+    order = await admitted_order(scheduler, calls)
+    assert order == ["small0", "small1", "small2", "bulk0", "bulk1", "bulk2", "bulk3", "bulk4"]
+
+@pytest.mark.asyncio
+async def test_clients_share_by_weight():
+    scheduler = scheduling.FairScheduler(max_concurrency=1, weights={"gold": 2})
+    calls = [(client_id, 1000, client_id) for _ in range(30) for client_id in ("gold", "bronze")]
+    order = await admitted_order(scheduler, calls)
+    assert order[:30].count("gold") == 20
+
+@pytest.mark.asyncio
+async def test_byte_budget_limits_admission():
+    scheduler = scheduling.FairScheduler(max_concurrency=10, max_bytes_in_flight=1000)
+    first = await scheduler.acquire("a", 600)
+    second = asyncio.create_task(scheduler.acquire("b", 600))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert not second.done() and scheduler.metrics().queued == 1
+    scheduler.release(first)
+    scheduler.release(await second)
+    # Calls over the budget run alone
+    oversized = await scheduler.acquire("a", 5000)
+    assert scheduler.bytes_in_flight == 5000
+    scheduler.release(oversized)
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_calls():
+    scheduler = scheduling.FairScheduler(max_concurrency=1, max_queued_per_client=2)
+    holder = await scheduler.acquire("a", 1)
+    waiting = [asyncio.create_task(scheduler.acquire("a", 1)) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(RateLimitError):
+        await scheduler.acquire("a", 1)
+    metrics = {client.client_id: client for client in scheduler.metrics().clients}
+    assert (metrics["a"].queued, metrics["a"].running, metrics["a"].rejected) == (2, 1, 1)
+    scheduler.release(holder)
+    for task in waiting:
+        scheduler.release(await task)
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_leave_the_queue():
+    scheduler = scheduling.FairScheduler(max_concurrency=1)
+    holder = await scheduler.acquire("a", 1)
+    cancelled = asyncio.create_task(scheduler.acquire("b", 1))
+    waiting = asyncio.create_task(scheduler.acquire("c", 1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    scheduler.release(holder)
+    scheduler.release(await waiting)
+    assert cancelled.cancelled()
+    assert scheduler.running == 0 and scheduler.bytes_in_flight == 0 and scheduler.metrics().queued == 0
+
+@pytest.mark.asyncio
+async def test_wait_times_are_reported():
+    scheduler = scheduling.FairScheduler(max_concurrency=1)
+    holder = await scheduler.acquire("a", 1)
+    waiting = asyncio.create_task(scheduler.acquire("b", 1))
+    await asyncio.sleep(0.05)
+    scheduler.release(holder)
+    scheduler.release(await waiting)
+    metrics = {client.client_id: client for client in scheduler.metrics().clients}
+    assert metrics["b"].max_wait_ms >= 40 and metrics["b"].completed == 1
+    assert metrics["a"].max_wait_ms < metrics["b"].max_wait_ms
+
+@pytest.mark.asyncio
+async def test_middleware_schedules_tool_calls_by_client():
+    server = FastMCP("test")
+    scheduler = scheduling.FairScheduler(max_concurrency=1, max_queued_per_client=1)
+    server.add_middleware(scheduling.FairSchedulingMiddleware(scheduler, get_client_id=lambda context: "shared"))
+    release = asyncio.Event()
+
+    @server.tool
+    async def wait() -> str:
+        await release.wait()
+        return "done"
+
+    async with Client(server) as client:
+        first = asyncio.create_task(client.call_tool("wait"))
+        second = asyncio.create_task(client.call_tool("wait"))
+        while scheduler.metrics().queued < 1:
+            await asyncio.sleep(0.01)
+        with pytest.raises(ToolError, match="Too many queued calls"):
+            await client.call_tool("wait")
+        release.set()
+        assert [(await task).data for task in (first, second)] == ["done", "done"]
+    assert scheduler.metrics().clients[0].completed == 2
+
+@pytest.mark.asyncio
+async def test_synchronous_tools_run_off_the_event_loop():
+    server = FastMCP("test")
+    scheduler = scheduling.FairScheduler()
+    server.add_middleware(scheduling.FairSchedulingMiddleware(scheduler))
+    started = threading.Event()
+    release = threading.Event()
+
+    def block() -> int:
+        started.set()
+        release.wait(5)
+        return threading.get_ident()
+
+    server.tool(scheduling.run_in_thread(block))
+    async with Client(server) as client:
+        call = asyncio.create_task(client.call_tool("block"))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        # The event loop keeps serving requests while the tool runs
+        assert await client.ping()
+        assert scheduler.running == 1
+        release.set()
+        assert (await call).data != threading.get_ident()
+    assert scheduler.running == 0
+
+@pytest.mark.asyncio
+async def test_unauthenticated_clients_are_identified_by_session():
+    server = FastMCP("test")
+    scheduler = scheduling.FairScheduler(weights={"anonymous": 5})
+    server.add_middleware(scheduling.FairSchedulingMiddleware(scheduler))
+
+    @server.tool
+    def echo() -> str:
+        return "done"
+
+    for _ in range(2):
+        async with Client(server) as client:
+            await client.call_tool("echo")
+            await client.call_tool("echo")
+    clients = scheduler.metrics().clients
+    assert len(clients) == 2 and len({client.client_id for client in clients}) == 2
+    assert all(client.client_id.startswith("session:") and client.weight == 1 and client.completed == 2 for client in clients)
+
+def test_scheduler_from_environment():
+    scheduler = scheduling.scheduler_from_environment({
+        "CLUMIO_MCP_MAX_CONCURRENCY": "8",
+        "CLUMIO_MCP_MAX_QUEUED_PER_CLIENT": "16",
+        "CLUMIO_MCP_CLIENT_WEIGHTS": "ci=0.5, ops=2",
+    })
+    assert (scheduler.max_concurrency, scheduler.max_bytes_in_flight, scheduler.max_queued_per_client) == (8, 16 << 20, 16)
+    assert scheduler.weights == {"ci": 0.5, "ops": 2.0}
+    assert scheduling.scheduler_from_environment({}).max_concurrency > 1
+    with pytest.raises(ValueError, match="CLUMIO_MCP_MAX_CONCURRENCY"):
+        scheduling.scheduler_from_environment({"CLUMIO_MCP_MAX_CONCURRENCY": "many"})
+    with pytest.raises(ValueError, match="client_id=weight"):
+        scheduling.scheduler_from_environment({"CLUMIO_MCP_CLIENT_WEIGHTS": "ci"})
+
+def test_estimate_cost_grows_with_input_size():
+    assert scheduling.estimate_cost(None) == scheduling.BASE_COST + 2
+    assert scheduling.estimate_cost({"users": ["x" * 1000]}) > scheduling.estimate_cost({"users": ["x"]}) + 990
@@ -0,0 +1,120 @@
+import pytest
+from pathlib import Path
+from fastmcp import Client
+from clumio_terraform_mcp import app, schema
+
+SOLUTION = Path(__file__).parent.parent / "complete_backup_solution.tf"
+
+@pytest.fixture(scope="module")
+def mcp_server():
+    return app.mcp
+
+def test_complete_solution_is_valid():
+    assert schema.validate_configuration(SOLUTION.read_text()) == []
+
+@pytest.mark.asyncio
+async def test_generated_resources_are_valid(mcp_server):
+    async with Client(mcp_server) as client:
+        outputs = [
+            await client.call_tool("generate_providers", {
+                "clumio_accounts": [{"alias": "child", "ou_name": "child_ou"}],
+                "aws_accounts": [],
+            }),
+            await client.call_tool("generate_organizational_unit", {
+                "ou_name": "child_ou", "display_name": "Child", "description": "desc", "parent_name": "root_ou",
+            }),
+            await client.call_tool("generate_user_assignment", {
+                "user_name": "user",
+                "email": "user@example.com",
+                "full_name": "User",
+                "access_control_configuration": [{"role_name": "Super Admin"}],
+            }),
+            await client.call_tool("generate_report_configuration", {
+                "config_name": "report",
+                "config_display_name": "Report",
+                "email_list": ["admin@example.com"],
+                "controls": {
+                    "asset_backup": {
+                        "look_back_period": {"value": 7, "unit": "days"},
+                        "minimum_retention_duration": {"value": 7, "unit": "days"},
+                        "window_size": {"value": 1, "unit": "days"},
+                    },
+                    "asset_protection": {},
+                    "policy": {
+                        "minimum_retention_duration": {"value": 7, "unit": "days"},
+                        "minimum_rpo_frequency": {"value": 1, "unit": "days"},
+                    },
+                },
+                "filters": {
+                    "asset": {"tag_op_mode": "equal", "tags": [{"key": "k", "value": "v"}], "groups": [{"region": "us-west-2"}]},
+                    "common": {"asset_types": ["aws_ebs_volume"]},
+                },
+                "schedule": {"frequency": "weekly"},
+            }),
+            await client.call_tool("generate_policy", {
+                "policy_name": "policy",
+                "display_name": "Policy",
+                "operations": [{
+                    "type": "aws_s3_continuous_backup",
+                    "slas": [{"retention_duration": {"unit": "days", "value": 7}, "rpo_frequency": {"unit": "days", "value": 1}}],
+                    "backup_window_tz": {"start_time": "02:00", "end_time": "04:00"},
+                    "timezone": "UTC",
+                }],
+            }),
+        ]
+        for output in outputs:
+            assert schema.validate_configuration(output.data) == []
+
+def test_unknown_missing_and_mistyped_arguments_are_flagged():
+    configuration = '''
+resource "clumio_policy_rule" "rule" {
+  name      = "Rule"
+  policy_id = clumio_policy.p.id
+  priority  = 1
+}
+
+resource "clumio_organizational_unit" "ou" {
+  name        = ["not", "a", "string"]
+  description = "desc"
+}
+
+resource "clumio_policy" "p" {
+  name = "Policy"
+  operations {
+    action_setting = "immediate"
+    type           = "aws_ebs_volume_backup"
+    slas {
+      retention_duration {
+        unit  = "days"
+        value = "seven"
+      }
+    }
+  }
+}
+'''
+    messages = [str(d) for d in schema.validate_configuration(configuration)]
+    assert "line 2: clumio_policy_rule.rule: missing required argument 'condition'" in messages
+    assert "line 5: clumio_policy_rule.rule: unsupported argument 'priority'" in messages
+    assert "line 9: clumio_organizational_unit.ou: incorrect type for 'name': expected string" in messages
+    assert "line 21: clumio_policy.p.operations[0].slas[0].retention_duration: incorrect type for 'value': expected number" in messages
+    assert "line 18: clumio_policy.p.operations[0].slas[0]: at least 1 'rpo_frequency' block(s) required" in messages
+    assert len(messages) == 5
+
+def test_unknown_resource_type_is_flagged():
+    messages = schema.validate_configuration('resource "clumio_bogus" "x" {}\n')
+    assert [d.message for d in messages] == ["unknown resource type 'clumio_bogus'"]
+
+def test_check_configuration_raises_with_diagnostics():
+    valid = SOLUTION.read_text()
+    assert schema.check_configuration(valid) is valid
+    with pytest.raises(ValueError, match="line 2: clumio_policy.p: unsupported argument 'nme'"):
+        schema.check_configuration('resource "clumio_policy" "p" {\n  nme = "P"\n}\n')
+
+def test_generate_tools_check_their_output(monkeypatch):
+    monkeypatch.setattr(app.utils, "render_tf_template", lambda *args, **kwargs: 'resource "clumio_policy" "p" {\n  nme = "P"\n}\n')
+    with pytest.raises(ValueError, match="unsupported argument 'nme'"):
+        app.generate_policy(policy_name="p", display_name="P", operations=[])
+
+def test_generate_rejects_unescaped_quotes():
+    with pytest.raises(ValueError, match="expected an operator"):
+        app.generate_organizational_unit(ou_name="ou", display_name='He said "hi"', description="desc")
@@ -0,0 +1,77 @@
+from collections import Counter
+
+import pytest
+from clumio_terraform_mcp import models, stagger
+
+def test_daily_reports_are_spread_over_allowed_hours():
+    scheduler = stagger.ReportScheduler(allowed_hours=[1, 2], slot_minutes=30)
+    schedules = scheduler.assign([models.Schedule() for _ in range(8)])
+    counts = Counter(schedule.start_time for schedule in schedules)
+    assert counts == {"01:00": 2, "01:30": 2, "02:00": 2, "02:30": 2}
+    assert [slot.peak_runs for slot in scheduler.histogram()] == [2, 2, 2, 2]
+
+def test_weekly_and_monthly_reports_are_spread_over_days():
+    scheduler = stagger.ReportScheduler(allowed_hours=[6], slot_minutes=60)
+    weekly = scheduler.assign([models.Schedule(frequency='weekly') for _ in range(14)])
+    assert Counter(schedule.day_of_week for schedule in weekly) == {day: 2 for day in stagger.DAYS_OF_WEEK}
+    assert {schedule.start_time for schedule in weekly} == {"06:00"}
+
+    scheduler = stagger.ReportScheduler(allowed_hours=[6], slot_minutes=60)
+    monthly = scheduler.assign([models.Schedule(frequency='monthly') for _ in range(28)])
+    assert sorted(schedule.day_of_month for schedule in monthly) == list(range(1, 29))
+    assert scheduler.histogram() == [models.SlotLoad(start_time="06:00", peak_runs=1, runs_per_day=1.0)]
+
+def test_mixed_frequencies_share_slots_evenly():
+    scheduler = stagger.ReportScheduler(allowed_hours=[0], slot_minutes=60)
+    schedules = [models.Schedule(frequency='monthly')] * 28 + [models.Schedule(frequency='weekly')] * 7 + [models.Schedule()]
+    placed = scheduler.assign(schedules)
+    assert placed[-1].frequency == 'daily'
+    # 1 daily + 1 weekly + 1 monthly report on every day of the cycle
+    assert scheduler.histogram()[0].peak_runs == 3
+
+def test_load_is_balanced_in_utc_across_timezones():
+    scheduler = stagger.ReportScheduler(allowed_hours=[9], slot_minutes=60)
+    utc, kolkata = scheduler.assign([models.Schedule(timezone="UTC"), models.Schedule(timezone="Asia/Kolkata")])
+    assert (utc.start_time, kolkata.start_time) == ("09:00", "09:00")
+    assert [slot.start_time for slot in scheduler.histogram()] == ["03:00", "09:00"]
+
+def test_day_shift_across_midnight_utc_is_tracked():
+    scheduler = stagger.ReportScheduler(allowed_hours=[2], slot_minutes=60)
+    first, second = scheduler.assign([models.Schedule(frequency='weekly', timezone="Asia/Tokyo")] * 2)
+    assert first.day_of_week != second.day_of_week
+    assert scheduler.histogram() == [models.SlotLoad(start_time="17:00", peak_runs=1, runs_per_day=0.286)]
+
+def test_offsets_ignore_daylight_saving_time():
+    assert stagger.utc_offset_minutes("Europe/Berlin") == 60
+    assert stagger.utc_offset_minutes("America/New_York") == -300
+    # January is summer in the southern hemisphere
+    assert stagger.utc_offset_minutes("Australia/Sydney") == 600
+    assert stagger.utc_offset_minutes("Asia/Kolkata") == 330
+
+def test_last_day_of_month_is_kept():
+    scheduler = stagger.ReportScheduler(allowed_hours=[6], slot_minutes=30)
+    placed = scheduler.assign([models.Schedule(frequency='monthly', day_of_month=-1)] * 2 + [models.Schedule(frequency='monthly')])
+    assert [schedule.day_of_month for schedule in placed[:2]] == [-1, -1]
+    assert {schedule.start_time for schedule in placed[:2]} == {"06:00", "06:30"}
+    assert placed[2].day_of_month != -1
+
+def test_explicit_start_times_are_kept():
+    scheduler = stagger.ReportScheduler(allowed_hours=[6], slot_minutes=60)
+    placed = scheduler.assign([models.Schedule(frequency='weekly', start_time="09:30")] * 2 + [models.Schedule(frequency='weekly')])
+    assert [schedule.start_time for schedule in placed] == ["09:30", "09:30", "06:00"]
+    assert placed[0].day_of_week != placed[1].day_of_week
+    with pytest.raises(ValueError, match="HH:MM"):
+        scheduler.assign([models.Schedule(start_time="25:00")])
+
+def test_day_zero_of_month_raises():
+    with pytest.raises(ValueError, match="day_of_month"):
+        stagger.ReportScheduler().assign([models.Schedule(frequency='monthly', day_of_month=0)])
+
+@pytest.mark.parametrize("options", [{"allowed_hours": []}, {"allowed_hours": [24]}, {"slot_minutes": 7}])
+def test_invalid_constraints_raise(options):
+    with pytest.raises(ValueError):
+        stagger.ReportScheduler(**options)
+
+def test_unknown_timezone_raises():
+    with pytest.raises(ValueError, match="unknown timezone"):
+        stagger.ReportScheduler().assign([models.Schedule(timezone="Mars/Olympus")])
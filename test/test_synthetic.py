@@ -0,0 +1,87 @@
+import json
+import time
+import tracemalloc
+from itertools import islice
+from clumio_terraform_mcp import app, models, partition, schema, synthetic
+
+def small_estate(seed=0, scale=1):
+    return synthetic.SyntheticEstate(
+        seed=seed,
+        accounts=20 * scale,
+        organizational_units=13 * scale,
+        policies=10 * scale,
+        rules=20 * scale,
+        protection_groups=10 * scale,
+        users=20 * scale,
+        report_configurations=5 * scale,
+        assets_per_account=5,
+    )
+
+def test_estate_is_deterministic_per_seed():
+    first = [spec.model_dump() for spec in small_estate(seed=1).resources()]
+    assert first == [spec.model_dump() for spec in small_estate(seed=1).resources()]
+    assert first != [spec.model_dump() for spec in small_estate(seed=2).resources()]
+    assets = list(small_estate(seed=1).assets())
+    assert len(assets) == 100
+    assert all(isinstance(asset, models.Asset) for asset in assets)
+
+def test_estate_renders_valid_configuration():
+    estate = small_estate()
+    for spec in estate.resources():
+        assert schema.validate_configuration(app.render_resource(spec)) == [], spec
+
+def test_policy_rules_use_global_or_top_level_ou_providers():
+    estate = small_estate()
+    for spec in estate.policy_rule_specs():
+        alias = spec.arguments["clumio_provider_alias"]
+        assert alias is None or estate.ou_depth(int(alias.removeprefix("ou_"))) == 1
+    assert max(estate.ou_depth(index) for index in range(estate.organizational_units)) == 3
+
+def test_report_configurations_reference_organizational_units_by_id():
+    estate = small_estate()
+    for spec in estate.report_configuration_specs():
+        [ou] = spec.arguments["filters"]["common"]["organizational_units"]
+        assert ou.startswith("${clumio_organizational_unit.ou_") and ou.endswith(".id}")
+        assert f'organizational_units = ["{ou}"]' in app.render_resource(spec)
+
+def _peak_memory(estate):
+    tracemalloc.start()
+    for _ in estate.resources():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def test_streams_use_constant_memory():
+    small = _peak_memory(small_estate(scale=1))
+    large = _peak_memory(small_estate(scale=20))
+    assert large < small * 2
+
+def _seconds_to_plan(estate):
+    specs = list(estate.resources())
+    started = time.perf_counter()
+    rendered = [app.render_resource(spec) for spec in specs]
+    partitioner = partition.Partitioner(list(estate.clumio_accounts()), list(estate.aws_accounts()), ["ou", "account"])
+    partitioner.plan(specs, rendered)
+    return time.perf_counter() - started
+
+def test_rendering_and_partitioning_scale_linearly():
+    _seconds_to_plan(small_estate(scale=1))
+    baseline = min(_seconds_to_plan(small_estate(scale=2)) for _ in range(2))
+    scaled = min(_seconds_to_plan(small_estate(scale=8)) for _ in range(2))
+    # 4x the estate should take about 4x as long; leave room for noise but catch quadratic behaviour
+    assert scaled < baseline * 8
+
+def test_command_line_streams_json_lines(capsys):
+    synthetic.main(["--accounts", "2", "--organizational-units", "1", "--policies", "1", "--rules", "1",
+                    "--protection-groups", "1", "--users", "1", "--report-configurations", "1", "--assets-per-account", "1"])
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split('"', 4)[3] for line in islice(lines, 0, 4)] == ["clumio_account", "clumio_account", "aws_account", "aws_account"]
+    assert len(lines) == 2 + 2 + 1 + 2 + 1 + 1 + 1 + 1 + 1 + 2
+
+def test_command_line_sets_rule_chain_length(capsys):
+    synthetic.main(["--accounts", "1", "--organizational-units", "0", "--policies", "1", "--rules", "4", "--rule-chain-length", "2",
+                    "--protection-groups", "0", "--users", "0", "--report-configurations", "0", "--assets-per-account", "0"])
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    rules = [record["arguments"] for record in records if record.get("kind") == "policy_rule"]
+    assert [rule.get("before_rule_name") for rule in rules] == [None, "rule_0", None, "rule_2"]
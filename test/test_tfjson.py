@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from clumio_terraform_mcp import app, models, synthetic, tfjson
+
+SLA = {"retention_duration": {"unit": "days", "value": 30}, "rpo_frequency": {"unit": "hours", "value": 12}}
+TIME_UNIT = {"unit": "days", "value": 7}
+
+SPECS = {
+    "aws_connection": {
+        "connection_name": "prod", "description": "Production", "services": {"ebs": True, "s3": True},
+        "aws_provider_alias": "prod", "clumio_provider_alias": "global", "wait_for_ingestion": True,
+    },
+    "aws_connection_defaults": {"connection_name": "dev", "description": "Dev", "services": {"rds": True}},
+    "policy": {
+        "policy_name": "gold", "display_name": "Gold", "clumio_provider_alias": "global", "operations": [
+            {"type": "aws_ebs_volume_backup", "slas": [SLA, SLA], "backup_aws_region": "us-east-1"},
+            {"type": "aws_s3_continuous_backup", "slas": [SLA], "timezone": "UTC",
+             "backup_window_tz": {"start_time": "20:00", "end_time": "08:00"}},
+            {"type": "aws_rds_resource_aws_snapshot", "slas": [SLA]},
+        ],
+    },
+    "protection_group": {
+        "group_name": "pg", "display_name": "PG", "policy_name": "gold", "description": "Buckets",
+        "bucket_rule": {"aws_tag": {"$in": [{"key": "env", "value": "prod"}, {"key": "env", "value": "stage"}]}},
+    },
+    "organizational_unit": {
+        "ou_name": "web", "display_name": "Web", "description": "Web team", "parent_name": "eng", "clumio_provider_alias": "eng",
+    },
+    "policy_rule": {
+        "rule_name": "rule", "display_name": "Rule", "policy_name": "gold", "before_rule_name": "first",
+        "condition_expression": {"entity_type": {"$in": ["aws_ebs_volume", "aws_ec2_instance"]}, "aws_region": {"$eq": "us-west-2"}},
+    },
+    "user_assignment": {
+        "user_name": "alice", "email": "alice@example.com", "full_name": "Alice", "access_control_configuration": [
+            {"role_name": "Super Admin"}, {"role_name": "Organizational Unit Admin", "organizational_unit_ids": ["a", "${clumio_organizational_unit.prod.id}"]},
+        ],
+    },
+    "report_configuration": {
+        "config_name": "weekly", "config_display_name": "Weekly", "email_list": ["a@example.com", "b@example.com"],
+        "controls": {
+            "asset_backup": {"look_back_period": TIME_UNIT, "minimum_retention_duration": TIME_UNIT, "window_size": TIME_UNIT},
+            "asset_protection": {"should_ignore_deactivated_policy": True},
+            "policy": {"minimum_retention_duration": TIME_UNIT, "minimum_rpo_frequency": TIME_UNIT},
+        },
+        "filters": {
+            "asset": {"groups": [{"group_id": "g", "region": "us-west-2"}], "tag_op_mode": "and", "tags": [{"key": "k", "value": "v"}]},
+            "common": {"asset_types": ["aws_ebs_volume"], "organizational_units": ["ou"]},
+        },
+        "schedule": {"frequency": "weekly", "day_of_week": "friday", "start_time": "02:00", "timezone": "Europe/Berlin"},
+    },
+}
+
+@pytest.mark.parametrize("name", SPECS)
+def test_json_output_is_equivalent_to_hcl(name):
+    spec = models.ResourceSpec(kind=name.removesuffix("_defaults"), arguments=SPECS[name])
+    hcl_output = app.render_resource(spec)
+    json_output = app.render_resource(spec, output_format='json')
+    assert json.loads(json_output) == tfjson.from_hcl(hcl_output)
+
+def test_providers_json_output_is_equivalent_to_hcl():
+    arguments = {
+        "clumio_accounts": [models.ClumioAccount(), models.ClumioAccount(alias="eng", ou_name="eng")],
+        "aws_accounts": [models.AWSAccount(alias="prod", region="us-west-2", assume_role=models.AssumeRole(
+            role_arn="arn:aws:iam::111111111111:role/r", session_name="s", external_id="x"))],
+    }
+    hcl_output = app.generate_providers(**arguments)
+    json_output = app.generate_providers(**arguments, output_format='json')
+    assert json.loads(json_output) == tfjson.from_hcl(hcl_output)
+    default_aws = json.loads(app.generate_providers(clumio_accounts=[], aws_accounts=[], output_format='json'))
+    assert default_aws["provider"] == {"aws": [{"region": "${var.aws_region}"}]}
+
+def test_providers_without_session_name_are_equivalent():
+    arguments = {"clumio_accounts": [], "aws_accounts": [
+        models.AWSAccount(alias="prod", assume_role=models.AssumeRole(role_arn="arn:aws:iam::111111111111:role/r")),
+    ]}
+    hcl_output = app.generate_providers(**arguments)
+    assert 'session_name = "clumio-session"' in hcl_output
+    assert json.loads(app.generate_providers(**arguments, output_format='json')) == tfjson.from_hcl(hcl_output)
+
+def test_json_strings_are_not_interpolated():
+    spec = models.ResourceSpec(kind="organizational_unit", arguments={
+        "ou_name": "ou", "display_name": "Cost ${center}", "description": "100%{x}",
+    })
+    body = json.loads(app.render_resource(spec, output_format='json'))["resource"]["clumio_organizational_unit"]["ou"]
+    assert body == {"name": "Cost $${center}", "description": "100%%{x}"}
+
+def test_json_references_are_interpolated():
+    spec = models.ResourceSpec(kind="policy_rule", arguments={
+        "rule_name": "rule", "display_name": "${center}", "policy_name": "gold",
+        "condition_expression": {"aws_region": {"$eq": "${clumio_aws_connection.prod.aws_region}"}, "aws_tag": {"$eq": {"key": "k", "value": "${v"}}},
+    })
+    body = json.loads(app.render_resource(spec, output_format='json'))["resource"]["clumio_policy_rule"]["rule"]
+    # Without an attribute path it is a literal value, not a reference
+    assert body["name"] == "$${center}"
+    assert body["condition"] == '{"aws_region":{"$eq":"${clumio_aws_connection.prod.aws_region}"},"aws_tag":{"$eq":{"key":"k","value":"$${v"}}}'
+
+def test_render_resource_ignores_output_format_argument():
+    spec = models.ResourceSpec(kind="organizational_unit", arguments={**SPECS["organizational_unit"], "output_format": "json"})
+    assert app.render_resource(spec).startswith('resource "clumio_organizational_unit" "web"')
+    json.loads(app.render_resource(spec, output_format='json'))
+
+def test_benchmark_times_both_formats():
+    estate = synthetic.SyntheticEstate(seed=3, accounts=2, organizational_units=2, users=2)
+    timings = tfjson.benchmark(list(estate.resources()), repeat=1)
+    assert sorted(timings) == ["hcl_parse", "hcl_render", "json_parse", "json_render"]
+    assert all(seconds > 0 for seconds in timings.values())